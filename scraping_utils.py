@@ -1,35 +1,134 @@
-import requests
 import os
-from lxml import html
 import json
+import tempfile
+import time
 
+# requests and lxml are imported by the functions that use them: reading a cached file
+# (fetch_file within the ttl, iter_lines) should not pay for importing them
 
-def get_url(url, filename):
-    if not os.path.exists(filename):
-        
-        # set useragent for requests
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
-        
-        # fetch the page if it doesn't exist
-        page = requests.get(url, headers=headers)
 
-        # save the page to a file
-        with open(filename, 'w', encoding='UTF8') as f:
-            f.write(page.text)
+# set useragent for requests
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
 
-        page = page.text
 
-    else:
-        # if the page exists, read it from the file
-        with open(filename, 'r', encoding='UTF8') as f:
-            page = f.read() 
-            
+def make_session(pool_size=10, retries=3, backoff=0.5):
+    """A pooled `requests.Session` that retries connection errors and 429/5xx replies
+    with exponential backoff (backoff * 2**n seconds)."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=retries, connect=retries, read=retries, backoff_factor=backoff,
+                  status_forcelist=(429, 500, 502, 503, 504), allowed_methods=('GET', 'HEAD'))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def meta_path(filename):
+    """Sidecar file holding the cache metadata (ETag, Last-Modified, fetch time) for `filename`."""
+    return filename + '.meta.json'
+
+
+def read_meta(filename):
+    try:
+        with open(meta_path(filename), 'r', encoding='UTF8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def atomic_write(filename, data):
+    """Write bytes (or an iterable of byte chunks) to `filename` via a temp file + rename,
+    so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(filename), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if isinstance(data, (bytes, bytearray)):
+                f.write(data)
+            else:
+                for chunk in data:
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filename)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write_meta(filename, meta):
+    atomic_write(meta_path(filename), json.dumps(meta, indent=1).encode('UTF8'))
+
+
+def fetch_file(url, filename, ttl=None, timeout=60, chunk_size=1 << 16, session=None):
+    """Make sure `filename` holds an up-to-date copy of `url` and return `filename`.
+
+    The response is streamed to disk in `chunk_size` pieces (raw bytes, no decoding), so
+    memory use does not depend on the file size. ttl is the cache lifetime in seconds for
+    this URL. With ttl=None a cached file is used forever (only downloaded when missing).
+    Once the ttl has passed a conditional GET is sent (If-None-Match / If-Modified-Since
+    from the `.meta.json` sidecar); a 304 reply only refreshes the metadata. Downloads go
+    to a temp file that is renamed into place when complete. If the refresh fails and a
+    cached copy exists, the cached copy is kept. Pass a `session` (see `make_session`) to
+    reuse pooled connections across downloads.
+    """
+    meta = read_meta(filename)
+    cached = os.path.exists(filename)
+    if cached and (ttl is None or time.time() - meta.get('fetched_at', 0) < ttl):
+        return filename
+
+    import requests
+    headers = dict(HEADERS)
+    if cached and meta.get('url') == url:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    try:
+        with (session or requests).get(url, headers=headers, timeout=timeout, stream=True) as page:
+            if page.status_code == 304:
+                meta['fetched_at'] = time.time()
+            else:
+                page.raise_for_status()
+                atomic_write(filename, page.iter_content(chunk_size))
+                meta = {'url': url, 'etag': page.headers.get('ETag'),
+                        'last_modified': page.headers.get('Last-Modified'), 'fetched_at': time.time()}
+    except requests.RequestException as e:
+        if not cached:
+            raise
+        print(f'Warning: refreshing {url} failed ({e}); using cached {filename}')
+        return filename
+    _write_meta(filename, meta)
+    return filename
+
+
+def iter_lines(filename):
+    """Yield the lines of a cached file one at a time (UTF-8, BOM stripped)."""
+    with open(filename, 'r', encoding='utf-8-sig', errors='replace') as f:
+        yield from f
+
+
+def get_url(url, filename, ttl=None, timeout=60):
+    """Return the text of `url`, cached in `filename` (see `fetch_file` for the cache rules)."""
+    fetch_file(url, filename, ttl=ttl, timeout=timeout)
+
+    # read the page from the cache file
+    with open(filename, 'r', encoding='UTF8', errors='replace') as f:
+        page = f.read()
+
     return page
 
 def parse(page, mode = 'html'):
     match mode:
         case 'html':
+            from lxml import html
             return html.fromstring(page)
         case 'json':
-            return json.loads(page)
\ No newline at end of file
+            return json.loads(page)
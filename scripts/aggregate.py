@@ -0,0 +1,156 @@
+"""Vectorized calendar aggregation for daily series.
+
+Values are grouped by integer period keys computed from the `datetime64[D]` index
+(days, months, meteorological seasons or years since 1970) and reduced with
+`np.bincount` (sum/count/mean) or `np.minimum.reduceat` / `np.maximum.reduceat` (min/max).
+Missing values (NaN) are ignored. Several stations can be reduced in one call by passing a
+2-D value array (one row per station) on a shared date index, see `stack_series`.
+
+Frequencies: 'D' day, 'M' month, 'S' season (DJF/MAM/JJA/SON, December counts towards the
+following year's winter), 'Y' year.
+Reductions: 'sum', 'mean', 'min', 'max', 'count' (number of valid values).
+
+Functions:
+- aggregate(dates, values, freq='M', how='mean', start=None, end=None) -> (periods, result)
+- aggregate_series(series_list, freq='M', how='mean', start=None, end=None) -> (periods, 2-D result)
+- stack_series(series_list) -> (dates, 2-D values) on the union day range
+- season_labels(periods) -> ['2010-DJF', ...]
+- period_days(periods, freq) -> calendar days in each period
+"""
+from __future__ import annotations
+from typing import Sequence, Tuple
+
+import numpy as np
+
+FREQS = ('D', 'M', 'S', 'Y')
+HOWS = ('sum', 'mean', 'min', 'max', 'count')
+SEASONS = ('DJF', 'MAM', 'JJA', 'SON')
+
+
+def _keys(dates: np.ndarray, freq: str) -> np.ndarray:
+    """Integer period number of every date (days/months/seasons/years since 1970)."""
+    if freq == 'D':
+        return dates.astype('datetime64[D]').astype(np.int64)
+    if freq == 'M':
+        return dates.astype('datetime64[M]').astype(np.int64)
+    if freq == 'S':
+        # shift by one month so December joins the next January/February
+        return (dates.astype('datetime64[M]').astype(np.int64) + 1) // 3
+    if freq == 'Y':
+        return dates.astype('datetime64[Y]').astype(np.int64)
+    raise ValueError(f'unknown frequency: {freq!r} (expected one of {FREQS})')
+
+
+def _labels(first: int, n: int, freq: str) -> np.ndarray:
+    """Period start dates for keys first..first+n-1."""
+    keys = np.arange(first, first + n, dtype=np.int64)
+    if freq == 'S':
+        # a season starts in its first month (December for DJF)
+        return (keys * 3 - 1).astype('datetime64[M]')
+    unit = {'D': 'D', 'M': 'M', 'Y': 'Y'}[freq]
+    return keys.astype(f'datetime64[{unit}]')
+
+
+def season_labels(periods: np.ndarray) -> list:
+    """Readable names for 'S' periods, e.g. 2010-12 -> '2011-DJF'."""
+    keys = (periods.astype('datetime64[M]').astype(np.int64) + 1) // 3
+    return [f'{1970 + k // 4}-{SEASONS[k % 4]}' for k in keys.tolist()]
+
+
+def period_days(periods: np.ndarray, freq: str) -> np.ndarray:
+    """Number of calendar days in each period (periods as returned by `aggregate`)."""
+    if freq == 'D':
+        return np.ones(len(periods), dtype=np.int64)
+    step = {'M': 1, 'S': 3, 'Y': 12}[freq]
+    months = periods.astype('datetime64[M]')
+    bounds = np.concatenate([months, months[-1:] + step]).astype('datetime64[D]') if len(periods) else months
+    return np.diff(bounds.astype(np.int64))
+
+
+def aggregate(dates, values, freq: str = 'M', how: str = 'mean', start=None, end=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Reduce daily values into calendar periods.
+
+    dates: sorted `datetime64[D]` array of length n. values: shape (n,) or (stations, n).
+    Returns (periods, result) where periods are the start dates of a contiguous run of
+    periods from `start` to `end` (defaults: first/last date) and result has shape
+    (len(periods),) or (stations, len(periods)). Periods without valid values are 0 for
+    'sum'/'count' and NaN otherwise.
+    """
+    if how not in HOWS:
+        raise ValueError(f'unknown aggregation: {how!r} (expected one of {HOWS})')
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    values = np.asarray(values, dtype=np.float64)
+    one_d = values.ndim == 1
+    values = np.atleast_2d(values)
+    keys = _keys(dates, freq)
+
+    if start is not None:
+        first = int(_keys(np.array([np.datetime64(start, 'D')]), freq)[0])
+    elif len(keys):
+        first = int(keys[0])
+    else:
+        first = 0
+    if end is not None:
+        last = int(_keys(np.array([np.datetime64(end, 'D')]), freq)[0])
+    elif len(keys):
+        last = int(keys[-1])
+    else:
+        last = first - 1
+    n = max(last - first + 1, 0)
+    periods = _labels(first, n, freq)
+
+    # keep days inside [first, last]; dates are sorted so this is a contiguous slice
+    lo, hi = np.searchsorted(keys, [first, last + 1])
+    idx = keys[lo:hi] - first
+    block = values[:, lo:hi]
+    rows = block.shape[0]
+    valid = ~np.isnan(block)
+
+    if how in ('sum', 'count', 'mean'):
+        flat = (np.arange(rows, dtype=np.int64)[:, None] * n + idx).ravel()
+        counts = np.bincount(flat, weights=valid.ravel(), minlength=rows * n).reshape(rows, n)
+        if how == 'count':
+            out = counts
+        else:
+            sums = np.bincount(flat, weights=np.where(valid, block, 0.0).ravel(), minlength=rows * n).reshape(rows, n)
+            if how == 'sum':
+                out = sums
+            else:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    out = np.where(counts > 0, sums / np.where(counts > 0, counts, 1), np.nan)
+    else:
+        out = np.full((rows, n), np.nan)
+        if len(idx):
+            fill = np.inf if how == 'min' else -np.inf
+            ufunc = np.minimum if how == 'min' else np.maximum
+            starts = np.flatnonzero(np.r_[True, idx[1:] != idx[:-1]])
+            reduced = ufunc.reduceat(np.where(valid, block, fill), starts, axis=1)
+            reduced[np.isinf(reduced)] = np.nan
+            out[:, idx[starts]] = reduced
+
+    return periods, (out[0] if one_d else out)
+
+
+def stack_series(series_list: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """Place several DailySeries on their union day range as a (stations, days) array.
+
+    Days a station does not cover are NaN. Uses index arithmetic on the day numbers, so
+    the cost is linear in the total number of rows.
+    """
+    non_empty = [s for s in series_list if len(s)]
+    if not non_empty:
+        return np.empty(0, 'datetime64[D]'), np.empty((len(series_list), 0))
+    first = min(s.dates[0] for s in non_empty)
+    last = max(s.dates[-1] for s in non_empty)
+    dates = np.arange(first, last + 1)
+    out = np.full((len(series_list), len(dates)), np.nan)
+    for row, s in enumerate(series_list):
+        if len(s):
+            out[row, (s.dates - first).astype(np.int64)] = s.values
+    return dates, out
+
+
+def aggregate_series(series_list: Sequence, freq: str = 'M', how: str = 'mean', start=None, end=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Aggregate many DailySeries in one call; result has one row per series."""
+    dates, values = stack_series(series_list)
+    return aggregate(dates, values, freq, how, start, end)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark the vectorized date parsing against the per-row `strptime` it replaced.
+
+Usage:
+  .venv/bin/python scripts/bench_dates.py [rows]
+
+Prints the best-of-5 time for:
+ - ISO dates ('%Y-%m-%d'), as in the processed wind/rainfall CSVs
+ - ISO minutes ('%Y-%m-%d %H:%M'), as in `rainfall_utils.load_rainfall_csv`
+ - '%d/%m/%Y' via the format-detected fallback vs. the old per-row format branching
+"""
+import datetime
+import sys
+import timeit
+
+import numpy as np
+
+from dates import DMY, ISO_DATE, ISO_MINUTE, parse_dates
+
+
+def _legacy_iso(strings, fmt, width):
+    out = []
+    for s in strings:
+        try:
+            out.append(datetime.datetime.strptime(s[:width], fmt))
+        except Exception:
+            continue
+    return out
+
+
+def _legacy_branching(strings):
+    # what fetch_monthly_kaitak.py did for every row
+    out = []
+    for s in strings:
+        try:
+            if '-' in s:
+                dt = datetime.datetime.strptime(s, '%Y-%m-%d')
+            elif '/' in s:
+                dt = datetime.datetime.strptime(s, '%d/%m/%Y')
+            else:
+                dt = datetime.datetime.strptime(s, '%Y%m%d')
+        except Exception:
+            continue
+        out.append(dt)
+    return out
+
+
+def _best(fn, repeat=5):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    days = np.datetime64('1990-01-01') + np.arange(n) % 15000
+    iso = days.astype(str).tolist()
+    minutes = [f'{d} {i % 24:02d}:00' for i, d in enumerate(iso)]
+    dmy = [f'{d[8:10]}/{d[5:7]}/{d[0:4]}' for d in iso]
+
+    cases = [
+        ('ISO date', lambda: _legacy_iso(iso, ISO_DATE, 10), lambda: parse_dates(iso, ISO_DATE)),
+        ('ISO minute', lambda: _legacy_iso(minutes, ISO_MINUTE, 16), lambda: parse_dates(minutes, ISO_MINUTE)),
+        ('d/m/Y', lambda: _legacy_branching(dmy), lambda: parse_dates(dmy, DMY)),
+    ]
+    print(f'{n} rows, best of 5')
+    for label, old, new in cases:
+        t_old = _best(old)
+        t_new = _best(new)
+        print(f'{label:<11} strptime {t_old * 1000:8.1f} ms   parse_dates {t_new * 1000:7.1f} ms   speedup {t_old / t_new:6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Throughput benchmarks for the parse, load, aggregate and render stages.
+
+Run explicitly (the file is not collected by a plain `pytest` run); needs pytest-benchmark:
+
+  .venv/bin/python -m pytest scripts/bench_pipeline.py --benchmark-autosave
+  # later, fail if any stage got more than 15% slower than the last saved run:
+  .venv/bin/python -m pytest scripts/bench_pipeline.py --benchmark-compare --benchmark-compare-fail=mean:15%
+
+Inputs are synthetic HKO station-block files at 1x, 10x and 100x the size of
+`daily_SE_WSPD_ALL.csv` (one ~9,800 row station block per 1x), written once per session.
+The parse, load and aggregate benchmarks also measure peak traced memory (tracemalloc) for
+one call, store it in the report's `extra_info` and fail when it exceeds the stage's
+bytes-per-row budget, so memory regressions fail even without a saved baseline. Results are grouped per stage, so
+the report shows the scaling curve across the three sizes.
+"""
+import datetime
+import os
+import tracemalloc
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from fetch_kaitak_wind import parse_station_block_lines
+from hko_blocks import parse_station_blocks
+from hko_bytes import parse_file
+from make_7_svg import make_svg
+from make_monthly_wind_rain import aggregate_monthly, plot
+from rainfall_utils import load_rainfall_csv
+from scraping_utils import iter_lines
+from series import DailySeries
+
+ROWS_1X = 9_800
+SCALES = [1, 10, 100]
+# rendering cost grows with the number of bars; 100x (~32k months) is not a realistic chart
+RENDER_SCALES = [1, 10]
+
+# peak traced bytes per input row allowed for one call of each stage
+BUDGETS = {
+    'parse_station_blocks': 48,
+    'parse_file': 320,
+    'parse_station_block_lines': 1_200,
+    'load_rainfall_csv': 1_500,
+    'aggregate_monthly': 200,
+}
+
+
+def _write_station_file(path, scale):
+    start = datetime.date(1998, 10, 1).toordinal()
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        for station in range(scale):
+            name = 'Kai Tak' if station == 0 else f'Station {station:03d}'
+            f.write(f'平均風速 (公里/小時) - {name}\nMean Wind Speed (km/h) - {name}\n')
+            f.write('年/Year,月/Month,日/Day,數值/Value,數據完整性/data Completeness\n')
+            rng = np.random.default_rng(station)
+            values = np.round(rng.gamma(4.0, 4.0, ROWS_1X), 1)
+            for i, v in enumerate(values.tolist()):
+                d = datetime.date.fromordinal(start + i)
+                f.write(f'{d.year},{d.month},{d.day},{v if i % 97 else "***"},{"C" if i % 97 else ""}\n')
+            f.write('\n')
+        f.write('*** 沒有數據/unavailable\n# 數據不完整/data incomplete\nC 數據完整/data Complete\n')
+
+
+def _write_hourly_file(path, scale):
+    n = ROWS_1X * scale
+    stamps = (np.datetime64('2000-01-01T00:00') + np.arange(n).astype('timedelta64[h]')).astype(str)
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('datetime,rainfall_mm,humidity_pct\n')
+        for i, s in enumerate(stamps.tolist()):
+            f.write(f'{s[:10]} {s[11:16]},{(i % 13) * 0.1:.1f},{60 + i % 30}%\n')
+
+
+@pytest.fixture(scope='session')
+def inputs(tmp_path_factory):
+    base = tmp_path_factory.mktemp('bench')
+    files = {}
+    for scale in SCALES:
+        blocks = base / f'daily_SE_WSPD_{scale}x.csv'
+        hourly = base / f'hourly_{scale}x.csv'
+        _write_station_file(blocks, scale)
+        _write_hourly_file(hourly, scale)
+        files[scale] = (str(blocks), str(hourly))
+    return files
+
+
+def _daily(scale, seed):
+    n = ROWS_1X * scale
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.gamma(4.0, 4.0, n), 1)
+    values[::97] = np.nan
+    return DailySeries(np.datetime64('1000-01-01') + np.arange(n), values)
+
+
+def _peak_bytes(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _run(benchmark, stage, scale, fn, rows):
+    benchmark.group = stage
+    benchmark.extra_info['rows'] = rows
+    peak = None
+    if stage in BUDGETS:
+        peak = _peak_bytes(fn)
+        benchmark.extra_info['peak_bytes'] = peak
+    benchmark.pedantic(fn, rounds=3 if scale >= 10 else 5, iterations=1)
+    if peak is not None:
+        assert peak <= BUDGETS[stage] * rows, f'{stage} peak memory {peak} B exceeds {BUDGETS[stage]} B/row'
+
+
+@pytest.mark.parametrize('scale', SCALES)
+def test_parse_station_blocks(benchmark, inputs, scale):
+    path = inputs[scale][0]
+    _run(benchmark, 'parse_station_blocks', scale, lambda: parse_station_blocks(iter_lines(path)), ROWS_1X * scale)
+
+
+@pytest.mark.parametrize('scale', SCALES)
+def test_parse_file(benchmark, inputs, scale):
+    path = inputs[scale][0]
+    _run(benchmark, 'parse_file', scale, lambda: parse_file(path), ROWS_1X * scale)
+
+
+@pytest.mark.parametrize('scale', SCALES)
+def test_parse_station_block_lines(benchmark, inputs, scale):
+    # 'Kai Tak' is the one station present at every scale, so every scale selects one block
+    path = inputs[scale][0]
+    with open(path, encoding='utf-8-sig') as f:
+        lines = f.read().splitlines()
+    _run(benchmark, 'parse_station_block_lines', scale,
+         lambda: parse_station_block_lines(lines, 'Kai Tak', 1900, 2100), ROWS_1X * scale)
+
+
+@pytest.mark.parametrize('scale', SCALES)
+def test_load_rainfall_csv(benchmark, inputs, scale):
+    path = inputs[scale][1]
+    # the loader itself, not the memo cache (see memo.py)
+    _run(benchmark, 'load_rainfall_csv', scale, lambda: load_rainfall_csv.uncached(path), ROWS_1X * scale)
+
+
+@pytest.mark.parametrize('scale', SCALES)
+def test_aggregate_monthly(benchmark, scale):
+    wind, rain = _daily(scale, 1), _daily(scale, 2)
+    _run(benchmark, 'aggregate_monthly', scale, lambda: aggregate_monthly(wind, rain), ROWS_1X * scale)
+
+
+def test_make_svg(benchmark):
+    benchmark.group = 'make_svg'
+    benchmark(make_svg, 12.34, 2345.6)
+
+
+@pytest.mark.parametrize('scale', RENDER_SCALES)
+def test_render_monthly_chart(benchmark, tmp_path, monkeypatch, scale):
+    monkeypatch.chdir(tmp_path)
+    months, wind_means, rain_totals = aggregate_monthly(_daily(scale, 1), _daily(scale, 2))
+
+    benchmark.extra_info['points'] = len(months)
+    _run(benchmark, 'render_monthly_chart', scale, lambda: plot(months, wind_means, rain_totals), len(months))
+    assert os.path.exists(tmp_path / 'monthly_wind_rain.png')
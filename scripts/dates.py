@@ -0,0 +1,127 @@
+"""Fast date parsing for the CSV loaders.
+
+The date format is detected once per file (`detect_format`) and whole columns are then
+parsed at once. Fixed-width formats are decoded with integer arithmetic on the raw
+characters (a (rows, width) uint8 view of the strings) instead of one `strptime` per row;
+rows that do not match the format (bad text, impossible dates) are flagged invalid rather
+than raising. Dates without zero padding ('1/2/2010', '2010-1-1') are not fixed width; for
+the formats `strptime` accepts them in (DMY, ISO_DATE, ISO_MINUTE) the rows the
+fixed-width pass rejects are retried with `strptime`.
+
+Formats:
+- ISO_DATE   '%Y-%m-%d'        -> datetime64[D] (strptime retry for unpadded rows)
+- ISO_MINUTE '%Y-%m-%d %H:%M'  -> datetime64[m] (strptime retry for unpadded rows)
+- COMPACT    '%Y%m%d'          -> datetime64[D]
+- DMY        '%d/%m/%Y'        -> datetime64[D] (strptime retry for unpadded rows)
+- COMPACT_MINUTE '%Y%m%d%H%M'  -> datetime64[m] (HKO 10-minute / hourly files)
+
+Functions:
+- detect_format(sample) -> one of the formats above, or None
+- parse_dates(strings, fmt=None) -> (datetime64 array, valid mask)
+- days_from_ymd(y, m, d) -> (datetime64[D] array, valid mask) from integer columns
+"""
+from __future__ import annotations
+import datetime
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+ISO_DATE = '%Y-%m-%d'
+ISO_MINUTE = '%Y-%m-%d %H:%M'
+COMPACT = '%Y%m%d'
+DMY = '%d/%m/%Y'
+COMPACT_MINUTE = '%Y%m%d%H%M'
+
+# fixed-width formats: (width, positions that must be '-' / ' ' / ':', (start, stop) of each field)
+_LAYOUTS = {
+    ISO_DATE: (10, {4: b'-', 7: b'-'}, {'y': (0, 4), 'm': (5, 7), 'd': (8, 10)}),
+    ISO_MINUTE: (16, {4: b'-', 7: b'-', 10: b' ', 13: b':'},
+                 {'y': (0, 4), 'm': (5, 7), 'd': (8, 10), 'H': (11, 13), 'M': (14, 16)}),
+    COMPACT: (8, {}, {'y': (0, 4), 'm': (4, 6), 'd': (6, 8)}),
+    DMY: (10, {2: b'/', 5: b'/'}, {'d': (0, 2), 'm': (3, 5), 'y': (6, 10)}),
+    COMPACT_MINUTE: (12, {}, {'y': (0, 4), 'm': (4, 6), 'd': (6, 8), 'H': (8, 10), 'M': (10, 12)}),
+}
+
+# formats whose rows may lack zero padding; rejected rows are retried with strptime
+_UNPADDED = (ISO_DATE, ISO_MINUTE, DMY)
+
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def detect_format(sample: str) -> Optional[str]:
+    """Guess the format of one date string (typically the first data row)."""
+    s = (sample or '').strip()
+    for fmt in (ISO_MINUTE, ISO_DATE, COMPACT, DMY, COMPACT_MINUTE):
+        try:
+            datetime.datetime.strptime(s[:16] if fmt == ISO_MINUTE else s, fmt)
+            return fmt
+        except ValueError:
+            continue
+    # ISO date with a trailing time part we do not use, e.g. '2010-01-01T00:00'
+    try:
+        datetime.datetime.strptime(s[:10], ISO_DATE)
+        return ISO_DATE
+    except ValueError:
+        return None
+
+
+def days_from_ymd(y: np.ndarray, m: np.ndarray, d: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(datetime64[D] days, ok) from integer year/month/day arrays; invalid dates are flagged."""
+    ok = (m >= 1) & (m <= 12) & (d >= 1)
+    leap = ((y % 4 == 0) & (y % 100 != 0)) | (y % 400 == 0)
+    dim = _DAYS_IN_MONTH[np.clip(m, 1, 12) - 1] + (leap & (m == 2))
+    ok &= d <= dim
+    months = np.where(ok, (y - 1970) * 12 + m - 1, 0)
+    days = months.astype('datetime64[M]').astype('datetime64[D]') + np.where(ok, d - 1, 0)
+    return days, ok
+
+
+def _parse_fixed(strings: Sequence[str], fmt: str) -> Tuple[np.ndarray, np.ndarray]:
+    width, seps, fields = _LAYOUTS[fmt]
+    n = len(strings)
+    # 'S{width}' truncates longer strings and zero-pads shorter ones
+    try:
+        raw = np.array(strings, dtype=f'S{width}') if n else np.empty(0, f'S{width}')
+    except UnicodeEncodeError:
+        raw = np.array([s.encode('ascii', 'replace') for s in strings], dtype=f'S{width}')
+    chars = raw.view(np.uint8).reshape(n, width)
+    digits = chars - ord('0')
+    ok = np.ones(n, dtype=bool)
+    for pos, sep in seps.items():
+        ok &= chars[:, pos] == sep[0]
+    values = {}
+    for name, (a, b) in fields.items():
+        block = digits[:, a:b]
+        ok &= (block <= 9).all(axis=1)
+        values[name] = (block.astype(np.int64) * (10 ** np.arange(b - a - 1, -1, -1))).sum(axis=1)
+    days, valid = days_from_ymd(values['y'], values['m'], values['d'])
+    ok &= valid
+    if 'H' not in fields:
+        return days, ok
+    H, M = values['H'], values['M']
+    ok &= (H <= 23) & (M <= 59)
+    minutes = days.astype('datetime64[m]') + np.where(ok, H * 60 + M, 0).astype('timedelta64[m]')
+    return minutes, ok
+
+
+def parse_dates(strings: Sequence[str], fmt: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Parse a column of date strings.
+
+    fmt defaults to `detect_format` of the first non-empty string. Returns (dates, valid):
+    dates is datetime64[D] (datetime64[m] for ISO_MINUTE / COMPACT_MINUTE); entries where valid is False
+    could not be parsed and hold an arbitrary date.
+    """
+    if fmt is None:
+        fmt = detect_format(next((s for s in strings if s), ''))
+    if fmt is None:
+        return np.zeros(len(strings), dtype='datetime64[D]'), np.zeros(len(strings), dtype=bool)
+    out, ok = _parse_fixed(strings, fmt)
+    if fmt in _UNPADDED:
+        strptime = datetime.datetime.strptime
+        for i in np.flatnonzero(~ok).tolist():
+            try:
+                out[i] = strptime(strings[i].strip(), fmt)
+                ok[i] = True
+            except ValueError:
+                pass
+    return out, ok
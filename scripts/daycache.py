@@ -0,0 +1,149 @@
+"""Memory-mapped binary cache of one processed daily series.
+
+For a processed CSV column (e.g. `kaitak_wind_2010_2025.csv` / mean_wspd) the cache file
+`<csv>.<column>.daycache` holds a fixed 64-byte header followed by one float64 per day from
+the first to the last date (NaN for missing days):
+
+    offset  size  field
+    0       8     magic b'HKODAY2\\0'
+    8       8     first day (int64, days since 1970-01-01)
+    16      8     number of days (int64)
+    24      8     source CSV size in bytes
+    32      8     source CSV mtime (ns)
+    40      16    blake2b-128 digest of the source CSV
+    56      8     reserved
+
+The values are the CSV's float64 values unchanged, so every consumer of `load_range`
+(rollup, serve, the plotting scripts) sees exactly what the CSV holds. The values are
+opened with `np.memmap`, so a script that needs one date range only touches those pages.
+The cache is rebuilt when the CSV's size/mtime changes and its hash differs (a touched but
+unchanged file only gets its header refreshed).
+
+Functions:
+- open_daycache(csv_path, date_col, value_col) -> DayCache (None if the CSV is missing)
+- load_range(csv_path, date_col, value_col, start=None, end=None) -> DailySeries
+"""
+from __future__ import annotations
+import hashlib
+import os
+import struct
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+from series import DailySeries
+from storage import load_series
+
+MAGIC = b'HKODAY2\0'
+HEADER = struct.Struct('<8sqqqq16s8x')
+assert HEADER.size == 64
+
+
+def cache_path(csv_path: str, value_col: str) -> str:
+    return f'{csv_path}.{value_col}.daycache'
+
+
+def file_digest(path: str) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.digest()
+
+
+class DayCache:
+    """A mapped day-offset-indexed float64 array."""
+
+    __slots__ = ('path', 'first', 'values')
+
+    def __init__(self, path: str, first: np.datetime64, values: np.ndarray):
+        self.path = path
+        self.first = first
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def slice(self, start=None, end=None, name: str = '') -> DailySeries:
+        """DailySeries for [start, end]; only the mapped pages of that range are read."""
+        lo = 0 if start is None else int((np.datetime64(start, 'D') - self.first).astype(np.int64))
+        hi = len(self) if end is None else int((np.datetime64(end, 'D') - self.first).astype(np.int64)) + 1
+        lo, hi = max(lo, 0), min(hi, len(self))
+        if hi <= lo:
+            return DailySeries.empty(name)
+        dates = np.arange(self.first + lo, self.first + hi)
+        return DailySeries(dates, np.array(self.values[lo:hi], dtype=np.float64), name)
+
+
+def _read_header(path: str):
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(raw) != HEADER.size:
+        return None
+    fields = HEADER.unpack(raw)
+    if fields[0] != MAGIC:
+        return None
+    return fields
+
+
+def _write(path: str, header: bytes, values: Optional[np.ndarray]) -> None:
+    # unique temp name: two readers (threads of the pipeline runner) may rebuild at once
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(header)
+        if values is not None:
+            f.write(values.astype('<f8').tobytes())
+    os.replace(tmp, path)
+
+
+def build(csv_path: str, date_col: str, value_col: str) -> str:
+    """(Re)build the cache file for one CSV column and return its path."""
+    st = os.stat(csv_path)
+    series = load_series(csv_path, date_col, value_col)
+    if len(series):
+        first = series.dates[0]
+        n = int((series.dates[-1] - first).astype(np.int64)) + 1
+        values = np.full(n, np.nan)
+        values[(series.dates - first).astype(np.int64)] = series.values
+        first_day = int(first.astype(np.int64))
+    else:
+        values, first_day, n = np.empty(0), 0, 0
+    path = cache_path(csv_path, value_col)
+    _write(path, HEADER.pack(MAGIC, first_day, n, st.st_size, st.st_mtime_ns, file_digest(csv_path)), values)
+    return path
+
+
+def open_daycache(csv_path: str, date_col: str, value_col: str) -> Optional[DayCache]:
+    """Map the cache for `csv_path`/`value_col`, rebuilding it first if it is stale."""
+    if not os.path.exists(csv_path):
+        return None
+    path = cache_path(csv_path, value_col)
+    st = os.stat(csv_path)
+    header = _read_header(path)
+    if header is None or os.path.getsize(path) != HEADER.size + 8 * header[2]:
+        build(csv_path, date_col, value_col)
+    elif (header[3], header[4]) != (st.st_size, st.st_mtime_ns):
+        digest = file_digest(csv_path)
+        if digest == header[5]:
+            # same content, new mtime: refresh the header only
+            with open(path, 'r+b') as f:
+                f.write(HEADER.pack(MAGIC, header[1], header[2], st.st_size, st.st_mtime_ns, digest))
+        else:
+            build(csv_path, date_col, value_col)
+    _, first_day, n = _read_header(path)[:3]
+    first = np.datetime64(first_day, 'D')
+    if n == 0:
+        return DayCache(path, first, np.empty(0))
+    return DayCache(path, first, np.memmap(path, dtype='<f8', mode='r', offset=HEADER.size, shape=(n,)))
+
+
+def load_range(csv_path: str, date_col: str, value_col: str, start=None, end=None) -> DailySeries:
+    """Daily values of one CSV column for [start, end] via the mapped cache."""
+    cache = open_daycache(csv_path, date_col, value_col)
+    if cache is None:
+        return DailySeries.empty(value_col)
+    return cache.slice(start, end, value_col)
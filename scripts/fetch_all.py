@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Download several HKO element CSVs concurrently over one pooled session.
+
+Each element (RF rainfall, WSPD wind speed, RH humidity, ...) is fetched with
+`scraping_utils.fetch_file`, so the conditional cache and atomic writes apply. Downloads run
+in a thread pool sharing one `requests.Session` (connection pooling, retry with backoff)
+with at most PER_HOST concurrent requests to the same host. A full refresh takes roughly as
+long as the slowest single download. The per-element scripts then read the fresh cache.
+
+Environment variables (optional):
+  FETCH_ELEMENTS - comma separated element codes (default: RF,WSPD,RH)
+  HKO_STATION - station group used in the default URLs (default: SE)
+  RAINFALL_URL / WIND_URL / HUMIDITY_URL - override the URL for RF / WSPD / RH
+  CACHE_TTL - seconds before a cached file is revalidated (default: 86400)
+  FETCH_WORKERS / PER_HOST - thread pool size / concurrent requests per host (defaults: 8 / 4)
+  FETCH_TIMEOUT - connect/read timeout in seconds (default: 60)
+  RUN_REPORT - 1 to write the JSON stage report to fetch_all.run.json, or its path (default: off)
+
+Usage:
+  PYTHONPATH=. .venv/bin/python scripts/fetch_all.py
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+try:
+    from scraping_utils import fetch_file, make_session
+except Exception:
+    print("Error: please run with PYTHONPATH='.' so scraping_utils can be imported")
+    raise
+from instrument import stage, start_run
+
+URL_TEMPLATE = 'https://data.weather.gov.hk/weatherAPI/cis/csvfile/{station}/ALL/daily_{station}_{element}_ALL.csv'
+
+# element code -> env var that overrides its URL
+URL_ENV = {'RF': 'RAINFALL_URL', 'WSPD': 'WIND_URL', 'RH': 'HUMIDITY_URL'}
+
+
+def element_url(element, station='SE'):
+    """URL of one element CSV: its URL_ENV override, else URL_TEMPLATE.
+
+    The per-element scripts and pipeline.py use this too, so a cached file is always
+    revalidated against the same URL whichever script fetched it last.
+    """
+    return os.getenv(URL_ENV.get(element, ''), '') or URL_TEMPLATE.format(station=station, element=element)
+
+
+def element_jobs(elements, station='SE'):
+    """Return [(element, url, filename)] for the element codes."""
+    return [(element, element_url(element, station), f'daily_{station}_{element}_ALL.csv') for element in elements]
+
+
+def fetch_all(jobs, ttl=None, max_workers=8, per_host=4, timeout=60, session=None):
+    """Fetch `jobs` ([(name, url, filename)]) concurrently.
+
+    Returns a list of (name, filename_or_exception, seconds) in job order; a failed download
+    does not stop the others.
+    """
+    session = session or make_session(pool_size=max(max_workers, per_host))
+    limits = {}
+    lock = threading.Lock()
+
+    def host_limit(url):
+        host = urlsplit(url).netloc
+        with lock:
+            if host not in limits:
+                limits[host] = threading.BoundedSemaphore(per_host)
+            return limits[host]
+
+    def run(job):
+        name, url, filename = job
+        t0 = time.perf_counter()
+        try:
+            with host_limit(url), stage(f'download:{name}') as st:
+                result = fetch_file(url, filename, ttl=ttl, timeout=timeout, session=session)
+                st.add(nbytes=os.path.getsize(result))
+        except Exception as e:
+            result = e
+        return name, result, time.perf_counter() - t0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(run, jobs))
+
+
+def main():
+    start_run(__file__)
+    elements = [e.strip() for e in os.getenv('FETCH_ELEMENTS', 'RF,WSPD,RH').split(',') if e.strip()]
+    station = os.getenv('HKO_STATION', 'SE')
+    ttl = float(os.getenv('CACHE_TTL', '86400'))
+    workers = int(os.getenv('FETCH_WORKERS', '8'))
+    per_host = int(os.getenv('PER_HOST', '4'))
+    timeout = float(os.getenv('FETCH_TIMEOUT', '60'))
+
+    jobs = element_jobs(elements, station)
+    t0 = time.perf_counter()
+    results = fetch_all(jobs, ttl=ttl, max_workers=workers, per_host=per_host, timeout=timeout)
+    failed = 0
+    for name, result, seconds in results:
+        if isinstance(result, Exception):
+            failed += 1
+            print(f'{name}: FAILED after {seconds:.2f}s: {result}')
+        else:
+            print(f'{name}: {result} ({os.path.getsize(result)} bytes, {seconds:.2f}s)')
+    print(f'Fetched {len(results) - failed}/{len(results)} files in {time.perf_counter() - t0:.2f}s')
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,91 +1,129 @@
 #!/usr/bin/env python3
 """Fetch HKO rainfall station-block CSV and extract Kai Tak daily rainfall.
 
-Writes `rainfall_processed.csv` with columns: datetime,rainfall_mm
-Then regenerates `7.svg` by invoking `scripts/make_7_svg.py`.
+Writes `rainfall_processed.csv` with columns: datetime,rainfall_mm, and its range-query index
+`rainfall_processed.csv.rainfall_mm.rollup.npz` (see rollup.py).
+With INCREMENTAL=1 only rows newer than the last run are parsed and appended (see incremental.py).
+With WRITE_PARQUET=1 a `rainfall_processed.parquet` copy is written as well (needs pyarrow).
+With WORKERS=N the station blocks are parsed in N processes (see parallel.py).
+With RUN_REPORT=1 stage timings go to `fetch_daily_rainfall_kaitak.run.json`; pass --profile for cProfile stats.
+Then regenerates `7.svg` by calling `make_7_svg.main()` in-process.
 """
 import os
 import sys
 import datetime
-import re
 import csv
+from hko_blocks import parse_station_blocks, find_station
+from parallel import parse_blocks_parallel
+from series import DailySeries, read_series_csv
+import incremental
+import make_7_svg
+import storage
+from fetch_all import element_url
+from instrument import stage, start_run
+from qc import open_qc
+from rollup import open_rollup
+from station_index import read_station
 
 try:
-    from scraping_utils import get_url
+    from scraping_utils import fetch_file
 except Exception:
     print("Error: please run with PYTHONPATH='.' so scraping_utils can be imported")
     raise
 
 
 def parse_station_block_lines(lines, station_substr, start_year, end_year):
-    recs = []
-    i = 0
-    n = len(lines)
-    def _norm(s):
-        return re.sub(r'[^0-9a-z]', '', (s or '').lower())
-    target = _norm(station_substr)
-    while i < n:
-        line = lines[i].strip()
-        if line and target in _norm(line):
-            station_name = line.strip()
-            # skip to header
-            i += 1
-            while i < n and not lines[i].strip():
-                i += 1
-            if i >= n:
-                break
-            i += 1
-            while i < n:
-                row_line = lines[i].strip()
-                if not row_line:
-                    i += 1
-                    break
-                if not row_line[0].isdigit():
-                    break
-                parts = [p.strip() for p in row_line.split(',')]
-                try:
-                    y = int(parts[0]); m = int(parts[1]); d = int(parts[2])
-                    val_str = parts[3] if len(parts) > 3 else ''
-                    num = re.sub(r'[^0-9\.-]', '', val_str)
-                    v = float(num) if num not in (None, '') else None
-                    date_obj = datetime.date(y,m,d)
-                    if start_year <= date_obj.year <= end_year:
-                        recs.append({'date': date_obj, 'rainfall_mm': v, 'station': station_name})
-                except Exception:
-                    pass
-                i += 1
-            continue
-        i += 1
-    return recs
+    # kept for callers expecting per-row dicts; main() uses the columnar blocks directly
+    blocks = parse_station_blocks(lines, start_year, end_year)
+    return [
+        {'date': datetime.date.fromordinal(o), 'rainfall_mm': None if v != v else v, 'station': b.title}
+        for b in find_station(blocks, station_substr)
+        for o, v in zip(b.dates, b.values)
+    ]
 
 
-def main():
-    url = os.getenv('RAINFALL_URL') or 'https://data.weather.gov.hk/weatherAPI/cis/csvfile/SE/ALL/daily_SE_RF_ALL.csv'
+def _parse(path, station, start_year, end_year, since, workers):
+    with stage('parse', hot=True) as st:
+        if workers > 1:
+            blocks = list(parse_blocks_parallel(path, start_year, end_year, since, station, workers).values())
+        else:
+            # seek to the station's blocks via the sidecar index (see station_index.py)
+            blocks = read_station(path, station, start_year, end_year, since)
+        st.add(rows=sum(len(b) for b in blocks), nbytes=os.path.getsize(path))
+    return blocks
+
+
+def process_rainfall(path, out, station, start_year, end_year, incremental_mode=False, write_parquet=False,
+                     workers=1):
+    """Parse the cached HKO CSV and update `out`; returns the number of rows written or updated."""
+    state = incremental.load_state(out, station, start_year, end_year) if incremental_mode else None
+    blocks = _parse(path, station, start_year, end_year, incremental.resume_ordinal(state), workers)
+    if state is not None and len(blocks) != 1:
+        # the blocks only hold the rows from the resume point on: rebuild from a full parse
+        print(f'{len(blocks)} blocks match {station!r}: rebuilding {out} from the whole file')
+        state = None
+        blocks = _parse(path, station, start_year, end_year, None, workers)
+
+    if len(blocks) == 1:
+        fromordinal = datetime.date.fromordinal
+        with stage('write_csv') as st:
+            appended, revised = incremental.update_csv(
+                out, ['datetime', 'rainfall_mm'], blocks[0],
+                lambda o, v: (fromordinal(o).isoformat(), '' if v != v else f'{v:.1f}'),
+                state, station, start_year, end_year)
+            st.add(rows=appended + revised, nbytes=os.path.getsize(out))
+        print(f'Updated {out}: {appended} rows appended, {revised} revised')
+        if write_parquet:
+            with stage('write_parquet') as st:
+                # incremental runs only parse the new rows, so take the full series from the CSV
+                series = read_series_csv(out, 'datetime', 'rainfall_mm') if state is not None else DailySeries.from_block(blocks[0])
+                storage.write_parquet(storage.parquet_path(out), series, 'rainfall_mm', station=blocks[0].title)
+                st.add(rows=len(series), nbytes=os.path.getsize(storage.parquet_path(out)))
+            print(f'Wrote {storage.parquet_path(out)}')
+    else:
+        n = 0
+        with stage('write_csv') as st:
+            with open(out, 'w', newline='') as f:
+                w = csv.writer(f)
+                w.writerow(['datetime','rainfall_mm'])
+                for b in blocks:
+                    series = DailySeries.from_block(b)
+                    w.writerows(series.to_csv_rows('{:.1f}'))
+                    n += len(series)
+            st.add(rows=n, nbytes=os.path.getsize(out))
+        incremental.clear_state(out)
+        print(f'Wrote {out} with {n} records')
+        return n
+    return appended + revised
+
+
+def main(svg=True):
+    """Download and process; then regenerate 7.svg unless svg=False (`weather rain --csv-only`)."""
+    start_run(__file__)
+    url = element_url('RF')
     station = os.getenv('RAINFALL_STATION_NAME') or 'Kaitak'
     start_year = int(os.getenv('START_YEAR', '2010'))
     end_year = int(os.getenv('END_YEAR', '2025'))
+    cache_ttl = float(os.getenv('CACHE_TTL', '86400'))
 
     print(f'Fetching rainfall CSV from: {url}')
-    text = get_url(url, 'daily_SE_RF_ALL.csv')
-    lines = text.splitlines()
-    recs = parse_station_block_lines(lines, station, start_year, end_year)
-
-    out = 'rainfall_processed.csv'
-    with open(out, 'w', newline='') as f:
-        w = csv.writer(f)
-        w.writerow(['datetime','rainfall_mm'])
-        for r in recs:
-            if r['rainfall_mm'] is None:
-                mm = ''
-            else:
-                mm = f"{r['rainfall_mm']:.1f}"
-            w.writerow([r['date'].isoformat(), mm])
-
-    print(f'Wrote {out} with {len(recs)} records')
+    with stage('download') as st:
+        path = fetch_file(url, 'daily_SE_RF_ALL.csv', ttl=cache_ttl)
+        st.add(nbytes=os.path.getsize(path))
+    process_rainfall(path, 'rainfall_processed.csv', station, start_year, end_year,
+                     incremental_mode=os.getenv('INCREMENTAL', '0') != '0',
+                     write_parquet=os.getenv('WRITE_PARQUET', '0') != '0',
+                     workers=int(os.getenv('WORKERS', '1')))
+    with stage('rollup'):
+        open_rollup('rainfall_processed.csv', 'datetime', 'rainfall_mm')
+    with stage('qc') as st:
+        # completeness of every station of the download (see qc.py)
+        st.add(rows=len(open_qc(path).titles))
 
-    # regenerate 7.svg
-    print('Regenerating 7.svg')
-    os.system('.venv/bin/python scripts/make_7_svg.py')
+    if svg:
+        # regenerate 7.svg in this process (no second interpreter / re-import)
+        print('Regenerating 7.svg')
+        make_7_svg.main()
 
 
 if __name__ == '__main__':
@@ -4,7 +4,8 @@
 scripts/fetch_kaitak_wind.py
 
 Fetch Kai Tak daily mean wind speed from the HKO station-block CSV, save a processed
-CSV (`kaitak_wind_{start}_{end}.csv`) and a PNG plot (`kaitak_wind_{start}_{end}.png`).
+CSV (`kaitak_wind_{start}_{end}.csv`) with its range-query index (see rollup.py) and a PNG
+plot (`kaitak_wind_{start}_{end}.png`).
 
 The HKO CSV is organized in station blocks. Each block begins with a title line that
 contains the station name (for example: "Mean Wind Speed (km/h) - Kai Tak"), followed
@@ -14,20 +15,36 @@ Environment variables (optional):
   WIND_URL - URL to HKO wind CSV (default: HKO SE WSPD CSV)
   WIND_STATION_NAME - Station name substring to filter (default: KaiTak)
   START_YEAR / END_YEAR - year range to include (defaults: 2010-2025)
+  CACHE_TTL - seconds before the cached download is revalidated (default: 86400)
+  INCREMENTAL - set to 1 to only parse/append rows newer than the last run (see incremental.py)
+  WRITE_PARQUET - set to 1 to also write `kaitak_wind_{start}_{end}.parquet` (needs pyarrow)
+  WORKERS - parse the station blocks in this many processes (default: 1, see parallel.py)
+  RUN_REPORT - 1 to write the JSON stage report to fetch_kaitak_wind.run.json, or its path (default: off)
 
 Usage:
-  PYTHONPATH=. .venv/bin/python scripts/fetch_kaitak_wind.py
+  PYTHONPATH=. .venv/bin/python scripts/fetch_kaitak_wind.py [--profile]
+
+--profile writes cProfile stats of the parse and plot stages to fetch_kaitak_wind.prof.
 """
 
 import os
 import sys
 import datetime
-import re
 import csv
-import matplotlib.pyplot as plt
+import numpy as np
+from hko_blocks import parse_station_blocks, find_station
+from parallel import parse_blocks_parallel
+from series import DailySeries, read_series_csv
+import incremental
+import storage
+from fetch_all import element_url
+from instrument import stage, start_run
+from qc import open_qc
+from rollup import open_rollup
+from station_index import read_station
 
 try:
-    from scraping_utils import get_url
+    from scraping_utils import fetch_file
 except Exception:
     # If importing fails, provide a helpful message
     print("Error: unable to import 'scraping_utils'. When running from the shell set PYTHONPATH='.'.")
@@ -38,103 +55,130 @@ def parse_station_block_lines(lines, wind_station, start_year, end_year):
     """Parse HKO station-block CSV lines and return a list of records for the chosen station.
 
     Each matching record is a dict: {'date': date_obj, 'mean_wspd': float|None, 'station': station_name}
+
+    Thin wrapper over `hko_blocks.parse_station_blocks`; prefer the columnar blocks directly
+    when processing many stations.
+    """
+    blocks = parse_station_blocks(lines, start_year, end_year)
+    return [
+        {'date': datetime.date.fromordinal(o), 'mean_wspd': None if v != v else v, 'station': b.title}
+        for b in find_station(blocks, wind_station)
+        for o, v in zip(b.dates, b.values)
+    ]
+
+
+def _parse(csv_path, wind_station, start_year, end_year, since, workers):
+    # read only the station's blocks; only the parsed arrays are kept in memory
+    with stage('parse', hot=True) as st:
+        if workers > 1:
+            blocks = list(parse_blocks_parallel(csv_path, start_year, end_year, since, wind_station, workers).values())
+        else:
+            # seek to the station's blocks via the sidecar index (see station_index.py)
+            blocks = read_station(csv_path, wind_station, start_year, end_year, since)
+        st.add(rows=sum(len(b) for b in blocks), nbytes=os.path.getsize(csv_path))
+    return blocks
+
+
+def process_wind(csv_path, out_csv, wind_station, start_year, end_year, incremental_mode=False, write_parquet=False,
+                 workers=1):
+    """Parse the cached HKO CSV, update `out_csv` and return the station's DailySeries list.
+
+    Used by main() and by the pipeline runner (scripts/pipeline.py).
     """
-    records = []
-    i = 0
-    n = len(lines)
-
-    def _norm(s: str) -> str:
-        # normalize by keeping only alphanumeric characters and lowercasing
-        return re.sub(r'[^0-9a-z]', '', (s or '').lower())
-
-    ws_norm = _norm(wind_station)
-
-    while i < n:
-        line = lines[i].strip()
-        # detect station title line containing the station substring (normalized)
-        if line and ws_norm and ws_norm in _norm(line):
-            station_name = line.strip()
-            # advance to the header line (skip blanks)
-            i += 1
-            while i < n and not lines[i].strip():
-                i += 1
-            if i >= n:
-                break
-            # header_line = lines[i]
-            i += 1
-            # read data rows until blank line or next non-data line
-            while i < n:
-                row_line = lines[i].strip()
-                if not row_line:
-                    i += 1
-                    break
-                # data rows normally start with a digit (year)
-                if not row_line[0].isdigit():
-                    break
-                parts = [p.strip() for p in row_line.split(',')]
-                try:
-                    year = int(parts[0])
-                    month = int(parts[1])
-                    day = int(parts[2])
-                    val_str = parts[3] if len(parts) > 3 else ''
-                    num = re.sub(r'[^0-9\.-]', '', val_str)
-                    wspd_val = float(num) if num not in (None, '') else None
-                    date_obj = datetime.date(year, month, day)
-                    if start_year <= date_obj.year <= end_year:
-                        records.append({'date': date_obj, 'mean_wspd': wspd_val, 'station': station_name})
-                except Exception:
-                    # skip malformed rows
-                    pass
-                i += 1
-            continue
-        i += 1
-
-    return records
-
-
-def main():
-    wind_url = os.getenv('WIND_URL') or 'https://data.weather.gov.hk/cis/csvfile/SE/ALL/daily_SE_WSPD_ALL.csv'
+    state = incremental.load_state(out_csv, wind_station, start_year, end_year) if incremental_mode else None
+    blocks = _parse(csv_path, wind_station, start_year, end_year, incremental.resume_ordinal(state), workers)
+    if state is not None and len(blocks) != 1:
+        # the blocks only hold the rows from the resume point on: rebuild from a full parse
+        print(f"{len(blocks)} blocks match '{wind_station}': rebuilding {out_csv} from the whole file")
+        state = None
+        blocks = _parse(csv_path, wind_station, start_year, end_year, None, workers)
+    series = [DailySeries.from_block(b) for b in blocks]
+    n_records = sum(len(s) for s in series)
+    print(f"Found {n_records} matching records for station '{wind_station}' between {start_year} and {end_year}")
+
+    with stage('write_csv') as st:
+        if len(blocks) == 1:
+            title = blocks[0].title
+            fromordinal = datetime.date.fromordinal
+            appended, revised = incremental.update_csv(
+                out_csv, ['date', 'station', 'mean_wspd'], blocks[0],
+                lambda o, v: (fromordinal(o).isoformat(), title, '' if v != v else v),
+                state, wind_station, start_year, end_year)
+            st.add(rows=appended + revised)
+            print(f"Processed CSV updated: {out_csv} ({appended} rows appended, {revised} revised)")
+        else:
+            with open(out_csv, 'w', newline='') as f:
+                w = csv.writer(f)
+                w.writerow(['date', 'station', 'mean_wspd'])
+                for s in series:
+                    w.writerows((d, s.name, v) for d, v in s.to_csv_rows())
+            st.add(rows=n_records)
+            incremental.clear_state(out_csv)
+            print(f"Processed CSV written: {out_csv}")
+        st.add(nbytes=os.path.getsize(out_csv))
+    if len(blocks) == 1 and state is not None:
+        # the plot needs the whole period, not just the rows parsed this run
+        with stage('read_csv') as st:
+            series = [read_series_csv(out_csv, 'date', 'mean_wspd', blocks[0].title)]
+            st.add(rows=len(series[0]))
+
+    if write_parquet and len(series) == 1:
+        with stage('write_parquet') as st:
+            out_parquet = storage.write_parquet(storage.parquet_path(out_csv), series[0], 'mean_wspd')
+            st.add(rows=len(series[0]), nbytes=os.path.getsize(out_parquet))
+        print(f"Parquet written: {out_parquet}")
+    return series
+
+
+def plot_wind(series, out_png, wind_station, start_year, end_year):
+    """Plot the valid daily values of `series` to `out_png`; returns False when there is nothing to plot."""
+    dates = np.concatenate([s.dates[s.valid] for s in series]) if series else []
+    speeds = np.concatenate([s.values[s.valid] for s in series]) if series else []
+    if not len(speeds):
+        print("No numeric wind speed values to plot")
+        return False
+    import render  # matplotlib: only imported when there is something to plot
+    with stage('plot', hot=True) as st:
+        # downsampled to ~2 points per pixel (LTTB), see render.py
+        render.line_chart(out_png, dates, speeds, f"Daily Mean Wind Speed - {wind_station} ({start_year}-{end_year})",
+                          'Date', 'Mean Wind Speed (km/h)', figsize=(12, 5))
+        st.add(rows=len(speeds), nbytes=os.path.getsize(out_png))
+    print(f"Plot saved: {out_png}")
+    return True
+
+
+def main(plot=True):
+    """Download, process and (unless plot=False) plot; `weather wind --csv-only` skips the plot."""
+    start_run(__file__)
+    wind_url = element_url('WSPD')
     wind_station = os.getenv('WIND_STATION_NAME') or 'KaiTak'
     start_year = int(os.getenv('START_YEAR', 2010))
     end_year = int(os.getenv('END_YEAR', 2025))
+    cache_ttl = float(os.getenv('CACHE_TTL', 86400))
 
     print(f"Fetching wind CSV from: {wind_url}")
     try:
-        csv_text = get_url(wind_url, 'daily_SE_WSPD_ALL.csv')
+        with stage('download') as st:
+            csv_path = fetch_file(wind_url, 'daily_SE_WSPD_ALL.csv', ttl=cache_ttl)
+            st.add(nbytes=os.path.getsize(csv_path))
     except Exception as e:
         print(f"Error fetching CSV: {e}")
         sys.exit(1)
 
-    lines = csv_text.splitlines()
-    print(f"Retrieved CSV: {len(lines)} lines")
-
-    records = parse_station_block_lines(lines, wind_station, start_year, end_year)
-    print(f"Found {len(records)} matching records for station '{wind_station}' between {start_year} and {end_year}")
+    print(f"Retrieved CSV: {os.path.getsize(csv_path)} bytes")
 
     out_csv = f'kaitak_wind_{start_year}_{end_year}.csv'
-    with open(out_csv, 'w', newline='') as f:
-        w = csv.DictWriter(f, fieldnames=['date', 'station', 'mean_wspd'])
-        w.writeheader()
-        for r in records:
-            w.writerow({'date': r['date'].isoformat(), 'station': r['station'], 'mean_wspd': '' if r['mean_wspd'] is None else r['mean_wspd']})
-
-    print(f"Processed CSV written: {out_csv}")
-
-    speeds = [r['mean_wspd'] for r in records if r['mean_wspd'] is not None]
-    if speeds:
-        dates = [r['date'] for r in records if r['mean_wspd'] is not None]
-        plt.figure(figsize=(12, 5))
-        plt.plot(dates, speeds, '-o', markersize=3)
-        plt.title(f"Daily Mean Wind Speed - {wind_station} ({start_year}-{end_year})")
-        plt.xlabel('Date')
-        plt.ylabel('Mean Wind Speed (km/h)')
-        plt.grid(alpha=0.3)
-        plt.tight_layout()
-        out_png = f'kaitak_wind_{start_year}_{end_year}.png'
-        plt.savefig(out_png)
-        print(f"Plot saved: {out_png}")
-    else:
-        print("No numeric wind speed values to plot")
+    series = process_wind(csv_path, out_csv, wind_station, start_year, end_year,
+                          incremental_mode=os.getenv('INCREMENTAL', '0') != '0',
+                          write_parquet=os.getenv('WRITE_PARQUET', '0') != '0',
+                          workers=int(os.getenv('WORKERS', '1')))
+    with stage('rollup'):
+        open_rollup(out_csv, 'date', 'mean_wspd')
+    with stage('qc') as st:
+        # completeness of every station of the download (see qc.py)
+        st.add(rows=len(open_qc(csv_path).titles))
+    if plot:
+        plot_wind(series, f'kaitak_wind_{start_year}_{end_year}.png', wind_station, start_year, end_year)
 
 
 if __name__ == '__main__':
@@ -1,20 +1,28 @@
 #!/usr/bin/env python3
 """Fetch HKO daily rainfall CSV, filter Kaitak station, aggregate monthly rainfall (2010-2025).
 Writes CSV and creates a simple plot.
+With RUN_REPORT=1 stage timings go to `fetch_monthly_kaitak.run.json`; pass --profile for cProfile stats.
 """
 import os
 import csv
-import datetime
-import requests
 import dotenv
-import matplotlib.pyplot as plt
-from collections import defaultdict
+from series import DailySeries, parse_values
+from dates import parse_dates
+from instrument import stage, start_run
+
+try:
+    from scraping_utils import fetch_file, iter_lines
+except Exception:
+    print("Error: please run with PYTHONPATH='.' so scraping_utils can be imported")
+    raise
 
 dotenv.load_dotenv()
+start_run(__file__)
 RAINFALL_URL = os.getenv('RAINFALL_URL')
 STATION = os.getenv('RAINFALL_STATION_NAME', 'Kaitak')
 START_YEAR = int(os.getenv('START_YEAR', '2010'))
 END_YEAR = int(os.getenv('END_YEAR', '2025'))
+CACHE_TTL = float(os.getenv('CACHE_TTL', '86400'))
 
 OUT_CSV = f'kaitak_monthly_rainfall_{START_YEAR}_{END_YEAR}.csv'
 
@@ -22,13 +30,16 @@ if not RAINFALL_URL:
     raise SystemExit('RAINFALL_URL not set in .env')
 
 print(f'Fetching rainfall CSV from: {RAINFALL_URL}')
-resp = requests.get(RAINFALL_URL, timeout=30)
-resp.raise_for_status()
-text = resp.text
+# shares the cache (and the pooled downloads of fetch_all.py) with the other fetchers
+with stage('download') as st:
+    path = fetch_file(RAINFALL_URL, 'daily_SE_RF_ALL.csv', ttl=CACHE_TTL, timeout=30)
+    st.add(nbytes=os.path.getsize(path))
 
 # The HKO CSV likely has header rows; parse using csv.reader
-reader = csv.reader(text.splitlines())
-rows = list(reader)
+with stage('read', hot=True) as st:
+    reader = csv.reader(iter_lines(path))
+    rows = list(reader)
+    st.add(rows=len(rows), nbytes=os.path.getsize(path))
 
 # Try to find header row containing known column names (e.g., "Station", "Date", "Rainfall")
 header = None
@@ -64,67 +75,55 @@ si = col_index[station_col]
 di = col_index[date_col]
 rn = col_index[rain_col]
 
-monthly = defaultdict(float)
-counted = 0
-for r in data_rows:
-    if len(r) <= max(si, di, rn):
-        continue
-    station = r[si].strip()
-    if station.lower() != STATION.lower():
-        continue
-    date_str = r[di].strip()
-    try:
-        # try common date formats
-        if '-' in date_str:
-            dt = datetime.datetime.strptime(date_str, '%Y-%m-%d')
-        elif '/' in date_str:
-            dt = datetime.datetime.strptime(date_str, '%d/%m/%Y')
-        else:
-            dt = datetime.datetime.strptime(date_str, '%Y%m%d')
-    except Exception:
-        # skip unparsable
-        continue
-    if dt.year < START_YEAR or dt.year > END_YEAR:
-        continue
-    rain_val = r[rn].strip()
-    # normalize numeric rainfall (empty or non-numeric treated as 0)
-    try:
-        rv = float(rain_val) if rain_val != '' else 0.0
-    except ValueError:
-        rv = 0.0
-    key = (dt.year, dt.month)
-    monthly[key] += rv
-    counted += 1
-
-print(f'Processed {counted} daily records for station {STATION}')
-
-# Write monthly CSV
-with open(OUT_CSV, 'w', newline='') as f:
-    writer = csv.writer(f)
-    writer.writerow(['year','month','monthly_rainfall_mm'])
-    for (y,m), total in sorted(monthly.items()):
-        writer.writerow([y,m,f'{total:.2f}'])
+date_strs = []
+rain_strs = []
+with stage('parse', hot=True) as st:
+    for r in data_rows:
+        if len(r) <= max(si, di, rn):
+            continue
+        station = r[si].strip()
+        if station.lower() != STATION.lower():
+            continue
+        date_strs.append(r[di].strip())
+        rain_strs.append(r[rn].strip())
+
+    # the date format is detected once for the file, then the column is parsed in one go
+    dates, ok = parse_dates(date_strs)
+    years = dates.astype('datetime64[Y]').astype(int) + 1970
+    keep = ok & (years >= START_YEAR) & (years <= END_YEAR)
+    # empty or non-numeric rainfall stays missing (NaN): it is not 0 mm
+    rain = parse_values(rain_strs)
+    st.add(rows=len(date_strs))
+
+print(f'Processed {int(keep.sum())} daily records for station {STATION}')
+
+with stage('aggregate') as st:
+    daily = DailySeries(dates[keep], rain[keep], STATION).sorted()
+    months, totals = daily.resample('M', 'sum', f'{START_YEAR}-01', f'{END_YEAR}-12')
+    _, counts = daily.resample('M', 'count', f'{START_YEAR}-01', f'{END_YEAR}-12')
+    st.add(rows=len(daily))
+
+# Write monthly CSV (months that have at least one daily value)
+with stage('write_csv') as st:
+    with open(OUT_CSV, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['year','month','monthly_rainfall_mm'])
+        for month, total, count in zip(months.astype(str).tolist(), totals.tolist(), counts.tolist()):
+            if count:
+                y, m = month.split('-')
+                writer.writerow([int(y),int(m),f'{total:.2f}'])
+    st.add(rows=int((counts > 0).sum()), nbytes=os.path.getsize(OUT_CSV))
 
 print(f'Wrote monthly CSV: {OUT_CSV}')
 
 # Quick plot
-if monthly:
-    years = sorted(set(y for y,m in monthly.keys()))
-    # Create a timeline of months
-    timeline = []
-    values = []
-    for y in range(START_YEAR, END_YEAR+1):
-        for m in range(1,13):
-            timeline.append(datetime.datetime(y,m,1))
-            values.append(monthly.get((y,m), 0.0))
-    plt.figure(figsize=(14,6))
-    plt.bar(timeline, values, width=20)
-    plt.title(f'Monthly Rainfall - {STATION} ({START_YEAR}-{END_YEAR})')
-    plt.xlabel('Month')
-    plt.ylabel('Monthly Rainfall (mm)')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(f'monthly_rainfall_{STATION}_{START_YEAR}_{END_YEAR}.png')
+if counts.any():
+    import render  # matplotlib: only imported when there is something to plot
+    with stage('plot', hot=True) as st:
+        render.bar_chart(f'monthly_rainfall_{STATION}_{START_YEAR}_{END_YEAR}.png', months, totals,
+                         f'Monthly Rainfall - {STATION} ({START_YEAR}-{END_YEAR})', 'Month', 'Monthly Rainfall (mm)',
+                         figsize=(14, 6))
+        st.add(rows=len(months))
     print('Saved plot PNG')
 else:
     print('No monthly data to plot')
@@ -0,0 +1,133 @@
+"""Single-pass parser for HKO station-block CSV files.
+
+The HKO `daily_SE_*_ALL.csv` files hold one block per station. A block starts with one
+or more title lines (Chinese, then English, e.g. "Mean Wind Speed (km/h) - Kai Tak"),
+then a header line (Year,Month,Day,Value,Completeness) and the daily data rows.
+
+`parse_station_blocks` walks the lines once and returns every station block at the same
+time as columnar arrays:
+ - dates: array('l') of proleptic Gregorian ordinals (`datetime.date.toordinal()`)
+ - values: array('d') with NaN for missing / unparsable values
+ - flags: bytearray of completeness codes (see FLAG_NAMES)
+
+Functions:
+- parse_station_blocks(lines, start_year=None, end_year=None, since=None) -> dict[title, StationBlock]
+- find_station(blocks, station_substr) -> list of matching StationBlock
+- normalize_name(s) -> lowercase alphanumeric key used for station matching
+"""
+from __future__ import annotations
+import datetime
+import string
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+NAN = float('nan')
+
+# completeness column: "C" complete, "#" incomplete, "***" unavailable
+FLAG_COMPLETE, FLAG_INCOMPLETE, FLAG_MISSING, FLAG_OTHER = 0, 1, 2, 3
+FLAG_NAMES = ('C', '#', '***', '?')
+_FLAG_CODES = {'C': FLAG_COMPLETE, '#': FLAG_INCOMPLETE, '***': FLAG_MISSING, '': FLAG_MISSING}
+
+# characters kept by normalize_name
+_KEEP = set(string.ascii_lowercase + string.digits)
+
+
+def normalize_name(s: Optional[str]) -> str:
+    """Lowercase and keep only ascii letters/digits ("Kai Tak" -> "kaitak")."""
+    return ''.join(c for c in (s or '').lower() if c in _KEEP)
+
+
+class StationBlock:
+    """Columnar data for one station block."""
+
+    __slots__ = ('title', 'dates', 'values', 'flags')
+
+    def __init__(self, title: str):
+        self.title = title
+        self.dates = array('l')
+        self.values = array('d')
+        self.flags = bytearray()
+
+    @property
+    def key(self) -> str:
+        return normalize_name(self.title)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        return f'StationBlock({self.title!r}, rows={len(self.dates)})'
+
+
+def _is_header(line: str) -> bool:
+    # header looks like "年/Year,月/Month,日/Day,數值/Value,..." (possibly mojibake prefix)
+    low = line.lower()
+    return 'year' in low and 'month' in low and ',' in line
+
+
+def parse_station_blocks(lines: Iterable[str], start_year: Optional[int] = None,
+                         end_year: Optional[int] = None, since: Optional[int] = None) -> Dict[str, StationBlock]:
+    """Parse every station block from an iterable of lines in a single pass.
+
+    `lines` may be any iterable (list, file object, generator); it is consumed once.
+    Blocks are keyed by their title line (the last text line before the header). If the
+    same title appears twice the rows are appended to the same block. `since` is an
+    ordinal: rows dated before it are skipped without building a date (incremental runs).
+    """
+    blocks: Dict[str, StationBlock] = {}
+    title = None
+    current = None
+    lo = start_year if start_year is not None else -1
+    hi = end_year if end_year is not None else 10 ** 6
+    if since is not None:
+        lo = max(lo, datetime.date.fromordinal(since).year)
+    else:
+        since = 0
+    flag_codes = _FLAG_CODES
+    toordinal = datetime.date.toordinal
+    date = datetime.date
+
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            current = None
+            continue
+        if current is not None and line[0].isdigit():
+            parts = line.split(',')
+            try:
+                y = int(parts[0])
+                if y < lo or y > hi:
+                    continue
+                ordinal = toordinal(date(y, int(parts[1]), int(parts[2])))
+            except (ValueError, IndexError):
+                # skip malformed rows
+                continue
+            if ordinal < since:
+                continue
+            try:
+                v = float(parts[3])
+            except (ValueError, IndexError):
+                v = NAN
+            current.dates.append(ordinal)
+            current.values.append(v)
+            current.flags.append(flag_codes.get(parts[4].strip() if len(parts) > 4 else '', FLAG_OTHER))
+            continue
+        if _is_header(line):
+            if title is not None:
+                current = blocks.get(title)
+                if current is None:
+                    current = blocks[title] = StationBlock(title)
+            continue
+        # any other text line is a (candidate) title for the next block
+        current = None
+        title = line
+
+    return blocks
+
+
+def find_station(blocks: Dict[str, StationBlock], station_substr: str) -> List[StationBlock]:
+    """Return the blocks whose normalized title contains the normalized `station_substr`."""
+    target = normalize_name(station_substr)
+    if not target:
+        return []
+    return [b for b in blocks.values() if target in b.key]
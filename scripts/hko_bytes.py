@@ -0,0 +1,233 @@
+"""Station-block parser that works on the raw bytes of an HKO CSV.
+
+`hko_blocks.parse_station_blocks` needs text lines, so the whole file is decoded first,
+although only the title lines contain anything but ASCII. This parser takes the file as
+bytes (an `mmap`, `memoryview` or bytes object) and never decodes the data rows:
+ - line boundaries come from one `np.flatnonzero(buf == b'\\n')` over a zero-copy view
+ - lines starting with a digit are data rows; the few other lines (titles, headers,
+   blank lines, the footer) go through the same rules as `parse_station_blocks`
+ - the year/month/day, value and completeness fields of all rows are parsed at once with
+   integer arithmetic on the bytes between the commas; a value is an integer mantissa
+   divided by a power of ten, which rounds exactly like `float()`
+ - only rows the fast path does not recognise ('***', stray spaces, malformed dates) are
+   parsed one at a time, with the rules of the text parser
+ - title lines are decoded as UTF-8. Files saved by older versions of `get_url` hold
+   UTF-8 that was decoded as Latin-1 and re-encoded; such titles are repaired (see
+   decode_title)
+The result is the same dict of StationBlock objects as `parse_station_blocks`.
+
+Functions:
+- parse_station_bytes(data, start_year=None, end_year=None, since=None) -> dict[title, StationBlock]
+- parse_file(path, start_year=None, end_year=None, since=None) -> dict[title, StationBlock] (mmap)
+- decode_title(raw) -> str
+"""
+from __future__ import annotations
+import datetime
+import mmap
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+from dates import days_from_ymd
+from hko_blocks import FLAG_COMPLETE, FLAG_INCOMPLETE, FLAG_MISSING, FLAG_OTHER, StationBlock
+
+_BOM = b'\xef\xbb\xbf'
+# date.toordinal() of 1970-01-01, to turn datetime64[D] into ordinals
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+# widest value handled by the fast path; 15 digits stay exact in an int64 / float64
+_VALUE_WIDTH = 16
+_FLAG_CODES = {b'C': FLAG_COMPLETE, b'#': FLAG_INCOMPLETE, b'***': FLAG_MISSING, b'': FLAG_MISSING}
+NAN = float('nan')
+
+
+def decode_title(raw: bytes) -> str:
+    """A title line as text: UTF-8, undoing a Latin-1 round trip ('å¹³å\\x9d\\x87' -> '平均')."""
+    text = raw.decode('utf8', errors='replace')
+    try:
+        return text.encode('latin-1').decode('utf8')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return text
+
+
+def _is_header(line: bytes) -> bool:
+    low = line.lower()
+    return b'year' in low and b'month' in low and b',' in line
+
+
+def _digits(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray, width: int):
+    """(int64 values, ok) of the unsigned integer fields buf[starts:ends] (at most `width` digits)."""
+    length = ends - starts
+    ok = (length >= 1) & (length <= width)
+    value = np.zeros(len(starts), dtype=np.int64)
+    for j in range(min(width, int(length.max(initial=0)))):
+        present = j < length
+        digit = buf[np.minimum(starts + j, len(buf) - 1)].astype(np.int64) - ord('0')
+        ok &= ~present | ((digit >= 0) & (digit <= 9))
+        value = np.where(present, value * 10 + digit, value)
+    return value, ok
+
+
+def _values(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+    """(float64 values, ok) of decimal fields like '-12.5'; ok is False for anything else."""
+    neg = buf[np.minimum(starts, len(buf) - 1)] == ord('-')
+    starts = starts + neg
+    length = ends - starts
+    ok = (length >= 1) & (length <= _VALUE_WIDTH)
+    mantissa = np.zeros(len(starts), dtype=np.int64)
+    digits = np.zeros(len(starts), dtype=np.int64)
+    dots = np.zeros(len(starts), dtype=np.int64)
+    decimals = np.zeros(len(starts), dtype=np.int64)
+    # one column of characters at a time: the fields are short, so this is a few passes
+    for j in range(min(_VALUE_WIDTH, int(length.max(initial=0)))):
+        present = j < length
+        c = buf[np.minimum(starts + j, len(buf) - 1)].astype(np.int64)
+        digit = present & (c >= ord('0')) & (c <= ord('9'))
+        dot = present & (c == ord('.'))
+        ok &= ~present | digit | dot
+        mantissa = np.where(digit, mantissa * 10 + c - ord('0'), mantissa)
+        digits += digit
+        decimals += digit & (dots > 0)
+        dots += dot
+    ok &= (digits > 0) & (dots <= 1)
+    values = mantissa / 10.0 ** decimals
+    return np.where(neg, -values, values), ok
+
+
+def _slow_row(line: bytes, lo: int, hi: int, since: int):
+    """(ordinal, value, flag) of one row with the rules of parse_station_blocks, or None to skip it."""
+    parts = line.strip().split(b',')
+    try:
+        y = int(parts[0])
+        if y < lo or y > hi:
+            return None
+        ordinal = datetime.date(y, int(parts[1]), int(parts[2])).toordinal()
+    except (ValueError, IndexError):
+        return None
+    if ordinal < since:
+        return None
+    try:
+        v = float(parts[3])
+    except (ValueError, IndexError):
+        v = NAN
+    return ordinal, v, _FLAG_CODES.get(parts[4].strip() if len(parts) > 4 else b'', FLAG_OTHER)
+
+
+def _rows(buf, starts, ends, lo, hi, since):
+    """Parse the data rows [starts[i], ends[i]); returns (keep mask, ordinals, values, flags)."""
+    n = len(starts)
+    commas = np.flatnonzero(buf == ord(','))
+    first = np.searchsorted(commas, starts)
+    count = np.searchsorted(commas, ends) - first
+    at = lambda k: commas[np.minimum(first + k, len(commas) - 1)] if len(commas) else np.zeros(n, np.int64)
+    c0, c1, c2, c3 = at(0), at(1), at(2), at(3)
+    value_end = np.where(count >= 4, c3, ends)
+    flag_start = np.where(count >= 4, c3 + 1, ends)
+    flag_end = np.where(count >= 5, at(4), ends)
+
+    y, ok_y = _digits(buf, starts, c0, 4)
+    m, ok_m = _digits(buf, c0 + 1, c1, 2)
+    d, ok_d = _digits(buf, c1 + 1, np.where(count >= 3, c2, ends), 2)
+    days, ok_date = days_from_ymd(y, m, d)
+    values, ok_value = _values(buf, c2 + 1, value_end)
+
+    # completeness: '', 'C', '#' or '***' exactly
+    flag_len = flag_end - flag_start
+    f0 = buf[np.minimum(flag_start, len(buf) - 1)]
+    flags = np.full(n, 255, dtype=np.uint8)
+    flags[flag_len == 0] = FLAG_MISSING
+    flags[(flag_len == 1) & (f0 == ord('C'))] = FLAG_COMPLETE
+    flags[(flag_len == 1) & (f0 == ord('#'))] = FLAG_INCOMPLETE
+    stars = (flag_len == 3) & (f0 == ord('*'))
+    stars &= (buf[np.minimum(flag_start + 1, len(buf) - 1)] == ord('*')) & (buf[np.minimum(flag_start + 2, len(buf) - 1)] == ord('*'))
+    flags[stars] = FLAG_MISSING
+
+    # year 0 is a valid datetime64 but not a datetime.date
+    fast = (count >= 3) & ok_y & (y >= 1) & ok_m & ok_d & ok_date & ok_value & (flags != 255)
+    ordinals = days.astype(np.int64) + _EPOCH_ORDINAL
+    keep = fast & (y >= lo) & (y <= hi) & (ordinals >= since)
+
+    # everything else ('***' values, spaces, malformed rows) row by row
+    for i in np.flatnonzero(~fast).tolist():
+        row = _slow_row(bytes(buf[starts[i]:ends[i]]), lo, hi, since)
+        if row is not None:
+            ordinals[i], values[i], flags[i] = row
+            keep[i] = True
+    return keep, ordinals, values, flags
+
+
+def parse_station_bytes(data, start_year: Optional[int] = None, end_year: Optional[int] = None,
+                        since: Optional[int] = None) -> Dict[str, StationBlock]:
+    """`parse_station_blocks` on raw bytes (bytes, memoryview or mmap) without decoding the data rows."""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    lo = start_year if start_year is not None else -1
+    hi = end_year if end_year is not None else 10 ** 6
+    if since is not None:
+        lo = max(lo, datetime.date.fromordinal(since).year)
+    else:
+        since = 0
+    size = len(buf)
+    newlines = np.flatnonzero(buf == ord('\n'))
+    starts = np.concatenate([[0], newlines + 1])
+    ends = np.concatenate([newlines, [size]])
+    if size and starts[-1] == size:
+        starts, ends = starts[:-1], ends[:-1]
+    # drop the '\r' of '\r\n' line ends
+    ends = ends - ((ends > starts) & (buf[np.maximum(ends - 1, 0)] == ord('\r')))
+    head = buf[np.minimum(starts, max(size - 1, 0))] if size else np.empty(0, np.uint8)
+    is_row = (ends > starts) & (head >= ord('0')) & (head <= ord('9'))
+
+    # titles, headers and blank lines: the state machine of parse_station_blocks, once per
+    # text line; each following run of data rows belongs to `current` (or is a title)
+    blocks: Dict[str, StationBlock] = {}
+    runs = []  # (block, first line, end line)
+    title = None
+    current = None
+    text_lines = np.flatnonzero(~is_row).tolist()
+    line_count = len(starts)
+    if line_count and (not text_lines or text_lines[0] > 0):
+        # rows before any title are titles themselves (the last one wins)
+        title = bytes(buf[starts[(text_lines or [line_count])[0] - 1]:ends[(text_lines or [line_count])[0] - 1]]).strip()
+    for k, i in enumerate(text_lines):
+        line = bytes(buf[starts[i]:ends[i]]).strip()
+        if i == 0 and line.startswith(_BOM):
+            line = line[len(_BOM):].strip()
+        if not line:
+            current = None
+        elif _is_header(line):
+            if title is not None:
+                name = decode_title(title)
+                current = blocks.get(name)
+                if current is None:
+                    current = blocks[name] = StationBlock(name)
+        else:
+            current = None
+            title = line
+        stop = text_lines[k + 1] if k + 1 < len(text_lines) else line_count
+        if stop > i + 1:
+            if current is not None:
+                runs.append((current, i + 1, stop))
+            else:
+                title = bytes(buf[starts[stop - 1]:ends[stop - 1]]).strip()
+
+    if not runs:
+        return blocks
+    rows = np.concatenate([np.arange(a, b) for _, a, b in runs])
+    keep, ordinals, values, flags = _rows(buf, starts[rows], ends[rows], lo, hi, since)
+    pos = 0
+    for block, a, b in runs:
+        sel = keep[pos:pos + b - a]
+        block.dates.frombytes(ordinals[pos:pos + b - a][sel].astype(np.dtype('l')).tobytes())
+        block.values.frombytes(values[pos:pos + b - a][sel].tobytes())
+        block.flags.extend(flags[pos:pos + b - a][sel].tobytes())
+        pos += b - a
+    return blocks
+
+
+def parse_file(path: str, start_year: Optional[int] = None, end_year: Optional[int] = None,
+               since: Optional[int] = None) -> Dict[str, StationBlock]:
+    """`parse_station_bytes` of a file, read through a read-only mmap."""
+    if os.path.getsize(path) == 0:
+        return {}
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return parse_station_bytes(data, start_year, end_year, since)
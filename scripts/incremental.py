@@ -0,0 +1,133 @@
+"""Incremental (append-only) updates of the processed per-station CSVs.
+
+Next to each processed output a `<output>.state.json` sidecar records, for the station
+written to it:
+ - last_date: ordinal of the newest row ingested
+ - tail_offset: byte offset of the first recent row (within `window_days` of last_date)
+   that was not complete (flag "#"/"***"), or the end of the file when there is none
+ - pending: {ordinal: [flag, value]} for every row from tail_offset on (the provisional tail)
+ - size: byte size of the output after the last update (detects external edits)
+
+On the next run `resume_ordinal(state)` tells the parser where to start (the first pending
+row, or the day after last_date), so only the provisional tail and new days are parsed.
+`update_csv` then truncates the output at tail_offset and writes just those rows back:
+complete old rows are never touched, new days are appended, and pending rows whose
+completeness flag or value changed are revised. If nothing changed the file is left alone.
+Incomplete rows older than the window are treated as final (HKO only revises recent days).
+
+Functions:
+- load_state(out_path, station, start_year, end_year) -> dict or None (None = full rebuild)
+- resume_ordinal(state) -> ordinal to pass as `parse_station_blocks(..., since=...)`
+- update_csv(out_path, header, block, format_row, state, station, start_year, end_year,
+             window_days=62) -> (appended, revised)
+"""
+from __future__ import annotations
+import csv
+import io
+import json
+import os
+from typing import Callable, Optional, Sequence, Tuple
+
+from hko_blocks import FLAG_COMPLETE, FLAG_NAMES, StationBlock
+
+
+def state_path(out_path: str) -> str:
+    return out_path + '.state.json'
+
+
+def load_state(out_path: str, station: str, start_year: int, end_year: int) -> Optional[dict]:
+    """Return the saved state if it still describes `out_path`, else None."""
+    try:
+        with open(state_path(out_path), 'r', encoding='utf8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(out_path) or os.path.getsize(out_path) != state.get('size'):
+        return None
+    if (state.get('station'), state.get('start_year'), state.get('end_year')) != (station, start_year, end_year):
+        return None
+    if state.get('last_date') is None:
+        return None
+    state['pending'] = {int(k): tuple(v) for k, v in state.get('pending', {}).items()}
+    return state
+
+
+def resume_ordinal(state: Optional[dict]) -> Optional[int]:
+    """First ordinal that has to be parsed again (None: parse everything)."""
+    if state is None:
+        return None
+    if state['pending']:
+        return min(state['pending'])
+    return state['last_date'] + 1
+
+
+def clear_state(out_path: str) -> None:
+    if os.path.exists(state_path(out_path)):
+        os.remove(state_path(out_path))
+
+
+def _encode_rows(rows):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    for row in rows:
+        w.writerow(row)
+        yield buf.getvalue().encode('utf8')
+        buf.seek(0)
+        buf.truncate()
+
+
+def update_csv(out_path: str, header: Sequence[str], block: StationBlock,
+               format_row: Callable[[int, float], Sequence], state: Optional[dict],
+               station: str, start_year: int, end_year: int, window_days: int = 62) -> Tuple[int, int]:
+    """Bring `out_path` up to date with `block` and save the new state.
+
+    With state=None the file is rewritten from scratch (block must hold every row);
+    otherwise block must hold the rows from `resume_ordinal(state)` on. `format_row(ordinal,
+    value)` returns the CSV row. Returns (appended, revised) row counts.
+    """
+    if state is None:
+        keep_offset, old_pending, last_date = 0, {}, None
+    else:
+        keep_offset, old_pending, last_date = state['tail_offset'], state['pending'], state['last_date']
+
+    revised = 0
+    appended = 0
+    for o, v, flag in zip(block.dates, block.values, block.flags):
+        if last_date is not None and o <= last_date:
+            if old_pending.get(o) != (FLAG_NAMES[flag], None if v != v else v):
+                revised += 1
+        else:
+            appended += 1
+    if state is not None and not appended and not revised and len(block) == len(old_pending):
+        return 0, 0
+
+    mode = 'r+b' if state is not None else 'wb'
+    with open(out_path, mode) as f:
+        f.seek(keep_offset)
+        f.truncate()
+        if state is None:
+            f.write(next(_encode_rows([header])))
+        tail_offset = None
+        pending = {}
+        cutoff = (block.dates[-1] if len(block) else 0) - window_days
+        rows = (format_row(o, v) for o, v in zip(block.dates, block.values))
+        for o, v, flag, line in zip(block.dates, block.values, block.flags, _encode_rows(rows)):
+            if flag != FLAG_COMPLETE and tail_offset is None and o >= cutoff:
+                tail_offset = f.tell()
+            if tail_offset is not None:
+                pending[o] = (FLAG_NAMES[flag], None if v != v else v)
+            f.write(line)
+        size = f.tell()
+
+    new_state = {
+        'station': station,
+        'start_year': start_year,
+        'end_year': end_year,
+        'last_date': block.dates[-1] if len(block) else last_date,
+        'tail_offset': size if tail_offset is None else tail_offset,
+        'pending': {str(k): v for k, v in pending.items()},
+        'size': size,
+    }
+    with open(state_path(out_path), 'w', encoding='utf8') as f:
+        json.dump(new_state, f)
+    return appended, revised
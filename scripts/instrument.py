@@ -0,0 +1,242 @@
+"""Stage timers, counters and a JSON run report for the pipeline scripts.
+
+Each script calls `start_run(__file__)` at the top of main() and wraps its steps in
+`stage(...)`, either as a context manager or as a decorator:
+
+    with stage('parse', hot=True) as st:
+        blocks = parse_station_blocks(...)
+        st.add(rows=n)
+
+    @stage('plot', hot=True)
+    def plot(...): ...
+
+Per stage the report records calls, wall seconds, rows and bytes (whatever the step passes
+to `add`), the process peak RSS when the stage ended and how much that peak grew during the
+stage (`rss_growth_mb`; the peak only ever rises, so a stage that reuses memory freed by an
+earlier one shows 0). Stages are always recorded, but nothing is written or printed unless
+asked for: with RUN_REPORT=1 the report is written as JSON to `<script>.run.json` when the
+script exits (RUN_REPORT=<path> writes it to that path), and a one line summary per stage
+is printed.
+
+`--profile` on the command line (or PROFILE=1) runs the stages marked hot=True under
+cProfile and writes `<script>.prof` (open with `python -m pstats` or snakeviz); the top
+functions by cumulative time and the per-stage summary are printed as well.
+
+Functions:
+- start_run(script, argv=None) -> Run
+- stage(name, hot=False)  context manager / decorator
+- current_run() -> Run (a default run if start_run was not called)
+- finish_run() -> report dict (called automatically at exit)
+"""
+from __future__ import annotations
+import atexit
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far (0 where unsupported)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StageStats:
+    __slots__ = ('name', 'calls', 'seconds', 'rows', 'bytes', 'peak_rss', 'rss_growth')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.peak_rss = 0
+        self.rss_growth = 0
+
+    def as_dict(self) -> dict:
+        mb = 1 << 20
+        return {
+            'stage': self.name,
+            'calls': self.calls,
+            'seconds': round(self.seconds, 6),
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'rows_per_s': round(self.rows / self.seconds, 1) if self.rows and self.seconds else None,
+            'peak_rss_mb': round(self.peak_rss / mb, 2),
+            'rss_growth_mb': round(self.rss_growth / mb, 2),
+        }
+
+
+class Run:
+    """Stage statistics of one script run."""
+
+    def __init__(self, script: str, profile: bool = False, report_path: Optional[str] = None):
+        self.script = script
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.stages: Dict[str, StageStats] = {}
+        self.report_path = report_path
+        self.profiler = cProfile.Profile() if profile else None
+        self.profile_path = f'{script}.prof' if profile else None
+        self._hot_depth = 0
+        self._lock = threading.Lock()
+        self.explicit = False
+        self.finished = False
+
+    def record(self, name: str, seconds: float, rows: int, nbytes: int, rss_before: int) -> None:
+        peak = peak_rss_bytes()
+        with self._lock:
+            st = self.stages.get(name)
+            if st is None:
+                st = self.stages[name] = StageStats(name)
+            st.calls += 1
+            st.seconds += seconds
+            st.rows += rows
+            st.bytes += nbytes
+            st.peak_rss = max(st.peak_rss, peak)
+            st.rss_growth += peak - rss_before
+
+    def _profile(self, on: bool) -> None:
+        # only the main thread is profiled; nested hot stages keep the profiler running
+        if self.profiler is None or threading.current_thread() is not threading.main_thread():
+            return
+        if on:
+            self._hot_depth += 1
+            if self._hot_depth == 1:
+                self.profiler.enable()
+        else:
+            self._hot_depth -= 1
+            if self._hot_depth == 0:
+                self.profiler.disable()
+
+    def report(self) -> dict:
+        return {
+            'script': self.script,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'wall_seconds': round(time.perf_counter() - self.t0, 6),
+            'peak_rss_mb': round(peak_rss_bytes() / (1 << 20), 2),
+            'profile': self.profile_path,
+            'stages': [st.as_dict() for st in self.stages.values()],
+        }
+
+
+_run: Optional[Run] = None
+_atexit_registered = False
+
+
+def _script_name(script: str) -> str:
+    return os.path.splitext(os.path.basename(script))[0] or 'run'
+
+
+def start_run(script: str, argv: Optional[List[str]] = None) -> Run:
+    """Start recording a run of `script` (usually `__file__`).
+
+    Removes `--profile` from argv (sys.argv by default) and enables profiling when it, or
+    PROFILE=1, is given. The report is written when the process exits if RUN_REPORT is set
+    (1 for `<script>.run.json`, or a path). A script main() called from inside another run
+    (e.g. by the pipeline runner) joins that run.
+    """
+    global _run, _atexit_registered
+    if _run is not None and _run.explicit and not _run.finished:
+        return _run
+    argv = sys.argv if argv is None else argv
+    profile = os.getenv('PROFILE', '0') != '0'
+    while '--profile' in argv:
+        argv.remove('--profile')
+        profile = True
+    name = _script_name(script)
+    report_path = os.getenv('RUN_REPORT', '0')
+    if report_path in ('', '0'):
+        report_path = None
+    elif report_path == '1':
+        report_path = f'{name}.run.json'
+    _run = Run(name, profile=profile, report_path=report_path)
+    _run.explicit = True
+    if not _atexit_registered:
+        # one hook for the process: it finishes whichever run is current at exit
+        atexit.register(finish_run)
+        _atexit_registered = True
+    return _run
+
+
+def current_run() -> Run:
+    global _run
+    if _run is None:
+        # stages used outside a script (tests, notebooks) are recorded but not reported
+        _run = Run('run')
+    return _run
+
+
+class stage:
+    """Time a block (context manager) or every call of a function (decorator)."""
+
+    def __init__(self, name: str, hot: bool = False):
+        self.name = name
+        self.hot = hot
+        self.rows = 0
+        self.bytes = 0
+
+    def add(self, rows: int = 0, nbytes: int = 0) -> None:
+        self.rows += rows
+        self.bytes += nbytes
+
+    def __enter__(self) -> 'stage':
+        self._run = current_run()
+        self._rss = peak_rss_bytes()
+        if self.hot:
+            self._run._profile(True)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        seconds = time.perf_counter() - self._t0
+        if self.hot:
+            self._run._profile(False)
+        self._run.record(self.name, seconds, self.rows, self.bytes, self._rss)
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # a fresh instance per call, so the decorator is reentrant and thread safe
+            with stage(self.name, self.hot):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def finish_run(run: Optional[Run] = None) -> Optional[dict]:
+    """Write the JSON report (and the cProfile dump) and print the per-stage summary, if asked for."""
+    run = run or _run
+    if run is None or run.finished:
+        return None
+    run.finished = True
+    report = run.report()
+    if run.report_path is None and run.profiler is None:
+        return report
+    for st in report['stages']:
+        print(f"[{run.script}] {st['stage']:<20} {st['seconds']:9.3f}s  rows={st['rows']:<9} "
+              f"bytes={st['bytes']:<11} peak_rss={st['peak_rss_mb']:.1f}MB")
+    if run.profiler is not None:
+        run.profiler.dump_stats(run.profile_path)
+        out = io.StringIO()
+        pstats.Stats(run.profiler, stream=out).sort_stats('cumulative').print_stats(15)
+        print(out.getvalue())
+        print(f'Profile written: {run.profile_path}')
+    if run.report_path:
+        with open(run.report_path, 'w', encoding='utf8') as f:
+            json.dump(report, f, indent=1)
+    return report
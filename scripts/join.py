@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""Align any number of station/element series on one shared time index.
+
+Every input is a series of (timestamp, value) rows: a DailySeries, or a TimeSeries for
+sub-daily data such as 'YYYY-MM-DD HH:MM' hourly readings. The inputs are converted to the
+finest time unit among them and joined with index arithmetic, not per-row lookups:
+ - 'outer': every timestamp of any input; NaN where an input has no row
+ - 'inner': only the timestamps present in every input
+ - 'asof':  each input's last non-missing value at or before every index timestamp
+            (within `tolerance`), e.g. the latest hourly reading for each day
+When the timestamps are dense (daily data, at most a few empty slots per row), the union
+is built with one boolean array over the time span and rows are placed by offset, which
+is linear in the number of rows. Sparse indexes fall back to a sort plus `searchsorted`.
+Duplicate timestamps within one input keep the last row.
+
+Functions:
+- read_timeseries(path, time_col, value_col, name=None) -> TimeSeries (daily or hourly CSV column)
+- join(series, how='outer', index=None, tolerance=None) -> Table
+- Table.to_csv(path, time_col='datetime') / Table.column(name)
+
+Usage (Kai Tak wind, rainfall and humidity in one `datetime,rainfall_mm,humidity_pct,mean_wspd`
+file that `rainfall_utils.load_rainfall_csv` can read; --hko adds every station of an HKO file):
+  PYTHONPATH=. .venv/bin/python scripts/join.py [--how outer] [--out kaitak_weather.csv]
+      [--csv PATH:TIME_COL:VALUE_COL[:NAME] ...] [--hko PATH:ELEMENT ...]
+"""
+from __future__ import annotations
+import argparse
+import csv
+import os
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from dates import detect_format, parse_dates
+from series import DailySeries, parse_values
+
+HOWS = ('outer', 'inner', 'asof')
+# use the dense (linear) path when the time span has at most this many slots per row
+_DENSE_FACTOR = 4
+
+
+class TimeSeries:
+    """Values on a `datetime64` index of any unit (e.g. minutes for hourly data)."""
+
+    __slots__ = ('dates', 'values', 'name')
+
+    def __init__(self, dates, values, name: str = ''):
+        self.dates = np.asarray(dates, dtype='datetime64')
+        self.values = np.asarray(values, dtype=np.float64)
+        if self.dates.shape != self.values.shape:
+            raise ValueError(f'dates and values differ in length: {self.dates.shape} vs {self.values.shape}')
+        self.name = name
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self) -> str:
+        return f'TimeSeries({self.name!r}, {len(self)} rows)'
+
+
+class Table:
+    """A joined table: `values[i]` is column `names[i]` on the shared `index`."""
+
+    __slots__ = ('index', 'names', 'values')
+
+    def __init__(self, index: np.ndarray, names: List[str], values: np.ndarray):
+        self.index = index
+        self.names = names
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __repr__(self) -> str:
+        return f'Table({len(self.names)} columns x {len(self)} rows)'
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[self.names.index(name)]
+
+    def to_csv(self, path: str, time_col: str = 'datetime') -> str:
+        """Write `time_col,<names...>` rows; timestamps as 'YYYY-MM-DD HH:MM', NaN as empty."""
+        stamps = np.char.replace(self.index.astype('datetime64[m]').astype(str), 'T', ' ')
+        cells = self.values.astype(str)
+        cells[np.isnan(self.values)] = ''
+        with open(path, 'w', newline='', encoding='utf8') as f:
+            w = csv.writer(f)
+            w.writerow([time_col] + list(self.names))
+            w.writerows(zip(stamps.tolist(), *(c.tolist() for c in cells)))
+        return path
+
+
+def read_timeseries(path: str, time_col: str, value_col: str, name: Optional[str] = None) -> TimeSeries:
+    """One column of a CSV with daily ('YYYY-MM-DD') or minute ('YYYY-MM-DD HH:MM') timestamps."""
+    times, values = [], []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            if time_col in header and value_col in header:
+                ti, vi = header.index(time_col), header.index(value_col)
+                width = max(ti, vi)
+                for row in reader:
+                    if len(row) > width:
+                        times.append(row[ti])
+                        values.append(row[vi])
+    if not times:
+        return TimeSeries(np.empty(0, 'datetime64[m]'), np.empty(0), name or value_col)
+    stamps, ok = parse_dates(times, detect_format(times[0]))
+    return TimeSeries(stamps[ok], parse_values(values)[ok], name or value_col)
+
+
+def _unit(series) -> str:
+    """The finest time unit among the inputs (days at the coarsest)."""
+    order = ['D', 'h', 'm', 's', 'ms', 'us', 'ns']
+    units = [np.datetime_data(s.dates.dtype)[0] for s in series if len(s)]
+    return max(units or ['D'], key=lambda u: order.index(u) if u in order else 0)
+
+
+def _keys(s, unit: str):
+    """Sorted, unique int64 timestamps of `s` in `unit` and the matching values."""
+    keys = s.dates.astype(f'datetime64[{unit}]').astype(np.int64)
+    values = s.values
+    if len(keys) > 1 and not (np.diff(keys) > 0).all():
+        order = np.argsort(keys, kind='stable')
+        keys, values = keys[order], values[order]
+        # keep the last row of each duplicate timestamp
+        last = np.append(keys[1:] != keys[:-1], True)
+        keys, values = keys[last], values[last]
+    return keys, values
+
+
+def _place(keys_list, values_list, index: np.ndarray, first, lookup) -> np.ndarray:
+    out = np.full((len(keys_list), len(index)), np.nan)
+    if not len(index):
+        # e.g. an inner join of inputs without a common timestamp
+        return out
+    for row, (keys, values) in enumerate(zip(keys_list, values_list)):
+        if not len(keys):
+            continue
+        if lookup is not None:
+            pos = lookup[keys - first]
+        else:
+            pos = np.searchsorted(index, keys)
+            pos[pos == len(index)] = 0
+            pos = np.where(index[pos] == keys, pos, -1)
+        hit = pos >= 0
+        out[row, pos[hit]] = values[hit]
+    return out
+
+
+def _asof(keys_list, values_list, index: np.ndarray, tolerance: Optional[int]) -> np.ndarray:
+    out = np.full((len(keys_list), len(index)), np.nan)
+    for row, (keys, values) in enumerate(zip(keys_list, values_list)):
+        valid = ~np.isnan(values)
+        keys, values = keys[valid], values[valid]
+        if not len(keys):
+            continue
+        i = np.searchsorted(keys, index, side='right') - 1
+        ok = i >= 0
+        if tolerance is not None:
+            ok &= index - keys[np.maximum(i, 0)] <= tolerance
+        out[row, ok] = values[i[ok]]
+    return out
+
+
+def join(series: Sequence, how: str = 'outer', index=None, tolerance=None) -> Table:
+    """Join `series` (objects with .dates, .values, .name) on one time index.
+
+    For how='asof' the index is `index` (default: the union of all timestamps) and each
+    column holds the input's last non-missing value at or before the index time, at most
+    `tolerance` (a numpy timedelta64 or a count of the finest unit) earlier.
+    """
+    if how not in HOWS:
+        raise ValueError(f'unknown join: {how!r} (expected one of {HOWS})')
+    series = list(series)
+    unit = _unit(series + ([TimeSeries(index, np.zeros(len(index)))] if index is not None else []))
+    names = [s.name or f'col{i}' for i, s in enumerate(series)]
+    prepared = [_keys(s, unit) for s in series]
+    keys_list = [k for k, _ in prepared]
+    values_list = [v for _, v in prepared]
+    dtype = f'datetime64[{unit}]'
+
+    if how == 'asof' and index is not None:
+        idx = np.asarray(index).astype(dtype).astype(np.int64)
+        if isinstance(tolerance, np.timedelta64):
+            tolerance = int(tolerance.astype(f'timedelta64[{unit}]').astype(np.int64))
+        return Table(idx.astype(dtype), names, _asof(keys_list, values_list, idx, tolerance))
+
+    non_empty = [k for k in keys_list if len(k)]
+    total = sum(len(k) for k in non_empty)
+    if not non_empty:
+        return Table(np.empty(0, dtype), names, np.empty((len(series), 0)))
+    first = min(int(k[0]) for k in non_empty)
+    span = max(int(k[-1]) for k in non_empty) - first + 1
+    lookup = None
+    if span <= _DENSE_FACTOR * total:
+        # number of inputs that have each time slot
+        counts = np.zeros(span, dtype=np.int32)
+        for k in non_empty:
+            counts[k - first] += 1
+        keep = counts >= (len(series) if how == 'inner' else 1)
+        idx = np.flatnonzero(keep) + first
+        lookup = np.where(keep, np.cumsum(keep) - 1, -1)
+    elif how == 'inner':
+        idx = keys_list[0]
+        for k in keys_list[1:]:
+            idx = np.intersect1d(idx, k, assume_unique=True)
+    else:
+        idx = np.unique(np.concatenate(non_empty))
+
+    if how == 'asof':
+        if isinstance(tolerance, np.timedelta64):
+            tolerance = int(tolerance.astype(f'timedelta64[{unit}]').astype(np.int64))
+        values = _asof(keys_list, values_list, idx, tolerance)
+    else:
+        values = _place(keys_list, values_list, idx, first, lookup)
+    return Table(idx.astype(dtype), names, values)
+
+
+def _hko_series(path: str, element: str, station: Optional[str] = None, start_year=None, end_year=None):
+    from hko_blocks import normalize_name
+    if station:
+        from station_index import read_station
+        blocks = read_station(path, station, start_year, end_year)
+    else:
+        from parallel import parse_blocks_parallel
+        blocks = parse_blocks_parallel(path, start_year, end_year, workers=int(os.getenv('WORKERS', '1'))).values()
+    out = []
+    for block in blocks:
+        s = DailySeries.from_block(block)
+        s.name = element if station else f'{element}:{normalize_name(block.title.rsplit(" - ", 1)[-1])}'
+        out.append(s)
+    return out
+
+
+def _humidity(station: str, start_year: int, end_year: int):
+    """Daily mean relative humidity for `station` from HUMIDITY_URL (HKO RH file), or None."""
+    from fetch_all import URL_TEMPLATE
+    from scraping_utils import fetch_file
+    url = os.getenv('HUMIDITY_URL') or URL_TEMPLATE.format(station='SE', element='RH')
+    try:
+        path = fetch_file(url, 'daily_SE_RH_ALL.csv', ttl=float(os.getenv('CACHE_TTL', '86400')))
+    except Exception as e:
+        print(f'Humidity not merged: {url}: {e}')
+        return None
+    found = _hko_series(path, 'humidity_pct', station, start_year, end_year)
+    return found[0] if found else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Join station/element series into one wide CSV.')
+    parser.add_argument('--how', default='outer', choices=HOWS)
+    parser.add_argument('--out', default='kaitak_weather.csv')
+    parser.add_argument('--csv', action='append', default=[], metavar='PATH:TIME_COL:VALUE_COL[:NAME]',
+                        help='a column of a processed (daily or hourly) CSV')
+    parser.add_argument('--hko', action='append', default=[], metavar='PATH:ELEMENT',
+                        help='every station block of an HKO file, as ELEMENT:<station> columns')
+    args = parser.parse_args()
+
+    series = []
+    for spec in args.csv:
+        path, time_col, value_col, *name = spec.split(':')
+        series.append(read_timeseries(path, time_col, value_col, name[0] if name else None))
+    for spec in args.hko:
+        path, element = spec.rsplit(':', 1)
+        series.extend(_hko_series(path, element))
+    if not args.csv and not args.hko:
+        # Kai Tak rainfall, humidity (HUMIDITY_URL) and wind
+        start_year = int(os.getenv('START_YEAR', '2010'))
+        end_year = int(os.getenv('END_YEAR', '2025'))
+        series.append(read_timeseries('rainfall_processed.csv', 'datetime', 'rainfall_mm'))
+        humidity = _humidity(os.getenv('HUMIDITY_STATION_NAME') or 'KaiTak', start_year, end_year)
+        if humidity is not None:
+            series.append(humidity)
+        series.append(read_timeseries(f'kaitak_wind_{start_year}_{end_year}.csv', 'date', 'mean_wspd'))
+    table = join(series, args.how)
+    table.to_csv(args.out)
+    print(f'Wrote {args.out}: {len(table)} rows x {len(table.names)} columns ({args.how} join)')
+
+
+if __name__ == '__main__':
+    main()
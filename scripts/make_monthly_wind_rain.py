@@ -5,115 +5,94 @@ Reads:
  - 'kaitak_wind_2010_2025.csv' (date,station,mean_wspd)
  - 'rainfall_processed.csv' (datetime,rainfall_mm)
 
+With MIN_COMPLETE=0.9 (say), months in which the station has fewer than 90% complete days
+in the raw HKO files ('daily_SE_WSPD_ALL.csv', 'daily_SE_RF_ALL.csv') are left blank,
+using the saved completeness counts of qc.py.
+
 Writes:
  - 'monthly_wind_rain.png' (PNG)
  - 'monthly_wind_rain.svg' (SVG)
+ - 'make_monthly_wind_rain.run.json' (stage timings, with RUN_REPORT=1; --profile adds cProfile stats of the plot)
 """
-import csv
-import datetime
 import os
-from collections import defaultdict
-import matplotlib.pyplot as plt
+
+import numpy as np
+from daycache import load_range
+from instrument import stage, start_run
+from memo import memoize
+
+WIND_CSV = 'kaitak_wind_2010_2025.csv'
+RAIN_CSV = 'rainfall_processed.csv'
+WIND_RAW = 'daily_SE_WSPD_ALL.csv'
+RAIN_RAW = 'daily_SE_RF_ALL.csv'
 
 
+@memoize
 def load_wind(path):
-    data = []
-    if not os.path.exists(path):
-        return data
-    with open(path, 'r') as f:
-        r = csv.DictReader(f)
-        for row in r:
-            try:
-                d = datetime.datetime.strptime(row['date'][:10], '%Y-%m-%d')
-            except Exception:
-                continue
-            v = row.get('mean_wspd')
-            try:
-                v = float(v) if v not in (None, '') else None
-            except Exception:
-                v = None
-            data.append((d, v))
-    return data
+    return load_range(path, 'date', 'mean_wspd')
 
 
+@memoize
 def load_rain(path):
-    data = []
-    if not os.path.exists(path):
-        return data
-    with open(path, 'r') as f:
-        r = csv.DictReader(f)
-        for row in r:
-            try:
-                d = datetime.datetime.strptime(row['datetime'][:10], '%Y-%m-%d')
-            except Exception:
-                continue
-            v = row.get('rainfall_mm')
-            try:
-                v = float(v) if v not in (None, '') else 0.0
-            except Exception:
-                v = 0.0
-            data.append((d, v))
-    return data
+    return load_range(path, 'datetime', 'rainfall_mm')
 
 
 def aggregate_monthly(wind_data, rain_data):
-    # keys are (year, month)
-    wind_sums = defaultdict(list)
-    rain_sums = defaultdict(float)
-    for d, v in wind_data:
-        if v is not None:
-            wind_sums[(d.year, d.month)].append(v)
-    for d, v in rain_data:
-        rain_sums[(d.year, d.month)] += v
-
-    months = []
-    wind_means = []
-    rain_totals = []
-    if not wind_data and not rain_data:
-        return months, wind_means, rain_totals
-
-    years = sorted(set([d.year for d, _ in wind_data] + [d.year for d, _ in rain_data]))
-    start_year = min(years)
-    end_year = max(years)
-    for y in range(start_year, end_year+1):
-        for m in range(1, 13):
-            months.append(datetime.datetime(y, m, 1))
-            wm = None
-            key = (y,m)
-            if key in wind_sums and wind_sums[key]:
-                wm = sum(wind_sums[key]) / len(wind_sums[key])
-            wind_means.append(wm)
-            rain_totals.append(rain_sums.get(key, 0.0))
-
+    """Monthly mean wind and monthly rainfall totals over whole calendar years.
+
+    Returns (months, wind_means, rain_totals): `datetime64[M]` periods, mean wind (NaN for
+    months without data) and rainfall totals (0 for months without data).
+    """
+    if not len(wind_data) and not len(rain_data):
+        return [], [], []
+    years = np.concatenate([wind_data.years, rain_data.years])
+    start = f'{years.min():04d}-01'
+    end = f'{years.max():04d}-12'
+    months, wind_means = wind_data.resample('M', 'mean', start, end)
+    _, rain_totals = rain_data.resample('M', 'sum', start, end)
     return months, wind_means, rain_totals
 
 
+@stage('qc')
+def mask_incomplete_months(months, wind_means, rain_totals, min_complete):
+    """Blank the months that are less than `min_complete` complete in the raw HKO files."""
+    from qc import mask_incomplete, open_qc
+    out = []
+    for raw, station, values in ((WIND_RAW, os.getenv('WIND_STATION_NAME') or 'KaiTak', wind_means),
+                                 (RAIN_RAW, os.getenv('RAINFALL_STATION_NAME') or 'Kaitak', rain_totals)):
+        if not os.path.exists(raw):
+            print(f'{raw} not found: months of {station} not checked for completeness')
+        else:
+            try:
+                values = mask_incomplete(months, values, open_qc(raw), station, min_complete)
+            except KeyError:
+                print(f'{station} not found in {raw}: months of {station} not checked for completeness')
+        out.append(values)
+    return out
+
+
+@stage('plot', hot=True)
 def plot(months, wind_means, rain_totals):
-    fig, ax1 = plt.subplots(figsize=(14,5))
-    ax1.set_xlabel('Month')
-    ax1.set_ylabel('Monthly Rainfall (mm)', color='#ff7f0e')
-    ax1.bar(months, rain_totals, width=20, color='#ff7f0e', alpha=0.6)
-    ax1.tick_params(axis='y', labelcolor='#ff7f0e')
-
-    ax2 = ax1.twinx()
-    ax2.set_ylabel('Mean Wind Speed (km/h)', color='#1f77b4')
-    ax2.plot(months, [v if v is not None else float('nan') for v in wind_means], color='#1f77b4', marker='o', markersize=3)
-    ax2.tick_params(axis='y', labelcolor='#1f77b4')
-
-    fig.autofmt_xdate()
-    plt.title('Monthly Rainfall (bars) and Mean Wind (line) - Kai Tak')
-    plt.tight_layout()
+    import render  # matplotlib is only needed here
     png = 'monthly_wind_rain.png'
     svg = 'monthly_wind_rain.svg'
-    plt.savefig(png)
-    plt.savefig(svg)
+    render.bar_line_chart([png, svg], months, rain_totals, wind_means,
+                          'Monthly Rainfall (bars) and Mean Wind (line) - Kai Tak',
+                          'Monthly Rainfall (mm)', 'Mean Wind Speed (km/h)', xlabel='Month')
     print('Wrote', png, 'and', svg)
 
 
 def main():
-    wind = load_wind('kaitak_wind_2010_2025.csv')
-    rain = load_rain('rainfall_processed.csv')
-    months, wind_means, rain_totals = aggregate_monthly(wind, rain)
+    start_run(__file__)
+    with stage('load') as st:
+        wind = load_wind(WIND_CSV)
+        rain = load_rain(RAIN_CSV)
+        st.add(rows=len(wind) + len(rain))
+    with stage('aggregate') as st:
+        months, wind_means, rain_totals = aggregate_monthly(wind, rain)
+        st.add(rows=len(months))
+    if os.getenv('MIN_COMPLETE') and len(months):
+        wind_means, rain_totals = mask_incomplete_months(months, wind_means, rain_totals, float(os.getenv('MIN_COMPLETE')))
     plot(months, wind_means, rain_totals)
 
 
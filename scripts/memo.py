@@ -0,0 +1,183 @@
+"""In-process memoization of the file loaders, for notebooks and long-running sessions.
+
+`@memoize` caches a loader's result per (loader, file, other arguments). The file's
+mtime and size are part of the key, so an edited file is simply a miss; the stale entry for
+the same call is dropped when the new one is stored. Entries live in one LRU cache shared by
+all loaders, bounded by an estimate of their size in bytes (`LOAD_CACHE_BYTES`, default
+256 MiB; `LOAD_CACHE_BYTES=0` disables caching).
+
+Cached results are shared, so they are frozen when stored: numpy arrays (also the array
+attributes of objects such as DailySeries / Rollup, whether in `__slots__` or `__dict__`)
+are made read-only and lists are stored as tuples. Every call gets a shallow copy whose
+arrays are read-only views of the cached ones, so a caller can rebind `series.values` but
+cannot write into the shared data; a list result comes back as a new list (of the shared,
+immutable rows), so the loader's return type does not change.
+
+Functions:
+- memoize(loader) -> wrapped loader (first argument: the file path)
+- cache_info() -> CacheInfo(hits, misses, evictions, entries, nbytes, budget)
+- cache_clear()
+"""
+from __future__ import annotations
+import copy
+import functools
+import os
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses evictions entries nbytes budget')
+
+
+def _fields(obj) -> tuple:
+    """Attribute names of `obj`: its `__slots__` and its instance `__dict__`."""
+    slots = tuple(s for cls in type(obj).__mro__ for s in getattr(cls, '__slots__', ()))
+    return slots + tuple(getattr(obj, '__dict__', ()))
+
+
+class _FrozenList(tuple):
+    """A cached list result; each caller gets it back as a list."""
+
+    __slots__ = ()
+
+
+def _freeze(value):
+    """Make `value` safe to share: read-only arrays, tuples instead of lists."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+        return value
+    if isinstance(value, list):
+        return _FrozenList(value)
+    for name in _fields(value):
+        attr = getattr(value, name, None)
+        if isinstance(attr, np.ndarray):
+            attr.flags.writeable = False
+    return value
+
+
+def _view(value):
+    """A per-caller copy of a frozen value that shares its (read-only) arrays."""
+    if isinstance(value, np.ndarray):
+        return value.view()
+    if isinstance(value, _FrozenList):
+        return list(value)
+    fields = _fields(value)
+    if not fields:
+        return value
+    out = copy.copy(value)
+    for name in fields:
+        attr = getattr(value, name, None)
+        if isinstance(attr, np.ndarray):
+            setattr(out, name, attr.view())
+    return out
+
+
+def _nbytes(value) -> int:
+    """Rough memory footprint of a cached value."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        size = sys.getsizeof(value)
+        for item in value:
+            size += sys.getsizeof(item)
+            if isinstance(item, tuple):
+                size += sum(sys.getsizeof(x) for x in item)
+        return size
+    fields = _fields(value)
+    if fields:
+        return sys.getsizeof(value) + sum(_nbytes(getattr(value, f, None)) for f in fields)
+    return sys.getsizeof(value)
+
+
+class LoaderCache:
+    """Byte-budgeted LRU of loader results with hit/miss counters (thread-safe)."""
+
+    __slots__ = ('budget', 'nbytes', 'hits', 'misses', 'evictions', '_entries', '_current', '_lock')
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._current = {}  # call -> key of its latest (mtime, size)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, call, key, value) -> None:
+        size = _nbytes(value)
+        with self._lock:
+            old = self._current.pop(call, None)
+            if old is not None and old in self._entries:
+                self.nbytes -= self._entries.pop(old)[1]
+            if size > self.budget:
+                return
+            self._entries[key] = (value, size)
+            self._current[call] = key
+            self.nbytes += size
+            while self.nbytes > self.budget:
+                evicted, (_, n) = self._entries.popitem(last=False)
+                self._current.pop(evicted[0], None)
+                self.nbytes -= n
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._current.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, len(self._entries), self.nbytes, self.budget)
+
+
+_MISS = object()
+CACHE = LoaderCache(int(os.getenv('LOAD_CACHE_BYTES', str(256 << 20))))
+
+
+def memoize(loader):
+    """Cache `loader(path, *args, **kwargs)` until the file at `path` changes."""
+    name = f'{loader.__module__}.{loader.__qualname__}'
+
+    @functools.wraps(loader)
+    def wrapper(path, *args, **kwargs):
+        if CACHE.budget <= 0:
+            return loader(path, *args, **kwargs)
+        try:
+            st = os.stat(path)
+        except (OSError, TypeError, ValueError):
+            # missing file (loaders return an empty result) or not a path: nothing to key on
+            return loader(path, *args, **kwargs)
+        call = (name, os.path.abspath(path), args, tuple(sorted(kwargs.items())))
+        key = (call, st.st_mtime_ns, st.st_size)
+        try:
+            value = CACHE.get(key, _MISS)
+        except TypeError:  # unhashable arguments
+            return loader(path, *args, **kwargs)
+        if value is _MISS:
+            value = _freeze(loader(path, *args, **kwargs))
+            CACHE.put(call, key, value)
+        return _view(value)
+
+    wrapper.uncached = loader
+    return wrapper
+
+
+def cache_info() -> CacheInfo:
+    return CACHE.info()
+
+
+def cache_clear() -> None:
+    CACHE.clear()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Parse (and aggregate) all station blocks of an HKO CSV on several CPU cores.
+
+The parent process scans the raw file once for block boundaries (blank lines followed by
+a title + header), cuts it into `workers` shards of about the same byte size and sizes one
+`multiprocessing.shared_memory` segment for the results: one slot per shard with room for
+as many rows as the shard has lines, stored as three columns (int64 ordinals, float64
+values, uint8 flags). Each worker maps the file and parses only its byte range with
+`hko_bytes.parse_station_bytes` (no text decoding), writes its rows straight into its slot
+and returns just (title, offset, rows) per block, so no row data is pickled. The parent copies the columns
+out into ordinary StationBlock objects and releases the segment.
+
+Shards never split a block, so the result is the same as `parse_station_blocks` on the
+whole file; the speed-up is close to linear in the number of cores for files with many
+stations (a single-station file has nothing to split and is parsed in one worker).
+
+Functions:
+- scan_blocks(path) -> [(start, end)] byte ranges that start at a block title
+- parse_blocks_parallel(path, start_year=None, end_year=None, since=None, station=None,
+                        workers=None) -> dict[title, StationBlock]
+- aggregate_stations(blocks, freq='M', how='mean', start=None, end=None) -> (titles, periods, 2-D result)
+
+Usage (monthly totals for every station, written as station,period,value rows; --charts
+also renders one chart per station with render.render_many):
+  .venv/bin/python scripts/parallel.py daily_SE_RF_ALL.csv [--freq M] [--how sum] [-j 8] [--charts DIR]
+"""
+from __future__ import annotations
+import argparse
+import csv
+import mmap
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from aggregate import aggregate_series
+from hko_blocks import StationBlock, find_station, normalize_name
+from hko_bytes import parse_file, parse_station_bytes
+from series import DailySeries
+
+# a blank line (possibly with spaces / \r) separates blocks
+_BLANK = re.compile(rb'\n[ \t\r]*\n')
+_ROW_BYTES = 8 + 8 + 1  # ordinal + value + flag
+
+
+def scan_blocks(path: str) -> List[Tuple[int, int]]:
+    """Byte ranges of the file, each starting at a blank line that precedes a block.
+
+    A range is only cut where the next chunk contains a header line within its first few
+    lines, so a title is never separated from its rows.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        cuts = [0]
+        for m in _BLANK.finditer(data):
+            head = data[m.end():m.end() + 512].lower()
+            if b'year' in head and b'month' in head:
+                cuts.append(m.end())
+    cuts.append(size)
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+def _shards(ranges: List[Tuple[int, int]], n: int) -> List[Tuple[int, int]]:
+    """Merge consecutive ranges into at most n shards of similar byte size."""
+    if not ranges:
+        return []
+    total = ranges[-1][1] - ranges[0][0]
+    target = total / max(n, 1)
+    shards = []
+    start = ranges[0][0]
+    for a, b in ranges:
+        if b - start >= target and len(shards) < n - 1:
+            shards.append((start, b))
+            start = b
+    if start < ranges[-1][1]:
+        shards.append((start, ranges[-1][1]))
+    return shards
+
+
+def _parse_shard(path, start, end, slot, capacity, shm_name, total, start_year, end_year, since, station):
+    from multiprocessing import shared_memory
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        view = memoryview(data)[start:end]
+        try:
+            blocks = parse_station_bytes(view, start_year, end_year, since)
+        finally:
+            view.release()
+    selected = find_station(blocks, station) if station else list(blocks.values())
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        dates = np.ndarray(total, dtype=np.int64, buffer=shm.buf)
+        values = np.ndarray(total, dtype=np.float64, buffer=shm.buf, offset=8 * total)
+        flags = np.ndarray(total, dtype=np.uint8, buffer=shm.buf, offset=16 * total)
+        out = []
+        pos = slot
+        for b in selected:
+            n = len(b)
+            if pos + n > slot + capacity:
+                raise RuntimeError(f'shard {start}-{end} has more rows than lines')
+            dates[pos:pos + n] = np.frombuffer(b.dates, dtype=np.dtype('l'))
+            values[pos:pos + n] = np.frombuffer(b.values, dtype=np.float64)
+            flags[pos:pos + n] = np.frombuffer(b.flags, dtype=np.uint8)
+            out.append((b.title, pos, n))
+            pos += n
+        del dates, values, flags
+    finally:
+        shm.close()
+    return out
+
+
+def parse_blocks_parallel(path: str, start_year: Optional[int] = None, end_year: Optional[int] = None,
+                          since: Optional[int] = None, station: Optional[str] = None,
+                          workers: Optional[int] = None) -> Dict[str, StationBlock]:
+    """`parse_station_blocks` of the whole file, split across `workers` processes.
+
+    With `station` only the matching blocks (see `find_station`) are returned. workers
+    defaults to the CPU count; workers=1 parses in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = _shards(scan_blocks(path), workers)
+    if workers == 1 or len(shards) <= 1:
+        blocks = parse_file(path, start_year, end_year, since)
+        return {b.title: b for b in find_station(blocks, station)} if station else blocks
+
+    # multiprocessing is only imported when there is more than one shard
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    # one slot per shard, large enough for one row per line
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        capacities = [data[a:b].count(b'\n') + 1 for a, b in shards]
+    slots = np.concatenate([[0], np.cumsum(capacities)[:-1]]).tolist()
+    total = sum(capacities)
+    shm = shared_memory.SharedMemory(create=True, size=max(total * _ROW_BYTES, 1))
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            futures = [pool.submit(_parse_shard, path, a, b, slot, cap, shm.name, total,
+                                   start_year, end_year, since, station)
+                       for (a, b), slot, cap in zip(shards, slots, capacities)]
+            results = [f.result() for f in futures]
+        dates = np.ndarray(total, dtype=np.int64, buffer=shm.buf)
+        values = np.ndarray(total, dtype=np.float64, buffer=shm.buf, offset=8 * total)
+        flags = np.ndarray(total, dtype=np.uint8, buffer=shm.buf, offset=16 * total)
+        blocks: Dict[str, StationBlock] = {}
+        for shard in results:
+            for title, pos, n in shard:
+                block = blocks.get(title)
+                if block is None:
+                    block = blocks[title] = StationBlock(title)
+                block.dates.frombytes(dates[pos:pos + n].astype(np.dtype('l')).tobytes())
+                block.values.frombytes(values[pos:pos + n].tobytes())
+                block.flags.extend(flags[pos:pos + n].tobytes())
+        del dates, values, flags
+    finally:
+        shm.close()
+        shm.unlink()
+    return blocks
+
+
+def aggregate_stations(blocks: Dict[str, StationBlock], freq: str = 'M', how: str = 'mean', start=None, end=None):
+    """Aggregate every block on one shared period index: (titles, periods, result[station, period])."""
+    titles = list(blocks)
+    periods, result = aggregate_series([DailySeries.from_block(blocks[t]) for t in titles], freq, how, start, end)
+    return titles, periods, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate every station of an HKO station-block CSV.')
+    parser.add_argument('path', help='HKO CSV, e.g. daily_SE_RF_ALL.csv')
+    parser.add_argument('--freq', default='M', help="D, M, S or Y (default M)")
+    parser.add_argument('--how', default='mean', help='sum, mean, min, max or count (default mean)')
+    parser.add_argument('--start-year', type=int)
+    parser.add_argument('--end-year', type=int)
+    parser.add_argument('-j', '--workers', type=int, default=int(os.getenv('WORKERS', '0')) or None,
+                        help='worker processes (default: WORKERS or the CPU count)')
+    parser.add_argument('-o', '--out', help='output CSV (default: <path stem>_<freq>_<how>.csv)')
+    parser.add_argument('--charts', metavar='DIR', help='also render one PNG per station into DIR')
+    args = parser.parse_args()
+
+    blocks = parse_blocks_parallel(args.path, args.start_year, args.end_year, workers=args.workers)
+    titles, periods, result = aggregate_stations(blocks, args.freq, args.how)
+    out = args.out or f'{os.path.splitext(os.path.basename(args.path))[0]}_{args.freq}_{args.how}.csv'
+    labels = periods.astype(str).tolist()
+    with open(out, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['station', 'period', args.how])
+        for title, row in zip(titles, result.tolist()):
+            w.writerows((title, p, '' if v != v else round(v, 3)) for p, v in zip(labels, row))
+    print(f'Wrote {out}: {len(titles)} stations x {len(labels)} periods')
+
+    if args.charts:
+        import render
+        os.makedirs(args.charts, exist_ok=True)
+        jobs = [('line', dict(paths=os.path.join(args.charts, f'{normalize_name(title) or i}.png'), x=periods, y=row,
+                              title=title, xlabel='', ylabel=f'{args.how} per {args.freq}', fmt='-'))
+                for i, (title, row) in enumerate(zip(titles, result))]
+        render.render_many(jobs, args.workers)
+        print(f'Rendered {len(jobs)} charts into {args.charts}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Run the whole fetch -> parse -> processed CSV -> aggregates -> charts pipeline in one process.
+
+The pipeline is a small DAG of tasks. Each task declares the files it reads and writes;
+a task depends on the tasks that write its inputs:
+
+    fetch_wind -> wind_csv -> wind_chart
+                          \\-> summary_svg (7.svg), monthly_chart
+    fetch_rain -> rain_csv -/
+
+`pipeline.state.json` records, per task, the blake2b digest of every input and output and
+the task parameters (station, years, URL). A task is skipped when its outputs exist, are
+unchanged, and were built from inputs with the same digests and the same parameters, so
+only stale outputs are rebuilt (the fetch tasks always run, but the conditional GET in
+`fetch_file` leaves an unchanged download untouched and nothing downstream reruns).
+Digests are cached by file size + mtime, so unchanged files are not re-read.
+
+Tasks run in a thread pool as soon as their inputs are ready, so the wind and rainfall
+branches run side by side. Tasks that draw charts share one lock (matplotlib is not thread
+safe). Everything runs in this interpreter: matplotlib and numpy are imported
+once and no subprocesses are started.
+
+Environment variables: the same as the individual scripts (WIND_URL, RAINFALL_URL,
+WIND_STATION_NAME, RAINFALL_STATION_NAME, START_YEAR, END_YEAR, CACHE_TTL, INCREMENTAL,
+WRITE_PARQUET, WORKERS, RUN_REPORT).
+
+Usage:
+  PYTHONPATH=. .venv/bin/python scripts/pipeline.py [--force] [--dry-run] [-j N] [--profile] [task ...]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from daycache import file_digest, load_range
+from fetch_all import element_url
+from instrument import stage, start_run
+import fetch_daily_rainfall_kaitak
+import fetch_kaitak_wind
+import make_7_svg
+import make_monthly_wind_rain
+
+try:
+    from scraping_utils import fetch_file
+except Exception:
+    print("Error: please run with PYTHONPATH='.' so scraping_utils can be imported")
+    raise
+
+STATE_FILE = 'pipeline.state.json'
+
+_PLOT_LOCK = threading.Lock()
+
+
+class Task:
+    """One pipeline step: `func()` reads `inputs` and writes `outputs`."""
+
+    __slots__ = ('name', 'func', 'inputs', 'outputs', 'params', 'always', 'plots')
+
+    def __init__(self, name, func, inputs=(), outputs=(), params=None, always=False, plots=False):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.always = always
+        self.plots = plots
+
+    def __repr__(self):
+        return f'Task({self.name!r})'
+
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, 'r', encoding='utf8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault('tasks', {})
+    state.setdefault('files', {})
+    return state
+
+
+def save_state(state, path=STATE_FILE):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def digest(state, path):
+    """Hex digest of `path` (None if missing), re-hashed only when its size/mtime changed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    cached = state['files'].get(path)
+    if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+        return cached[2]
+    value = file_digest(path).hex()
+    state['files'][path] = [st.st_size, st.st_mtime_ns, value]
+    return value
+
+
+def dependencies(tasks):
+    """{task name: [names of the tasks that write its inputs]}; ValueError if they form a cycle."""
+    writers = {out: t.name for t in tasks for out in t.outputs}
+    deps = {t.name: sorted({writers[i] for i in t.inputs if i in writers and writers[i] != t.name})
+            for t in tasks}
+    # topological sort: whatever is left once no task is ready lies on (or behind) a cycle
+    left = {name: set(d) for name, d in deps.items()}
+    ready = [name for name, d in left.items() if not d]
+    while ready:
+        done = ready.pop()
+        del left[done]
+        for name, d in left.items():
+            if done in d:
+                d.discard(done)
+                if not d:
+                    ready.append(name)
+    if left:
+        raise ValueError(f"Dependency cycle: tasks {', '.join(sorted(left))} are on or behind a cycle")
+    return deps
+
+
+def is_stale(task, state):
+    """Why `task` has to run, or None if its outputs are up to date."""
+    if task.always:
+        return 'always runs'
+    record = state['tasks'].get(task.name)
+    if record is None:
+        return 'never built'
+    if record.get('params') != task.params:
+        return 'parameters changed'
+    for path in task.outputs:
+        if digest(state, path) is None:
+            return f'{path} missing'
+        if digest(state, path) != record['outputs'].get(path):
+            return f'{path} modified'
+    for path in task.inputs:
+        if digest(state, path) != record['inputs'].get(path):
+            return f'{path} changed'
+    return None
+
+
+def _select(tasks, deps, targets):
+    if not targets:
+        return tasks
+    by_name = {t.name: t for t in tasks}
+    unknown = [n for n in targets if n not in by_name]
+    if unknown:
+        raise SystemExit(f"Unknown task(s): {', '.join(unknown)}; choose from {', '.join(by_name)}")
+    keep = set()
+    todo = list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in keep:
+            keep.add(name)
+            todo.extend(deps[name])
+    return [t for t in tasks if t.name in keep]
+
+
+def _execute(task):
+    t0 = time.perf_counter()
+    with stage(f'task:{task.name}'):
+        if task.plots:
+            with _PLOT_LOCK:
+                task.func()
+        else:
+            task.func()
+    return time.perf_counter() - t0
+
+
+def run(tasks, state_path=STATE_FILE, force=False, dry_run=False, max_workers=4, targets=None):
+    """Run the stale tasks (and everything downstream of a task that changed its outputs).
+
+    Returns {task name: (status, detail)} with status 'ran', 'skipped', 'would run', 'failed'
+    or 'blocked' (an upstream task failed).
+    """
+    deps = dependencies(tasks)
+    tasks = _select(tasks, deps, targets)
+    state = load_state(state_path)
+    results = {}
+    pending = {t.name: t for t in tasks}
+    running = {}  # future -> task name
+    started = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name, task in list(pending.items()):
+                if any(d in pending or d in running.values() for d in deps[name]):
+                    continue
+                del pending[name]
+                if any(results.get(d, ('',))[0] in ('failed', 'blocked') for d in deps[name]):
+                    results[name] = ('blocked', 'upstream task failed')
+                    continue
+                reason = 'forced' if force else is_stale(task, state)
+                if reason is None and any(results[d][0] == 'would run' for d in deps[name]):
+                    reason = 'upstream would run'
+                if reason is None:
+                    results[name] = ('skipped', 'up to date')
+                elif dry_run:
+                    results[name] = ('would run', reason)
+                else:
+                    inputs = {p: digest(state, p) for p in task.inputs}
+                    running[pool.submit(_execute, task)] = name
+                    started[name] = (task, inputs, reason)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task, inputs, reason = started.pop(running.pop(future))
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    results[task.name] = ('failed', f'{type(e).__name__}: {e}')
+                    state['tasks'].pop(task.name, None)
+                    continue
+                state['tasks'][task.name] = {
+                    'params': task.params,
+                    'inputs': inputs,
+                    'outputs': {p: digest(state, p) for p in task.outputs},
+                }
+                save_state(state, state_path)
+                results[task.name] = ('ran', f'{reason}; {seconds:.2f}s')
+    if not dry_run:
+        save_state(state, state_path)
+    return results
+
+
+def default_tasks():
+    """The Kai Tak wind/rainfall pipeline, configured from the environment like the scripts."""
+    wind_url = element_url('WSPD')
+    rain_url = element_url('RF')
+    wind_station = os.getenv('WIND_STATION_NAME') or 'KaiTak'
+    rain_station = os.getenv('RAINFALL_STATION_NAME') or 'Kaitak'
+    start_year = int(os.getenv('START_YEAR', '2010'))
+    end_year = int(os.getenv('END_YEAR', '2025'))
+    ttl = float(os.getenv('CACHE_TTL', '86400'))
+    incremental_mode = os.getenv('INCREMENTAL', '0') != '0'
+    write_parquet = os.getenv('WRITE_PARQUET', '0') != '0'
+    workers = int(os.getenv('WORKERS', '1'))
+
+    wind_raw = 'daily_SE_WSPD_ALL.csv'
+    rain_raw = 'daily_SE_RF_ALL.csv'
+    wind_csv = f'kaitak_wind_{start_year}_{end_year}.csv'
+    wind_png = f'kaitak_wind_{start_year}_{end_year}.png'
+    rain_csv = 'rainfall_processed.csv'
+    years = {'start_year': start_year, 'end_year': end_year}
+    # with MIN_COMPLETE the monthly chart also reads the completeness codes of the raw files
+    min_complete = os.getenv('MIN_COMPLETE')
+    monthly_inputs = [make_monthly_wind_rain.WIND_CSV, make_monthly_wind_rain.RAIN_CSV]
+    monthly_params = {}
+    if min_complete:
+        monthly_inputs += [make_monthly_wind_rain.WIND_RAW, make_monthly_wind_rain.RAIN_RAW]
+        monthly_params = {'min_complete': min_complete, 'wind_station': wind_station, 'rain_station': rain_station}
+
+    def wind_chart():
+        series = load_range(wind_csv, 'date', 'mean_wspd')
+        fetch_kaitak_wind.plot_wind([series], wind_png, wind_station, start_year, end_year)
+
+    return [
+        Task('fetch_wind', lambda: fetch_file(wind_url, wind_raw, ttl=ttl),
+             outputs=[wind_raw], params={'url': wind_url}, always=True),
+        Task('fetch_rain', lambda: fetch_file(rain_url, rain_raw, ttl=ttl),
+             outputs=[rain_raw], params={'url': rain_url}, always=True),
+        Task('wind_csv', lambda: fetch_kaitak_wind.process_wind(
+                 wind_raw, wind_csv, wind_station, start_year, end_year, incremental_mode, write_parquet, workers),
+             inputs=[wind_raw], outputs=[wind_csv], params={'station': wind_station, **years}),
+        Task('rain_csv', lambda: fetch_daily_rainfall_kaitak.process_rainfall(
+                 rain_raw, rain_csv, rain_station, start_year, end_year, incremental_mode, write_parquet, workers),
+             inputs=[rain_raw], outputs=[rain_csv], params={'station': rain_station, **years}),
+        Task('wind_chart', wind_chart, inputs=[wind_csv], outputs=[wind_png],
+             params={'station': wind_station, **years}, plots=True),
+        Task('summary_svg', make_7_svg.main,
+             inputs=[make_7_svg.WIND_CSV, make_7_svg.RAIN_CSV], outputs=[make_7_svg.OUT_SVG]),
+        Task('monthly_chart', make_monthly_wind_rain.main, inputs=monthly_inputs,
+             outputs=['monthly_wind_rain.png', 'monthly_wind_rain.svg'],
+             params=monthly_params, plots=True),
+    ]
+
+
+def main():
+    start_run(__file__)
+    parser = argparse.ArgumentParser(description='Rebuild the stale outputs of the wind/rainfall pipeline.')
+    parser.add_argument('tasks', nargs='*', help='only build these tasks (and what they depend on)')
+    parser.add_argument('--force', action='store_true', help='rebuild everything')
+    parser.add_argument('--dry-run', action='store_true', help='only print what would run')
+    parser.add_argument('-j', '--jobs', type=int, default=4, help='parallel tasks (default 4)')
+    args = parser.parse_args()
+
+    results = run(default_tasks(), force=args.force, dry_run=args.dry_run, max_workers=args.jobs,
+                  targets=args.tasks)
+    for name, (status, detail) in results.items():
+        print(f'{name:<14} {status:<9} {detail}')
+    if any(status in ('failed', 'blocked') for status, _ in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Completeness (QC) report for every station of an HKO file, and masking of incomplete periods.
+
+Every data row of an HKO file carries a completeness code (kept as `StationBlock.flags` /
+`DailySeries.flags`): 'C' complete, '#' incomplete, '***' unavailable. `qc_report` counts
+the codes per station and calendar period for all stations at once: the codes are stacked
+into one uint8 (stations, days) array on the union day range and every (station, period,
+category) cell is counted by a single `np.bincount`, so the cost is one vectorized pass
+however many stations there are. A value that is missing (NaN) counts as unavailable whatever its
+code, and a day without a row counts as no row.
+
+    completeness = complete days / calendar days of the period
+
+The monthly report of a downloaded file is saved next to it as `<csv>.qc.npz` (rebuilt when
+the file changes, like the day cache), so yearly ratios and masks for later aggregates come
+from the saved counts without re-reading the raw file.
+
+Functions:
+- qc_report(series_list, freq='M', start=None, end=None) -> QCReport
+- QCReport.ratio / .yearly() / .mask(min_complete) / .find(station) / .to_csv(path)
+- open_qc(path) -> monthly QCReport of an HKO file (built or loaded from the sidecar)
+- mask_incomplete(periods, values, report, station, min_complete) -> values with NaN for incomplete periods
+
+Usage (per-year completeness of every station; --freq M for months, -o to write the full table):
+  .venv/bin/python scripts/qc.py daily_SE_RF_ALL.csv [--freq Y] [--min-complete 0.9] [-o qc.csv]
+"""
+from __future__ import annotations
+import argparse
+import csv
+import os
+import tempfile
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from aggregate import aggregate, period_days, season_labels
+from hko_blocks import FLAG_COMPLETE, FLAG_MISSING, FLAG_NAMES, normalize_name
+from series import DailySeries
+
+# count categories: the four flag codes, then days without a row
+CATEGORIES = FLAG_NAMES + ('no row',)
+_NO_ROW = len(FLAG_NAMES)
+VERSION = 1
+
+
+class QCReport:
+    """counts[station, category, period] of the completeness codes (see CATEGORIES)."""
+
+    __slots__ = ('titles', 'freq', 'periods', 'days', 'counts')
+
+    def __init__(self, titles: List[str], freq: str, periods: np.ndarray, days: np.ndarray, counts: np.ndarray):
+        self.titles = list(titles)
+        self.freq = freq
+        self.periods = periods
+        self.days = days
+        self.counts = counts
+
+    def __repr__(self) -> str:
+        return f'QCReport({len(self.titles)} stations x {len(self.periods)} periods, freq={self.freq!r})'
+
+    @property
+    def ratio(self) -> np.ndarray:
+        """Fraction of the calendar days of each period that are complete, (stations, periods)."""
+        if not len(self.periods):
+            return np.empty((len(self.titles), 0))
+        return self.counts[:, FLAG_COMPLETE] / self.days
+
+    def mask(self, min_complete: float) -> np.ndarray:
+        """True for the (station, period) cells that are at least `min_complete` complete."""
+        return self.ratio >= min_complete
+
+    def find(self, station: str) -> int:
+        """Row of the first station whose normalized title contains `station`."""
+        target = normalize_name(station)
+        for i, title in enumerate(self.titles):
+            if target and target in normalize_name(title):
+                return i
+        raise KeyError(f'no station matching {station!r}')
+
+    def yearly(self) -> 'QCReport':
+        """The same counts summed into calendar years (from a monthly or daily report)."""
+        if self.freq == 'Y' or not len(self.periods):
+            return self
+        if self.freq == 'S':
+            raise ValueError('seasons do not add up to years')
+        years = self.periods.astype('datetime64[Y]')
+        starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+        counts = np.add.reduceat(self.counts, starts, axis=2)
+        return QCReport(self.titles, 'Y', years[starts], np.add.reduceat(self.days, starts), counts)
+
+    def labels(self) -> List[str]:
+        return season_labels(self.periods) if self.freq == 'S' else self.periods.astype(str).tolist()
+
+    def to_csv(self, path: str) -> str:
+        """One station,period,days,<category counts>,completeness row per cell."""
+        labels = self.labels()
+        ratio = self.ratio
+        with open(path, 'w', newline='', encoding='utf8') as f:
+            w = csv.writer(f)
+            w.writerow(['station', 'period', 'days', 'complete', 'incomplete', 'unavailable', 'other', 'no_row',
+                        'completeness'])
+            for s, title in enumerate(self.titles):
+                rows = zip(labels, self.days.tolist(), *self.counts[s].tolist(), ratio[s].tolist())
+                w.writerows((title, p, d, *c[:-1], round(c[-1], 4)) for p, d, *c in rows)
+        return path
+
+    def save(self, path: str, source: Optional[os.stat_result] = None) -> str:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, version=VERSION, titles=np.array(self.titles, dtype=np.str_), freq=self.freq,
+                     periods=self.periods.astype(np.int64), unit=np.datetime_data(self.periods.dtype)[0],
+                     days=self.days, counts=self.counts,
+                     source=np.array([source.st_size, source.st_mtime_ns] if source else [-1, -1], dtype=np.int64))
+        os.replace(tmp, path)
+        return path
+
+
+def _codes(s: DailySeries) -> np.ndarray:
+    """The completeness category of every row: its flag, or unavailable when the value is NaN."""
+    if s.flags is None:
+        codes = np.full(len(s), FLAG_COMPLETE, dtype=np.uint8)
+    else:
+        codes = s.flags.copy()
+    codes[s.missing] = FLAG_MISSING
+    return codes
+
+
+def qc_report(series_list: Sequence[DailySeries], freq: str = 'M', start=None, end=None) -> QCReport:
+    """Count the completeness codes of all `series_list` per `freq` period in one pass."""
+    titles = [s.name for s in series_list]
+    non_empty = [s for s in series_list if len(s)]
+    if not non_empty and (start is None or end is None):
+        return QCReport(titles, freq, np.empty(0, 'datetime64[M]'), np.empty(0, np.int64),
+                        np.zeros((len(titles), len(CATEGORIES), 0), dtype=np.int64))
+    first = min(s.dates[0] for s in non_empty) if start is None else np.datetime64(start, 'D')
+    last = max(s.dates[-1] for s in non_empty) if end is None else np.datetime64(end, 'D')
+    # widen to whole periods so 'no row' days at either end are counted
+    periods, _ = aggregate(np.array([first, last]), np.zeros(2), freq, 'count', first, last)
+    days = period_days(periods, freq)
+    lo = periods[0].astype('datetime64[D]')
+    n_days = int(days.sum())
+    stacked = np.full((len(series_list), n_days), _NO_ROW, dtype=np.uint8)
+    for row, s in enumerate(series_list):
+        offset = (s.dates - lo).astype(np.int64)
+        inside = (offset >= 0) & (offset < n_days)
+        stacked[row, offset[inside]] = _codes(s)[inside]
+    # one bincount over (station, period, category) cells counts every category at once
+    n_cells = len(periods) * len(CATEGORIES)
+    period = np.repeat(np.arange(len(periods), dtype=np.int64), days)
+    cells = (np.arange(len(series_list), dtype=np.int64)[:, None] * len(periods) + period) * len(CATEGORIES) + stacked
+    counts = np.bincount(cells.ravel(), minlength=len(series_list) * n_cells)
+    counts = counts.reshape(len(series_list), len(periods), len(CATEGORIES)).transpose(0, 2, 1)
+    return QCReport(titles, freq, periods, days, np.ascontiguousarray(counts))
+
+
+def qc_path(path: str) -> str:
+    return f'{path}.qc.npz'
+
+
+def load(path: str) -> Optional[QCReport]:
+    """The saved report, or None if the file is missing or unreadable."""
+    try:
+        with np.load(path) as z:
+            if int(z['version']) != VERSION:
+                return None
+            periods = z['periods'].astype(f'datetime64[{z["unit"]}]')
+            return QCReport(z['titles'].tolist(), str(z['freq']), periods, z['days'], z['counts'])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _source(path: str) -> Optional[tuple]:
+    try:
+        with np.load(path) as z:
+            return tuple(z['source'].tolist())
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def open_qc(path: str) -> QCReport:
+    """The monthly report of the HKO file `path`, from `<path>.qc.npz` when it is current."""
+    from hko_bytes import parse_file
+    st = os.stat(path)
+    sidecar = qc_path(path)
+    if _source(sidecar) == (st.st_size, st.st_mtime_ns):
+        report = load(sidecar)
+        if report is not None:
+            return report
+    report = qc_report([DailySeries.from_block(b) for b in parse_file(path).values()], 'M')
+    report.save(sidecar, st)
+    return report
+
+
+def mask_incomplete(periods: np.ndarray, values: np.ndarray, report: QCReport, station: str,
+                    min_complete: float) -> np.ndarray:
+    """`values` (aggregated over `periods` of the report's freq) with NaN where the station is incomplete.
+
+    Periods the report does not cover count as incomplete. Raises KeyError when no station
+    of the report matches `station`.
+    """
+    ratio = report.ratio[report.find(station)]
+    keys = periods.astype(report.periods.dtype)
+    pos = np.clip(np.searchsorted(report.periods, keys), 0, max(len(report.periods) - 1, 0))
+    ok = np.zeros(len(keys), dtype=bool)
+    if len(report.periods):
+        ok = (report.periods[pos] == keys) & (ratio[pos] >= min_complete)
+    return np.where(ok, values, np.nan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Completeness report of every station of an HKO file.')
+    parser.add_argument('path', help='HKO CSV, e.g. daily_SE_RF_ALL.csv')
+    parser.add_argument('--freq', default='Y', choices=('M', 'Y'))
+    parser.add_argument('--min-complete', type=float, default=0.9,
+                        help='periods below this fraction of complete days are listed as incomplete (default 0.9)')
+    parser.add_argument('-o', '--out', help='also write every station/period cell to this CSV')
+    args = parser.parse_args()
+
+    report = open_qc(args.path)
+    if args.freq == 'Y':
+        report = report.yearly()
+    labels = report.labels()
+    ratio = report.ratio
+    for s, title in enumerate(report.titles):
+        covered = report.counts[s, _NO_ROW] < report.days
+        bad = [labels[p] for p in np.flatnonzero(covered & (ratio[s] < args.min_complete)).tolist()]
+        mean = float(ratio[s][covered].mean()) if covered.any() else float('nan')
+        print(f'{title}: {mean:.1%} complete over {int(covered.sum())} periods; '
+              f'below {args.min_complete:.0%}: {", ".join(bad) or "none"}')
+    if args.out:
+        print(f'Wrote {report.to_csv(args.out)}')
+
+
+if __name__ == '__main__':
+    main()
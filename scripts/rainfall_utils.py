@@ -2,19 +2,28 @@
 
 Functions:
 - load_rainfall_csv(path) -> list of (datetime, rainfall_mm_or_None, humidity_pct_or_None)
+- load_rainfall_series(path, column='rainfall_mm') -> DailySeries for daily `datetime,rainfall_mm` files
 - validate_csv_header(path) -> (bool, message)
+
+Both loaders are memoized until the file changes (see memo.py): every call of
+load_rainfall_csv gets its own list of the cached rows, and the arrays of a memoized
+DailySeries are read-only.
 """
 from __future__ import annotations
 import csv
 import datetime
 from typing import List, Tuple, Optional
+from series import DailySeries
+from storage import load_series
+from dates import ISO_MINUTE, parse_dates
+from memo import memoize
 
+@memoize
 def load_rainfall_csv(path: str) -> List[Tuple[datetime.datetime, Optional[float], Optional[float]]]:
     """Load a CSV with header: datetime,rainfall_mm,humidity_pct
 
     Rows with unparsable datetimes are skipped. Numeric conversion errors are treated as None.
     """
-    data = []
     with open(path, 'r', encoding='utf8') as f:
         reader = csv.DictReader(f)
         # Basic header check
@@ -22,34 +31,43 @@ def load_rainfall_csv(path: str) -> List[Tuple[datetime.datetime, Optional[float
         expected = {'datetime', 'rainfall_mm', 'humidity_pct'}
         if not expected.issubset(set(hdr)):
             raise ValueError(f"CSV header missing required fields: {expected - set(hdr)}")
-        for row in reader:
-            dt_str = (row.get('datetime') or '')[:16]
+        rows = [(row.get('datetime') or '', row.get('rainfall_mm'), row.get('humidity_pct')) for row in reader]
+    # parse the whole datetime column at once; rows with bad datetimes are skipped
+    stamps, ok = parse_dates([r[0] for r in rows], ISO_MINUTE)
+    data = []
+    for dt, valid, (_, rv, hv) in zip(stamps.astype(object), ok.tolist(), rows):
+        if not valid:
+            continue
+        rainfall = None
+        humidity = None
+        if rv not in (None, ''):
             try:
-                dt = datetime.datetime.strptime(dt_str, '%Y-%m-%d %H:%M')
+                rainfall = float(rv)
             except Exception:
-                # skip rows with bad datetime
-                continue
-            rainfall = None
-            humidity = None
-            rv = row.get('rainfall_mm')
-            hv = row.get('humidity_pct')
-            if rv not in (None, ''):
+                rainfall = None
+        if hv not in (None, ''):
+            # strip percent sign if present
+            hv_clean = ''.join(c for c in hv if (c.isdigit() or c in '.-'))
+            if hv_clean != '':
                 try:
-                    rainfall = float(rv)
+                    humidity = float(hv_clean)
                 except Exception:
-                    rainfall = None
-            if hv not in (None, ''):
-                # strip percent sign if present
-                hv_clean = ''.join(c for c in hv if (c.isdigit() or c in '.-'))
-                if hv_clean != '':
-                    try:
-                        humidity = float(hv_clean)
-                    except Exception:
-                        humidity = None
-            data.append((dt, rainfall, humidity))
+                    humidity = None
+        data.append((dt, rainfall, humidity))
     return data
 
 
+@memoize
+def load_rainfall_series(path: str, column: str = 'rainfall_mm') -> DailySeries:
+    """Load one column of a daily processed CSV (`datetime,rainfall_mm[,humidity_pct]`).
+
+    This is the format written by `fetch_daily_rainfall_kaitak.py`. Missing values are NaN
+    (use `.total()` / `.mean()` which skip them); a missing file gives an empty series. A
+    fresh `.parquet` copy next to the CSV is used instead when pyarrow is installed.
+    """
+    return load_series(path, 'datetime', column)
+
+
 def validate_csv_header(path: str) -> Tuple[bool, str]:
     """Return (True, '') if header looks correct, otherwise (False, message)."""
     with open(path, 'r', encoding='utf8') as f:
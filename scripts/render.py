@@ -0,0 +1,217 @@
+"""Chart rendering helpers: Agg backend, reused figures, downsampling and batch rendering.
+
+Importing this module selects the non-interactive Agg backend. Charts are drawn on
+`matplotlib.figure.Figure` objects (not pyplot), so nothing is registered with pyplot's
+figure manager and nothing leaks: each thread keeps one figure per (size, dpi) and clears
+it for the next chart instead of creating a new one.
+
+Dense line series are downsampled before plotting to about two points per horizontal
+pixel (`max_points`), which looks the same but draws much faster:
+ - 'lttb': Largest-Triangle-Three-Buckets, keeps the visual shape (default)
+ - 'minmax': the min and the max of every bucket, keeps every spike
+NaN values are dropped first (matplotlib would not draw them anyway).
+
+`render_many` renders a list of chart jobs in worker processes (each worker reuses its own
+figures), e.g. one chart per station.
+
+Functions:
+- lttb(x, y, n_out) / minmax(x, y, n_out) -> indices of the points to keep
+- downsample(x, y, max_points, method='lttb') -> (x, y)
+- figure(figsize, dpi=100) -> cleared, reusable Figure
+- line_chart(paths, x, y, title, xlabel, ylabel, ...) -> paths
+- bar_chart(paths, x, heights, title, xlabel, ylabel, ...) -> paths
+- bar_line_chart(paths, x, bars, line, title, bar_label, line_label, ...) -> paths
+- render_many(jobs, workers=None) -> list of paths (jobs: [(kind, kwargs)], kind in RENDERERS)
+"""
+from __future__ import annotations
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+import matplotlib
+
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+_local = threading.local()
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def _days(x):
+    """datetime64 months/years as days: matplotlib adds a bar width in the unit of x."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64) and np.datetime_data(x.dtype)[0] in ('M', 'Y', 'W'):
+        return x.astype('datetime64[D]')
+    return x
+
+
+def _bucket_edges(n: int, n_buckets: int) -> np.ndarray:
+    return np.linspace(0, n, n_buckets + 1).astype(np.int64)
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """Indices of `n_out` points chosen by Largest-Triangle-Three-Buckets (first/last kept)."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    xf, yf = _as_float(x), np.asarray(y, dtype=np.float64)
+    # the points between the first and the last one go into n_out - 2 buckets
+    edges = _bucket_edges(n - 2, n_out - 2) + 1
+    counts = np.diff(edges)
+    # the average point of every bucket; the bucket after the last one is the last point
+    avg_x = np.append(np.add.reduceat(xf[1:-1], edges[:-1] - 1) / counts, xf[-1])
+    avg_y = np.append(np.add.reduceat(yf[1:-1], edges[:-1] - 1) / counts, yf[-1])
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = xf[lo:hi], yf[lo:hi]
+        # twice the triangle area (previous choice, candidate, next bucket average)
+        area = np.abs((xf[a] - avg_x[i + 1]) * (by - yf[a]) - (xf[a] - bx) * (avg_y[i + 1] - yf[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def minmax(x, y, n_out: int) -> np.ndarray:
+    """Indices of the min and max point of each of n_out // 2 buckets, in order."""
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+    yf = np.asarray(y, dtype=np.float64)
+    starts = _bucket_edges(n, n_buckets)[:-1]
+    bucket = np.repeat(np.arange(n_buckets), np.diff(_bucket_edges(n, n_buckets)))
+    picks = []
+    for extreme in (np.minimum, np.maximum):
+        hit = np.flatnonzero(yf == extreme.reduceat(yf, starts)[bucket])
+        # first hit in every bucket
+        _, first = np.unique(bucket[hit], return_index=True)
+        picks.append(hit[first])
+    return np.unique(np.concatenate(picks))
+
+
+def downsample(x, y, max_points: int, method: str = 'lttb') -> Tuple[np.ndarray, np.ndarray]:
+    """Drop NaN values and reduce (x, y) to at most `max_points` points."""
+    x, y = np.asarray(x), np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(y)
+    if not valid.all():
+        x, y = x[valid], y[valid]
+    if len(y) <= max_points:
+        return x, y
+    if method == 'lttb':
+        keep = lttb(x, y, max_points)
+    elif method == 'minmax':
+        keep = minmax(x, y, max_points)
+    else:
+        raise ValueError(f'unknown downsampling method: {method!r}')
+    return x[keep], y[keep]
+
+
+def figure(figsize: Tuple[float, float], dpi: int = 100) -> Figure:
+    """A cleared Figure of this size, reused across calls in the same thread."""
+    figures = getattr(_local, 'figures', None)
+    if figures is None:
+        figures = _local.figures = {}
+    key = (tuple(figsize), dpi)
+    fig = figures.get(key)
+    if fig is None:
+        fig = figures[key] = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+    else:
+        fig.clear()
+    return fig
+
+
+def _paths(paths: Union[str, Sequence[str]]) -> list:
+    return [paths] if isinstance(paths, str) else list(paths)
+
+
+def _save(fig: Figure, paths) -> list:
+    paths = _paths(paths)
+    for path in paths:
+        fig.savefig(path)
+    return paths
+
+
+def line_chart(paths, x, y, title: str, xlabel: str, ylabel: str, figsize=(12, 5), dpi: int = 100,
+               fmt: str = '-o', markersize: float = 3, max_points: Optional[int] = None,
+               method: str = 'lttb', grid: bool = True) -> list:
+    """Line chart of (x, y), downsampled to `max_points` (default: two per pixel of width)."""
+    fig = figure(figsize, dpi)
+    ax = fig.add_subplot()
+    x, y = downsample(x, y, max_points or int(2 * figsize[0] * dpi), method)
+    ax.plot(x, y, fmt, markersize=markersize)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    if grid:
+        ax.grid(alpha=0.3)
+    fig.tight_layout()
+    return _save(fig, paths)
+
+
+def bar_chart(paths, x, heights, title: str, xlabel: str, ylabel: str, figsize=(14, 6), dpi: int = 100,
+              width: float = 20, rotation: float = 45) -> list:
+    """Bar chart (e.g. monthly totals on a datetime64[M] axis)."""
+    fig = figure(figsize, dpi)
+    ax = fig.add_subplot()
+    ax.bar(_days(x), heights, width=width)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.tick_params(axis='x', labelrotation=rotation)
+    fig.tight_layout()
+    return _save(fig, paths)
+
+
+def bar_line_chart(paths, x, bars, line, title: str, bar_label: str, line_label: str, xlabel: str = '',
+                   figsize=(14, 5), dpi: int = 100, bar_color: str = '#ff7f0e', line_color: str = '#1f77b4',
+                   width: float = 20, markersize: float = 3) -> list:
+    """Bars on the left axis and a line on a twin right axis (shared x)."""
+    fig = figure(figsize, dpi)
+    ax1 = fig.add_subplot()
+    ax1.set_xlabel(xlabel)
+    ax1.set_ylabel(bar_label, color=bar_color)
+    x = _days(x)
+    ax1.bar(x, bars, width=width, color=bar_color, alpha=0.6)
+    ax1.tick_params(axis='y', labelcolor=bar_color)
+
+    ax2 = ax1.twinx()
+    ax2.set_ylabel(line_label, color=line_color)
+    ax2.plot(x, line, color=line_color, marker='o', markersize=markersize)
+    ax2.tick_params(axis='y', labelcolor=line_color)
+
+    fig.autofmt_xdate()
+    ax2.set_title(title)
+    fig.tight_layout()
+    return _save(fig, paths)
+
+
+RENDERERS = {'line': line_chart, 'bar': bar_chart, 'bar_line': bar_line_chart}
+
+
+def _render_job(job) -> list:
+    kind, kwargs = job
+    return RENDERERS[kind](**kwargs)
+
+
+def render_many(jobs, workers: Optional[int] = None) -> list:
+    """Render [(kind, kwargs)] chart jobs in `workers` processes; returns each job's paths."""
+    jobs = list(jobs)
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # several jobs per task keep the pickling overhead small
+        return list(pool.map(_render_job, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
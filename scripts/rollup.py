@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Precomputed range-query index (rollup) for one processed daily series.
+
+For a processed CSV column (e.g. `rainfall_processed.csv` / rainfall_mm) the rollup file
+`<csv>.<column>.rollup.npz` holds, for the days from the first to the last date:
+ - prefix sums of the values: int64 in units of 10**-DECIMALS when every value is a
+   decimal with at most DECIMALS places (HKO data has one), so range sums are exact;
+   otherwise float64 sums of the values as they are, with the usual float rounding error
+ - prefix counts of the valid (non-NaN) days
+ - sparse tables of minima and maxima (level k holds the min/max of 2**k days from each day)
+ - the source CSV's size, mtime and blake2b digest (rebuilt when they change, like daycache.py)
+
+Any [start, end] range then answers without touching the daily values:
+sum/count/mean in O(1) from two prefix entries, min/max in O(1) from two overlapping
+power-of-two windows of the sparse table. Dates may be scalars or arrays (many ranges in
+one call). Ranges are clipped to the data; empty or all-missing ranges give NaN (count 0).
+
+Functions:
+- Rollup.from_series(series) -> Rollup; .sum/.count/.mean/.min/.max(start=None, end=None)
+- open_rollup(csv_path, date_col, value_col) -> Rollup (None if the CSV is missing)
+- query(csv_path, date_col, value_col, how, start=None, end=None) -> float
+
+Usage:
+  .venv/bin/python scripts/rollup.py rainfall_processed.csv datetime rainfall_mm --how sum [--start 2015-01-01] [--end 2015-12-31]
+"""
+from __future__ import annotations
+import argparse
+import os
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+from daycache import file_digest, load_range
+from series import DailySeries
+
+VERSION = 1
+HOWS = ('sum', 'count', 'mean', 'min', 'max')
+# integer prefix sums are used when every value has at most DECIMALS decimal places
+DECIMALS = 3
+_SCALE = 10 ** DECIMALS
+
+
+def rollup_path(csv_path: str, value_col: str) -> str:
+    return f'{csv_path}.{value_col}.rollup.npz'
+
+
+def _sparse_table(values: np.ndarray, reduce) -> np.ndarray:
+    """table[k, i] = reduce(values[i:i + 2**k]) (entries past the end repeat the last window)."""
+    n = len(values)
+    levels = max(int(n).bit_length(), 1)
+    table = np.empty((levels, n), dtype=values.dtype)
+    table[0] = values
+    for k in range(1, levels):
+        half = 1 << (k - 1)
+        table[k] = table[k - 1]
+        reduce(table[k - 1, :n - half], table[k - 1, half:], out=table[k, :n - half])
+    return table
+
+
+class Rollup:
+    """Prefix sums/counts and min/max sparse tables over a day-indexed series."""
+
+    __slots__ = ('first', 'sums', 'counts', 'mins', 'maxs')
+
+    def __init__(self, first: np.datetime64, sums: np.ndarray, counts: np.ndarray, mins: np.ndarray, maxs: np.ndarray):
+        self.first = first
+        self.sums = sums
+        self.counts = counts
+        self.mins = mins
+        self.maxs = maxs
+
+    @classmethod
+    def from_series(cls, series: DailySeries) -> 'Rollup':
+        if not len(series):
+            empty = np.empty((1, 0))
+            return cls(np.datetime64(0, 'D'), np.zeros(1, np.int64), np.zeros(1, np.int64), empty, empty)
+        first = series.dates.min()
+        n = int((series.dates.max() - first).astype(np.int64)) + 1
+        values = np.full(n, np.nan)
+        values[(series.dates - first).astype(np.int64)] = series.values
+        valid = ~np.isnan(values)
+        scaled = np.where(valid, np.round(values * _SCALE), 0)
+        if (scaled[valid] / _SCALE == values[valid]).all() and np.abs(scaled).sum() < 2 ** 53:
+            sums = np.concatenate([[0], np.cumsum(scaled.astype(np.int64))])
+        else:
+            # more decimals than DECIMALS: plain float sums rather than rounded ones
+            sums = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+        counts = np.concatenate([[0], np.cumsum(valid, dtype=np.int64)])
+        mins = _sparse_table(np.where(valid, values, np.inf), np.minimum)
+        maxs = _sparse_table(np.where(valid, values, -np.inf), np.maximum)
+        return cls(first, sums, counts, mins, maxs)
+
+    def __len__(self) -> int:
+        return len(self.sums) - 1
+
+    def __repr__(self) -> str:
+        return f'Rollup({self.first}, {len(self)} days)'
+
+    @property
+    def scale(self) -> int:
+        """Units per 1.0 of the prefix sums: 10**DECIMALS for int64 sums, 1 for float sums."""
+        return _SCALE if self.sums.dtype.kind == 'i' else 1
+
+    def _bounds(self, start, end):
+        """Half-open day offsets [lo, hi) of the inclusive date range, clipped to the data."""
+        n = len(self)
+        lo = 0 if start is None else (np.asarray(start, dtype='datetime64[D]') - self.first).astype(np.int64)
+        hi = n if end is None else (np.asarray(end, dtype='datetime64[D]') - self.first).astype(np.int64) + 1
+        lo, hi = np.clip(lo, 0, n), np.clip(hi, 0, n)
+        return lo, np.maximum(hi, lo)
+
+    @staticmethod
+    def _result(x):
+        return float(x) if np.ndim(x) == 0 else x
+
+    def count(self, start=None, end=None):
+        lo, hi = self._bounds(start, end)
+        c = self.counts[hi] - self.counts[lo]
+        return int(c) if np.ndim(c) == 0 else c
+
+    def sum(self, start=None, end=None):
+        lo, hi = self._bounds(start, end)
+        s = (self.sums[hi] - self.sums[lo]) / self.scale
+        return self._result(np.where(self.counts[hi] > self.counts[lo], s, np.nan))
+
+    def mean(self, start=None, end=None):
+        lo, hi = self._bounds(start, end)
+        c = self.counts[hi] - self.counts[lo]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            m = (self.sums[hi] - self.sums[lo]) / self.scale / c
+        return self._result(np.where(c > 0, m, np.nan))
+
+    def _extreme(self, table: np.ndarray, reduce, start, end):
+        lo, hi = self._bounds(start, end)
+        if not len(self):
+            return self._result(np.full(np.shape(lo), np.nan))
+        # two windows of 2**k days that together cover [lo, hi)
+        k = np.log2(np.maximum(hi - lo, 1)).astype(np.int64)
+        x = reduce(table[k, np.minimum(lo, len(self) - 1)], table[k, np.maximum(hi - (1 << k), 0)])
+        return self._result(np.where((hi == lo) | np.isinf(x), np.nan, x))
+
+    def min(self, start=None, end=None):
+        return self._extreme(self.mins, np.minimum, start, end)
+
+    def max(self, start=None, end=None):
+        return self._extreme(self.maxs, np.maximum, start, end)
+
+    def query(self, how: str, start=None, end=None):
+        if how not in HOWS:
+            raise ValueError(f'unknown reduction: {how!r} (expected one of {HOWS})')
+        return getattr(self, how)(start, end)
+
+
+def save(path: str, rollup: Rollup, source_size: int, source_mtime_ns: int, digest: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        np.savez(f, version=VERSION, first=rollup.first.astype(np.int64), sums=rollup.sums, counts=rollup.counts,
+                 mins=rollup.mins, maxs=rollup.maxs, source=np.array([source_size, source_mtime_ns], np.int64),
+                 digest=np.frombuffer(digest, np.uint8))
+    os.replace(tmp, path)
+
+
+def _load(path: str):
+    try:
+        with np.load(path) as z:
+            if int(z['version']) != VERSION:
+                return None
+            rollup = Rollup(np.datetime64(int(z['first']), 'D'), z['sums'], z['counts'], z['mins'], z['maxs'])
+            return rollup, tuple(z['source'].tolist()), z['digest'].tobytes()
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def build(csv_path: str, date_col: str, value_col: str) -> Rollup:
+    """(Re)build the rollup file for one CSV column."""
+    st = os.stat(csv_path)
+    rollup = Rollup.from_series(load_range(csv_path, date_col, value_col))
+    save(rollup_path(csv_path, value_col), rollup, st.st_size, st.st_mtime_ns, file_digest(csv_path))
+    return rollup
+
+
+def open_rollup(csv_path: str, date_col: str, value_col: str) -> Optional[Rollup]:
+    """The rollup of `csv_path`/`value_col`, rebuilt first if the CSV changed."""
+    if not os.path.exists(csv_path):
+        return None
+    st = os.stat(csv_path)
+    loaded = _load(rollup_path(csv_path, value_col))
+    if loaded is None:
+        return build(csv_path, date_col, value_col)
+    rollup, source, digest = loaded
+    if source != (st.st_size, st.st_mtime_ns):
+        new_digest = file_digest(csv_path)
+        if new_digest != digest:
+            return build(csv_path, date_col, value_col)
+        # same content, new mtime
+        save(rollup_path(csv_path, value_col), rollup, st.st_size, st.st_mtime_ns, digest)
+    return rollup
+
+
+def query(csv_path: str, date_col: str, value_col: str, how: str, start=None, end=None) -> float:
+    """One range reduction of a processed CSV column (NaN if the CSV is missing)."""
+    rollup = open_rollup(csv_path, date_col, value_col)
+    if rollup is None:
+        return 0 if how == 'count' else float('nan')
+    return rollup.query(how, start, end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Range sum/count/mean/min/max of a processed daily CSV column.')
+    parser.add_argument('csv')
+    parser.add_argument('date_col')
+    parser.add_argument('value_col')
+    parser.add_argument('--how', default='sum', help=f'one of {", ".join(HOWS)} (default sum)')
+    parser.add_argument('--start', help='first date (YYYY-MM-DD, default: first day of the data)')
+    parser.add_argument('--end', help='last date, inclusive (default: last day of the data)')
+    args = parser.parse_args()
+    print(query(args.csv, args.date_col, args.value_col, args.how, args.start, args.end))
+
+
+if __name__ == '__main__':
+    main()
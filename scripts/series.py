@@ -0,0 +1,192 @@
+"""Columnar daily time-series store shared by the loaders and scripts.
+
+A `DailySeries` keeps one station/element series as two NumPy arrays:
+ - dates: `datetime64[D]`, sorted ascending
+ - values: `float64`, NaN marks a missing value
+and, for series parsed from the HKO files, a third:
+ - flags: `uint8` completeness codes, a categorical column whose categories are
+   `hko_blocks.FLAG_NAMES` ('C' complete, '#' incomplete, '***' unavailable, '?' other);
+   None when the source has no completeness column (the processed CSVs)
+
+Functions:
+- read_series_csv(path, date_col, value_col, name=None) -> DailySeries
+- parse_values(strings) -> float64 array (NaN for empty / non-numeric)
+- DailySeries.from_block(block) -> DailySeries built from a `hko_blocks.StationBlock`
+"""
+from __future__ import annotations
+import csv
+import datetime
+import os
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from aggregate import aggregate, period_days
+from dates import ISO_DATE, parse_dates
+from hko_blocks import FLAG_COMPLETE, FLAG_NAMES
+
+# datetime.date.toordinal() of 1970-01-01, the datetime64 epoch
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+class DailySeries:
+    """Daily values on a `datetime64[D]` index."""
+
+    __slots__ = ('dates', 'values', 'name', 'flags')
+
+    def __init__(self, dates, values, name: str = '', flags=None):
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.values = np.asarray(values, dtype=np.float64)
+        if self.dates.shape != self.values.shape:
+            raise ValueError(f'dates and values differ in length: {self.dates.shape} vs {self.values.shape}')
+        self.name = name
+        self.flags = None if flags is None else np.asarray(flags, dtype=np.uint8)
+        if self.flags is not None and self.flags.shape != self.values.shape:
+            raise ValueError(f'flags and values differ in length: {self.flags.shape} vs {self.values.shape}')
+
+    @classmethod
+    def empty(cls, name: str = '') -> 'DailySeries':
+        return cls(np.empty(0, 'datetime64[D]'), np.empty(0), name)
+
+    @classmethod
+    def from_ordinals(cls, ordinals, values, name: str = '', flags=None) -> 'DailySeries':
+        """Build from `datetime.date.toordinal()` integers (e.g. an array('l'))."""
+        days = np.asarray(ordinals, dtype=np.int64) - EPOCH_ORDINAL
+        flags = None if flags is None else np.frombuffer(bytes(flags), dtype=np.uint8).copy()
+        return cls(days.astype('datetime64[D]'), np.array(values, dtype=np.float64), name, flags)
+
+    @classmethod
+    def from_block(cls, block) -> 'DailySeries':
+        return cls.from_ordinals(block.dates, block.values, block.title, block.flags)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        span = f'{self.dates[0]}..{self.dates[-1]}' if len(self) else 'empty'
+        return f'DailySeries({self.name!r}, {span}, rows={len(self)})'
+
+    def sorted(self) -> 'DailySeries':
+        """Return the series ordered by date (self if it already is)."""
+        if len(self) > 1 and (np.diff(self.dates.astype(np.int64)) < 0).any():
+            order = np.argsort(self.dates, kind='stable')
+            flags = None if self.flags is None else self.flags[order]
+            return DailySeries(self.dates[order], self.values[order], self.name, flags)
+        return self
+
+    @property
+    def missing(self) -> np.ndarray:
+        """Boolean mask, True where the value is missing."""
+        return np.isnan(self.values)
+
+    @property
+    def valid(self) -> np.ndarray:
+        return ~np.isnan(self.values)
+
+    @property
+    def complete(self) -> np.ndarray:
+        """True where there is a value flagged complete ('C'); any value if there are no flags."""
+        if self.flags is None:
+            return self.valid
+        return self.valid & (self.flags == FLAG_COMPLETE)
+
+    def flag_labels(self) -> np.ndarray:
+        """The completeness codes as strings ('C', '#', '***', '?'); empty without flags."""
+        if self.flags is None:
+            return np.empty(0, dtype='<U3')
+        return np.array(FLAG_NAMES)[self.flags]
+
+    @property
+    def years(self) -> np.ndarray:
+        return self.dates.astype('datetime64[Y]').astype(np.int64) + 1970
+
+    def slice_dates(self, start=None, end=None) -> 'DailySeries':
+        """Rows with start <= date <= end (either bound may be None). Returns views."""
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left')
+        hi = len(self) if end is None else np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right')
+        flags = None if self.flags is None else self.flags[lo:hi]
+        return DailySeries(self.dates[lo:hi], self.values[lo:hi], self.name, flags)
+
+    def slice_years(self, start_year: Optional[int] = None, end_year: Optional[int] = None) -> 'DailySeries':
+        """Rows whose year is within [start_year, end_year]."""
+        start = None if start_year is None else f'{start_year:04d}-01-01'
+        end = None if end_year is None else f'{end_year:04d}-12-31'
+        return self.slice_dates(start, end)
+
+    def mean(self) -> Optional[float]:
+        """Mean of the non-missing values, None if there are none."""
+        valid = self.values[self.valid]
+        return float(valid.mean()) if len(valid) else None
+
+    def total(self) -> float:
+        """Sum of the non-missing values (missing days count as 0)."""
+        return float(np.nansum(self.values))
+
+    def completeness(self, freq: str = 'M', start=None, end=None) -> Tuple[np.ndarray, np.ndarray]:
+        """(periods, fraction of the calendar days of each period with a complete value)."""
+        periods, counts = aggregate(self.dates, np.where(self.complete, 1.0, np.nan), freq, 'count', start, end)
+        return periods, counts / period_days(periods, freq)
+
+    def resample(self, freq: str = 'M', how: str = 'mean', start=None, end=None,
+                 min_complete: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Aggregate into calendar periods, see `aggregate.aggregate`.
+
+        freq: 'D', 'M', 'S' or 'Y'. how: 'sum', 'mean', 'min', 'max' or 'count'. Returns
+        (periods, values) over a contiguous period range from `start` (default: first date)
+        to `end` (default: last date). Missing values are ignored; a period without valid
+        values is 0 for 'sum'/'count' and NaN otherwise. With `min_complete` (0..1), periods
+        whose `completeness` is lower are NaN.
+        """
+        periods, out = aggregate(self.dates, self.values, freq, how, start, end)
+        if min_complete is not None:
+            _, ratio = self.completeness(freq, start, end)
+            out = np.where(ratio >= min_complete, out, np.nan)
+        return periods, out
+
+    def to_csv_rows(self, fmt: str = '{}'):
+        """Yield (iso_date, formatted_value_or_empty) tuples for csv.writer.writerows."""
+        for d, v in zip(self.dates.astype(str).tolist(), self.values.tolist()):
+            yield d, ('' if v != v else fmt.format(v))
+
+
+def parse_values(strings: Sequence[str]) -> np.ndarray:
+    """Convert a column of numeric strings to float64; empty or non-numeric entries become NaN."""
+    try:
+        return np.array([v if v else 'nan' for v in strings], dtype=np.str_).astype(np.float64)
+    except ValueError:
+        out = np.full(len(strings), np.nan)
+        for i, v in enumerate(strings):
+            try:
+                out[i] = float(v)
+            except ValueError:
+                pass
+        return out
+
+
+def read_series_csv(path: str, date_col: str, value_col: str, name: Optional[str] = None) -> DailySeries:
+    """Load one value column of a processed CSV into a DailySeries.
+
+    Only the first 10 characters of the date column (YYYY-MM-DD) are used; the column is
+    parsed in one vectorized call (see dates.parse_dates). Rows with an unparsable date are
+    skipped; empty or non-numeric values become NaN. A missing file yields an empty series.
+    """
+    if not os.path.exists(path):
+        return DailySeries.empty(name or value_col)
+    with open(path, 'r', encoding='utf8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        try:
+            di = header.index(date_col)
+            vi = header.index(value_col)
+        except ValueError:
+            return DailySeries.empty(name or value_col)
+        width = max(di, vi)
+        date_strs = []
+        value_strs = []
+        for row in reader:
+            if len(row) > width:
+                date_strs.append(row[di])
+                value_strs.append(row[vi])
+    dates, ok = parse_dates(date_strs, ISO_DATE)
+    values = parse_values(value_strs)
+    return DailySeries(dates[ok], values[ok], name or value_col).sorted()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Local HTTP/JSON server that keeps the processed series in memory.
+
+The processed CSVs are loaded once (through the day cache and the rollup index) and kept
+in memory, so a dashboard gets its answer from a running process instead of starting
+Python and re-parsing the files.
+
+Endpoints (GET; dates are YYYY-MM-DD and optional):
+  /series?name=wind&start=&end=              daily values: {"dates": [...], "values": [...]}
+  /aggregate?name=rain&freq=M&how=sum&start=&end=
+                                             calendar aggregates (see aggregate.py)
+  /stats?name=rain&how=sum&start=&end=       one range reduction from the rollup (sum, count, mean, min, max)
+  /summary.svg?start=&end=                   the 7.svg summary tile for the range
+  /health                                    loaded datasets and cache counters
+Names: wind (kaitak_wind_2010_2025.csv), rain (rainfall_processed.csv). Missing values
+are null.
+
+Requests are handled by a thread pool (ThreadingHTTPServer). Responses are cached by
+URL until the data changes; every response carries an ETag, a digest of its body, so it
+stays valid across server restarts (If-None-Match gives 304).
+A refresher thread checks the CSVs every REFRESH seconds. When a fetcher or the pipeline
+has rewritten one, the refresher reloads it in the background while requests are still
+answered from the old data (stale-while-revalidate). It then swaps the new data in and
+drops the cached responses. With --fetch-interval the server also runs the pipeline's
+fetch and CSV tasks itself every N seconds.
+
+Usage:
+  PYTHONPATH=. .venv/bin/python scripts/serve.py [--host 127.0.0.1] [--port 8765] [--refresh 5] [--fetch-interval 0]
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from aggregate import FREQS, HOWS, aggregate
+from daycache import load_range
+from rollup import HOWS as STAT_HOWS, Rollup
+from series import DailySeries
+from svg_tiles import DEFAULT_TITLE, render_tile
+
+DATASETS = {
+    'wind': ('kaitak_wind_2010_2025.csv', 'date', 'mean_wspd'),
+    'rain': ('rainfall_processed.csv', 'datetime', 'rainfall_mm'),
+}
+JSON = 'application/json'
+SVG = 'image/svg+xml'
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class Dataset:
+    """One processed CSV column held in memory with its rollup."""
+
+    __slots__ = ('name', 'path', 'date_col', 'value_col', 'series', 'rollup', 'signature')
+
+    def __init__(self, name, path, date_col, value_col):
+        self.name = name
+        self.path = path
+        self.date_col = date_col
+        self.value_col = value_col
+        self.series = DailySeries.empty(name)
+        self.rollup = Rollup.from_series(self.series)
+        self.signature = None
+
+    def current_signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def loaded(self) -> 'Dataset':
+        """A new Dataset with the file's current contents (the old one stays usable)."""
+        new = Dataset(self.name, self.path, self.date_col, self.value_col)
+        new.signature = new.current_signature()
+        new.series = load_range(self.path, self.date_col, self.value_col)
+        new.series.name = self.name
+        new.rollup = Rollup.from_series(new.series)
+        return new
+
+
+class ResponseCache:
+    """LRU of rendered responses, keyed by (generation, URL)."""
+
+    __slots__ = ('size', 'hits', 'misses', '_entries', '_lock')
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class Store:
+    """The served datasets; `refresh()` reloads changed files and swaps them in."""
+
+    def __init__(self, datasets: Optional[Dict[str, tuple]] = None):
+        self.datasets = {name: Dataset(name, *spec) for name, spec in (datasets or DATASETS).items()}
+        self.generation = 0
+        self.cache = ResponseCache()
+        self._refresh_lock = threading.Lock()
+
+    def get(self, name: str) -> Dataset:
+        try:
+            return self.datasets[name]
+        except KeyError:
+            raise BadRequest(f'unknown dataset {name!r} (expected one of {sorted(self.datasets)})')
+
+    def refresh(self) -> list:
+        """Reload the datasets whose file changed; returns their names."""
+        with self._refresh_lock:
+            changed = [d for d in self.datasets.values() if d.current_signature() != d.signature]
+            for d in changed:
+                # readers keep using the old object until this assignment
+                self.datasets[d.name] = d.loaded()
+            if changed:
+                self.generation += 1
+                self.cache.clear()
+            return [d.name for d in changed]
+
+
+def _date(query, key):
+    value = query.get(key, [None])[0]
+    if not value:
+        return None
+    try:
+        return np.datetime64(value, 'D')
+    except ValueError:
+        raise BadRequest(f'bad {key} date: {value!r}')
+
+
+def _choice(query, key, choices, default):
+    value = query.get(key, [default])[0]
+    if value not in choices:
+        raise BadRequest(f'bad {key}: {value!r} (expected one of {list(choices)})')
+    return value
+
+
+def _json_number(v: float):
+    return None if math.isnan(v) else v
+
+
+def _values(values: np.ndarray) -> list:
+    return [None if v != v else v for v in values.tolist()]
+
+
+def _series(store, query):
+    d = store.get(query.get('name', ['wind'])[0])
+    s = d.series.slice_dates(_date(query, 'start'), _date(query, 'end'))
+    return JSON, {'name': d.name, 'dates': s.dates.astype(str).tolist(), 'values': _values(s.values)}
+
+
+def _aggregate(store, query):
+    d = store.get(query.get('name', ['wind'])[0])
+    freq = _choice(query, 'freq', FREQS, 'M')
+    how = _choice(query, 'how', HOWS, 'mean')
+    start, end = _date(query, 'start'), _date(query, 'end')
+    s = d.series.slice_dates(start, end)
+    periods, result = aggregate(s.dates, s.values, freq, how, start, end)
+    return JSON, {'name': d.name, 'freq': freq, 'how': how,
+                  'periods': periods.astype(str).tolist(), 'values': _values(result)}
+
+
+def _stats(store, query):
+    d = store.get(query.get('name', ['wind'])[0])
+    how = _choice(query, 'how', STAT_HOWS, 'mean')
+    value = d.rollup.query(how, _date(query, 'start'), _date(query, 'end'))
+    return JSON, {'name': d.name, 'how': how, 'value': value if how == 'count' else _json_number(value)}
+
+
+def _summary(store, query):
+    start, end = _date(query, 'start'), _date(query, 'end')
+    wind, rain = store.get('wind').rollup, store.get('rain').rollup
+    mean_wind = wind.mean(start, end) if wind.count(start, end) else None
+    total_rain = rain.sum(start, end) if rain.count(start, end) else None
+    title = DEFAULT_TITLE
+    if start is not None or end is not None:
+        title = f'{DEFAULT_TITLE[:-1]} {start or ""}..{end or ""})'
+    return SVG, render_tile(mean_wind, total_rain, title)
+
+
+def _health(store, query):
+    return JSON, {'generation': store.generation,
+                  'datasets': {n: {'path': d.path, 'days': len(d.series), 'loaded': d.signature is not None}
+                               for n, d in store.datasets.items()},
+                  'cache': {'hits': store.cache.hits, 'misses': store.cache.misses}}
+
+
+ROUTES = {'/series': _series, '/aggregate': _aggregate, '/stats': _stats, '/summary.svg': _summary}
+
+
+def respond(store: Store, url: str):
+    """(status, content type, body bytes, etag) for a GET of `url`."""
+    parts = urlsplit(url)
+    if parts.path == '/health':
+        # never cached
+        ctype, payload = _health(store, {})
+        return 200, ctype, json.dumps(payload).encode(), None
+    key = (store.generation, url)
+    cached = store.cache.get(key)
+    if cached is not None:
+        return cached
+    handler = ROUTES.get(parts.path)
+    if handler is None:
+        return 404, JSON, json.dumps({'error': f'no such endpoint: {parts.path}'}).encode(), None
+    try:
+        ctype, payload = handler(store, parse_qs(parts.query))
+    except BadRequest as e:
+        return 400, JSON, json.dumps({'error': str(e)}).encode(), None
+    body = payload.encode() if isinstance(payload, str) else json.dumps(payload, separators=(',', ':')).encode()
+    entry = (200, ctype, body, f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"')
+    store.cache.put(key, entry)
+    return entry
+
+
+class Handler(BaseHTTPRequestHandler):
+    store: Store = None
+    max_age = 5
+    verbose = False
+
+    def do_GET(self):
+        status, ctype, body, etag = respond(self.store, self.path)
+        if etag is not None and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        if etag is not None:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', f'max-age={self.max_age}, stale-while-revalidate={10 * self.max_age}')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        if self.verbose:
+            super().log_message(fmt, *args)
+
+
+def _every(seconds: float, func, stop: threading.Event) -> threading.Thread:
+    def loop():
+        while not stop.wait(seconds):
+            try:
+                func()
+            except Exception as e:
+                print(f'[serve] {getattr(func, "__name__", "refresh")} failed: {type(e).__name__}: {e}')
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    return thread
+
+
+def _fetch():
+    import pipeline  # imports matplotlib and requests, so only when fetching is enabled
+    pipeline.run(pipeline.default_tasks(), targets=['wind_csv', 'rain_csv'])
+
+
+def make_server(store: Store, host: str = '127.0.0.1', port: int = 8765, refresh: float = 5.0,
+                fetch_interval: float = 0, verbose: bool = False) -> ThreadingHTTPServer:
+    """A ready server (call serve_forever()); starts the background refresh threads."""
+    store.refresh()
+    handler = type('StoreHandler', (Handler,), {'store': store, 'max_age': max(int(refresh), 1), 'verbose': verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.stop_refresh = threading.Event()
+    if refresh > 0:
+        _every(refresh, store.refresh, server.stop_refresh)
+    if fetch_interval > 0:
+        _every(fetch_interval, _fetch, server.stop_refresh)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the processed weather series over HTTP/JSON.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '8765')))
+    parser.add_argument('--refresh', type=float, default=float(os.getenv('REFRESH', '5')),
+                        help='seconds between checks for rewritten CSVs (default 5)')
+    parser.add_argument('--fetch-interval', type=float, default=0,
+                        help='also run the fetch/CSV pipeline tasks every N seconds (default: off)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+    server = make_server(Store(), args.host, args.port, args.refresh, args.fetch_interval, args.verbose)
+    print(f'Serving on http://{args.host}:{server.server_address[1]}/ (Ctrl-C to stop)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop_refresh.set()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""Sidecar byte-offset index of the station blocks in an HKO CSV.
+
+Finding one station with `parse_station_blocks` + `find_station` parses every line of the
+file. The index is built once per downloaded file (one scan of the raw bytes) and saved as
+`<csv>.index.json`:
+
+    {"version": 1, "size": ..., "mtime_ns": ..., "digest": "<blake2b-128 hex>",
+     "blocks": [{"title": "Mean Wind Speed (km/h) - Kai Tak", "key": "meanwindspeedkmhkaitak",
+                 "start": 75, "end": 162184, "rows": 9801, "first": "1998-10-01", "last": "2025-07-31"}, ...]}
+
+start/end is the byte range from the block's title line to the end of its last data row,
+so a loader can seek() to it and parse only those bytes; `key` is the normalized title
+used by `find_station`. The index is rebuilt when the file's size/mtime changes and its
+hash differs, like the day cache.
+
+Functions:
+- open_index(path) -> StationIndex (built or refreshed on demand)
+- StationIndex.find(station) / .stations()
+- read_station(path, station, start_year=None, end_year=None, since=None) -> list of StationBlock
+- list_stations(path) -> [(title, rows, first, last)]
+
+Usage (list the stations of a downloaded file):
+  .venv/bin/python scripts/station_index.py daily_SE_RF_ALL.csv [--station "Kai Tak"]
+"""
+from __future__ import annotations
+import argparse
+import datetime
+import json
+import os
+import tempfile
+from typing import List, Optional
+
+from daycache import file_digest
+from hko_blocks import StationBlock, normalize_name
+from hko_bytes import decode_title, parse_station_bytes
+
+VERSION = 1
+_BOM = b'\xef\xbb\xbf'
+
+
+class StationIndex:
+    """The blocks of one HKO file: title, normalized key, byte range, rows and date span."""
+
+    __slots__ = ('path', 'blocks')
+
+    def __init__(self, path: str, blocks: List[dict]):
+        self.path = path
+        self.blocks = blocks
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def __repr__(self) -> str:
+        return f'StationIndex({self.path!r}, {len(self)} blocks)'
+
+    def find(self, station: str) -> List[dict]:
+        """The blocks whose key contains the normalized `station` (same rule as find_station)."""
+        target = normalize_name(station)
+        if not target:
+            return []
+        return [b for b in self.blocks if target in b['key']]
+
+    def stations(self) -> List[tuple]:
+        """(title, rows, first, last) per station; repeated titles are merged."""
+        merged = {}
+        for b in self.blocks:
+            m = merged.get(b['title'])
+            if m is None:
+                merged[b['title']] = [b['title'], b['rows'], b['first'], b['last']]
+                continue
+            m[1] += b['rows']
+            m[2] = min(filter(None, (m[2], b['first'])), default=None)
+            m[3] = max(filter(None, (m[3], b['last'])), default=None)
+        return [tuple(m) for m in merged.values()]
+
+
+def index_path(path: str) -> str:
+    return f'{path}.index.json'
+
+
+def _is_header(line: bytes) -> bool:
+    low = line.lower()
+    return b'year' in low and b'month' in low and b',' in line
+
+
+def _row_date(line: bytes) -> Optional[str]:
+    parts = line.split(b',', 3)
+    try:
+        return datetime.date(int(parts[0]), int(parts[1]), int(parts[2])).isoformat()
+    except (ValueError, IndexError):
+        return None
+
+
+def scan(path: str) -> List[dict]:
+    """One pass over the raw bytes, with the same block rules as `parse_station_blocks`."""
+    blocks = []
+    title = title_start = None
+    current = None
+    first_row = last_row = None
+
+    def close():
+        if current is not None:
+            current['end'] = current.pop('_end')
+            current['first'] = _row_date(first_row) if first_row else None
+            current['last'] = _row_date(last_row) if last_row else None
+            blocks.append(current)
+
+    offset = 0
+    with open(path, 'rb') as f:
+        for raw in f:
+            start, offset = offset, offset + len(raw)
+            line = raw.strip()
+            if start == 0 and line.startswith(_BOM):
+                line = line[len(_BOM):].strip()
+            if not line:
+                close()
+                current = None
+                continue
+            if current is not None and line[:1].isdigit():
+                if first_row is None:
+                    first_row = line
+                last_row = line
+                current['rows'] += 1
+                current['_end'] = offset
+                continue
+            if _is_header(line):
+                close()
+                current = None
+                if title is not None:
+                    text = decode_title(title)
+                    current = {'title': text, 'key': normalize_name(text), 'start': title_start,
+                               'end': None, 'rows': 0, 'first': None, 'last': None, '_end': offset}
+                    first_row = last_row = None
+                continue
+            close()
+            current = None
+            title, title_start = line, start
+    close()
+    return blocks
+
+
+def build(path: str) -> StationIndex:
+    """(Re)build and save the index of `path`."""
+    st = os.stat(path)
+    blocks = scan(path)
+    _save(path, {'version': VERSION, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+                 'digest': file_digest(path).hex(), 'blocks': blocks})
+    return StationIndex(path, blocks)
+
+
+def _save(path: str, payload: dict) -> None:
+    out = index_path(path)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(out)), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf8') as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp, out)
+
+
+def _load(path: str) -> Optional[dict]:
+    try:
+        with open(index_path(path), 'r', encoding='utf8') as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return payload if isinstance(payload, dict) and payload.get('version') == VERSION else None
+
+
+def open_index(path: str) -> StationIndex:
+    """The index of `path`, rebuilt first if it is missing or stale."""
+    st = os.stat(path)
+    payload = _load(path)
+    if payload is None:
+        return build(path)
+    if (payload['size'], payload['mtime_ns']) != (st.st_size, st.st_mtime_ns):
+        if file_digest(path).hex() != payload['digest']:
+            return build(path)
+        # same content, new mtime: refresh the signature only
+        payload['size'], payload['mtime_ns'] = st.st_size, st.st_mtime_ns
+        _save(path, payload)
+    return StationIndex(path, payload['blocks'])
+
+
+def _overlaps(block: dict, start_year, end_year, since) -> bool:
+    if not block['first'] or not block['last']:
+        # no parsable date at either end: read it and let the parser decide
+        return block['rows'] > 0
+    if end_year is not None and int(block['first'][:4]) > end_year:
+        return False
+    last = datetime.date.fromisoformat(block['last'])
+    if start_year is not None and last.year < start_year:
+        return False
+    return since is None or last.toordinal() >= since
+
+
+def read_station(path: str, station: str, start_year: Optional[int] = None, end_year: Optional[int] = None,
+                 since: Optional[int] = None) -> List[StationBlock]:
+    """The blocks matching `station`, parsed from their byte ranges only.
+
+    Same result as `find_station(parse_station_blocks(lines, start_year, end_year, since), station)`;
+    blocks whose date span is outside the requested years are not read at all (they are
+    returned empty, as the parser returns a matching block without rows in range), and the
+    rows that are read are parsed as bytes (see hko_bytes.py).
+    """
+    matched = open_index(path).find(station)
+    selected = [b for b in matched if _overlaps(b, start_year, end_year, since)]
+    parsed = {}
+    if selected:
+        chunks = []
+        with open(path, 'rb') as f:
+            for b in selected:
+                f.seek(b['start'])
+                chunks.append(f.read(b['end'] - b['start']))
+        parsed = parse_station_bytes(b'\n\n'.join(chunks), start_year, end_year, since)
+    out = {}
+    for b in matched:
+        if b['title'] not in out:
+            block = parsed.get(b['title'])
+            out[b['title']] = block if block is not None else StationBlock(b['title'])
+    return list(out.values())
+
+
+def list_stations(path: str) -> List[tuple]:
+    return open_index(path).stations()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List the stations of an HKO station-block CSV.')
+    parser.add_argument('path', help='HKO CSV, e.g. daily_SE_RF_ALL.csv')
+    parser.add_argument('--station', help='only the stations whose name contains this')
+    parser.add_argument('--rebuild', action='store_true', help='rebuild the index even if it is current')
+    args = parser.parse_args()
+    index = build(args.path) if args.rebuild else open_index(args.path)
+    rows = [(b['title'], b['rows'], b['first'], b['last']) for b in index.find(args.station)] \
+        if args.station else index.stations()
+    for title, n, first, last in rows:
+        print(f'{title:<60} {n:>7} rows  {first or "-"} .. {last or "-"}')
+    print(f'{len(rows)} stations in {args.path} (index: {index_path(args.path)})')
+
+
+if __name__ == '__main__':
+    main()
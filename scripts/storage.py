@@ -0,0 +1,96 @@
+"""Optional Parquet storage for the processed daily series.
+
+The processed CSVs stay the primary output; with `WRITE_PARQUET=1` the fetchers also write a
+`.parquet` file next to them (same name, `.parquet` suffix). Columns:
+ - date: date32
+ - station: dictionary-encoded string (the long station title is stored once)
+ - <value column> (e.g. mean_wspd, rainfall_mm): float64, null for missing
+
+Readers call `load_series`, which uses the Parquet file when pyarrow is installed and the file
+is at least as new as the CSV, and falls back to the CSV otherwise. Date ranges are pushed
+down to the Parquet reader so row groups outside the range are not decoded.
+
+pyarrow is optional (`pip install pyarrow`); without it everything keeps using the CSVs.
+
+Functions:
+- parquet_path(csv_path) -> str
+- write_parquet(path, series, value_col, station=None)
+- read_parquet_series(path, value_col, start=None, end=None) -> DailySeries
+- load_series(csv_path, date_col, value_col, start=None, end=None) -> DailySeries
+"""
+from __future__ import annotations
+import os
+from typing import Optional
+
+import numpy as np
+
+from series import DailySeries, read_series_csv
+
+pa = None
+pq = None
+
+
+def _pyarrow() -> bool:
+    """Import pyarrow on first use (it is optional and slow to import); False if it is missing."""
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:  # optional dependency
+            return False
+        pa, pq = pyarrow, pyarrow.parquet
+    return True
+
+
+def have_pyarrow() -> bool:
+    return _pyarrow()
+
+
+def parquet_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def write_parquet(path: str, series: DailySeries, value_col: str, station: Optional[str] = None,
+                  row_group_size: int = 1 << 16) -> str:
+    """Write `series` to `path` (zstd compressed, station column dictionary-encoded)."""
+    if not _pyarrow():
+        raise RuntimeError('pyarrow is not installed; run `pip install pyarrow` to write Parquet files')
+    n = len(series)
+    station_col = pa.DictionaryArray.from_arrays(pa.array(np.zeros(n, dtype=np.int32)),
+                                                 pa.array([station or series.name]))
+    table = pa.table({
+        'date': pa.array(series.dates, type=pa.date32()),
+        'station': station_col,
+        value_col: pa.array(series.values, mask=series.missing),
+    })
+    pq.write_table(table, path, compression='zstd', use_dictionary=True, row_group_size=row_group_size)
+    return path
+
+
+def read_parquet_series(path: str, value_col: str, start=None, end=None) -> DailySeries:
+    """Read `value_col` from a processed Parquet file, optionally limited to [start, end]."""
+    if not _pyarrow():
+        raise RuntimeError('pyarrow is not installed; run `pip install pyarrow` to read Parquet files')
+    filters = []
+    if start is not None:
+        filters.append(('date', '>=', np.datetime64(start, 'D').astype(object)))
+    if end is not None:
+        filters.append(('date', '<=', np.datetime64(end, 'D').astype(object)))
+    table = pq.read_table(path, columns=['date', 'station', value_col], filters=filters or None)
+    dates = table.column('date').to_numpy().astype('datetime64[D]')
+    values = table.column(value_col).to_numpy(zero_copy_only=False).astype(np.float64)
+    stations = table.column('station').unique().to_pylist() if table.num_rows else []
+    return DailySeries(dates, values, stations[0] if len(stations) == 1 else value_col).sorted()
+
+
+def load_series(csv_path: str, date_col: str, value_col: str, start=None, end=None) -> DailySeries:
+    """Load a processed series, preferring an up-to-date Parquet copy over the CSV."""
+    pq_path = parquet_path(csv_path)
+    if os.path.exists(pq_path) and (
+            not os.path.exists(csv_path) or os.path.getmtime(pq_path) >= os.path.getmtime(csv_path)) and _pyarrow():
+        return read_parquet_series(pq_path, value_col, start, end)
+    series = read_series_csv(csv_path, date_col, value_col)
+    if start is not None or end is not None:
+        series = series.slice_dates(start, end)
+    return series
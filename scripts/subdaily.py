@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Compact in-memory storage of hourly / 10-minute series, with daily and monthly aggregates.
+
+A SubDailySeries does not store one timestamp per row. It stores:
+ - start: the first timestamp (datetime64[m]) and step: the sampling interval in minutes
+ - gaps: explicit runs of slots with no row in the source, as (slot, length) pairs; the
+   timestamp of stored row j is start + step * (j + length of the gaps before it)
+ - values: int16 scaled by 10**-decimals when every value fits (HKO data has one decimal,
+   so -3276.7..3276.7), float32 otherwise; missing values are MISSING_INT16 / NaN
+A decade of 10-minute data is 525,960 slots, about 1 MB per station as int16, instead
+of 8 + 8 bytes per row for datetime64 + float64.
+
+Daily, monthly, seasonal and yearly aggregates come from slot arithmetic (minute of the
+day = start + slot * step) and `aggregate.aggregate`, without building a timestamp array.
+
+Functions:
+- SubDailySeries.from_arrays(times, values, step=None, decimals=1, name='') -> SubDailySeries
+- .times() / .decoded() / .aggregate(freq='D', how='mean') / .daily(how) / .monthly(how)
+- .save(path) / load(path) (.npz)
+- read_subdaily_csv(path, time_col, value_col, station_col=None, step=None) -> {station: SubDailySeries}
+
+Usage (daily means of an hourly or 10-minute CSV, e.g. HKO 'YYYYMMDDHHMM' timestamps):
+  .venv/bin/python scripts/subdaily.py PATH TIME_COL VALUE_COL [--station-col COL] [--freq D] [--how mean] [-o OUT]
+"""
+from __future__ import annotations
+import argparse
+import csv
+from typing import Dict, Optional
+
+import numpy as np
+
+from aggregate import FREQS, HOWS, aggregate
+from dates import detect_format, parse_dates
+from series import parse_values
+
+MISSING_INT16 = np.iinfo(np.int16).min
+MINUTES_PER_DAY = 1440
+
+
+class SubDailySeries:
+    """start + step timeline with explicit gap runs; scaled int16 or float32 values."""
+
+    __slots__ = ('start', 'step', 'gaps', 'values', 'decimals', 'name')
+
+    def __init__(self, start, step: int, gaps: np.ndarray, values: np.ndarray, decimals: Optional[int], name: str = ''):
+        self.start = np.datetime64(start, 'm')
+        self.step = int(step)
+        self.gaps = np.asarray(gaps, dtype=np.int64).reshape(-1, 2)
+        self.values = values
+        self.decimals = decimals
+        self.name = name
+
+    @classmethod
+    def from_arrays(cls, times, values, step: Optional[int] = None, decimals: Optional[int] = 1,
+                    name: str = '') -> 'SubDailySeries':
+        """Encode (times, values) rows; times must lie on a `step`-minute grid (default: the smallest interval)."""
+        minutes = np.asarray(times).astype('datetime64[m]').astype(np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if len(minutes) > 1 and not (np.diff(minutes) > 0).all():
+            order = np.argsort(minutes, kind='stable')
+            minutes, values = minutes[order], values[order]
+            last = np.append(minutes[1:] != minutes[:-1], True)
+            minutes, values = minutes[last], values[last]
+        if not len(minutes):
+            return cls(np.datetime64(0, 'm'), step or 60, np.empty((0, 2)), np.empty(0, np.float32), None, name)
+        diffs = np.diff(minutes)
+        step = int(step or (diffs.min() if len(diffs) else 60))
+        offsets = minutes - minutes[0]
+        if (offsets % step).any():
+            raise ValueError(f'{name or "series"}: timestamps are not on a {step}-minute grid')
+        slots = offsets // step
+        # a gap run starts after every jump of more than one slot
+        jumps = np.flatnonzero(np.diff(slots) > 1)
+        gaps = np.stack([slots[jumps] + 1, slots[jumps + 1] - slots[jumps] - 1], axis=1)
+        return cls(np.datetime64(int(minutes[0]), 'm'), step, gaps, _encode(values, decimals), _decimals(values, decimals), name)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self) -> str:
+        return (f'SubDailySeries({self.name!r}, {len(self)} rows every {self.step} min from {self.start}, '
+                f'{len(self.gaps)} gaps, {self.values.dtype})')
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.gaps.nbytes
+
+    def slots(self) -> np.ndarray:
+        """Slot number (0 = start) of every stored row."""
+        rows = np.arange(len(self), dtype=np.int64)
+        if not len(self.gaps):
+            return rows
+        # rows stored before each gap, and the total gap length up to and including it
+        before = self.gaps[:, 0] - np.concatenate([[0], np.cumsum(self.gaps[:-1, 1])])
+        shift = np.concatenate([[0], np.cumsum(self.gaps[:, 1])])
+        return rows + shift[np.searchsorted(before, rows, side='right')]
+
+    def times(self) -> np.ndarray:
+        return self.start + (self.slots() * self.step).astype('timedelta64[m]')
+
+    def decoded(self) -> np.ndarray:
+        """float64 values, NaN where missing."""
+        if self.decimals is None:
+            return self.values.astype(np.float64)
+        out = self.values.astype(np.float64) / 10 ** self.decimals
+        out[self.values == MISSING_INT16] = np.nan
+        return out
+
+    def days(self) -> np.ndarray:
+        """The day (datetime64[D]) of every stored row, from integer slot arithmetic."""
+        minutes = self.start.astype(np.int64) + self.slots() * self.step
+        return (minutes // MINUTES_PER_DAY).astype('datetime64[D]')
+
+    def aggregate(self, freq: str = 'D', how: str = 'mean', start=None, end=None):
+        """(periods, values) for 'D', 'M', 'S' or 'Y' periods (see aggregate.py)."""
+        return aggregate(self.days(), self.decoded(), freq, how, start, end)
+
+    def daily(self, how: str = 'mean', start=None, end=None):
+        return self.aggregate('D', how, start, end)
+
+    def monthly(self, how: str = 'mean', start=None, end=None):
+        return self.aggregate('M', how, start, end)
+
+    def save(self, path: str) -> str:
+        np.savez(path, start=self.start.astype(np.int64), step=self.step, gaps=self.gaps, values=self.values,
+                 decimals=-1 if self.decimals is None else self.decimals, name=self.name)
+        return path
+
+
+def _decimals(values: np.ndarray, decimals: Optional[int]) -> Optional[int]:
+    """`decimals` if every value fits a scaled int16 exactly, else None (float32)."""
+    if decimals is None:
+        return None
+    finite = values[~np.isnan(values)]
+    scaled = finite * 10 ** decimals
+    limit = np.iinfo(np.int16).max
+    if len(finite) and (np.abs(scaled).max() > limit or np.abs(scaled - np.round(scaled)).max() > 1e-6):
+        return None
+    return decimals
+
+
+def _encode(values: np.ndarray, decimals: Optional[int]) -> np.ndarray:
+    decimals = _decimals(values, decimals)
+    if decimals is None:
+        return values.astype(np.float32)
+    missing = np.isnan(values)
+    out = np.round(np.where(missing, 0, values) * 10 ** decimals).astype(np.int16)
+    out[missing] = MISSING_INT16
+    return out
+
+
+def load(path: str) -> SubDailySeries:
+    with np.load(path) as z:
+        decimals = int(z['decimals'])
+        return SubDailySeries(np.datetime64(int(z['start']), 'm'), int(z['step']), z['gaps'], z['values'],
+                              None if decimals < 0 else decimals, str(z['name']))
+
+
+def read_subdaily_csv(path: str, time_col: str, value_col: str, station_col: Optional[str] = None,
+                      step: Optional[int] = None, decimals: Optional[int] = 1) -> Dict[str, SubDailySeries]:
+    """Encode one value column of an hourly / 10-minute CSV, one series per station.
+
+    Timestamps may be 'YYYY-MM-DD HH:MM' or 'YYYYMMDDHHMM'. Rows are grouped by
+    `station_col` in one vectorized pass (no station column: one series named value_col).
+    """
+    times, values, stations = [], [], []
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader, [])]
+        ti, vi = header.index(time_col), header.index(value_col)
+        si = header.index(station_col) if station_col else None
+        width = max(ti, vi, si or 0)
+        for row in reader:
+            if len(row) > width:
+                times.append(row[ti].strip())
+                values.append(row[vi].strip())
+                stations.append(row[si].strip() if si is not None else value_col)
+    if not times:
+        return {}
+    stamps, ok = parse_dates(times, detect_format(times[0]))
+    vals = parse_values(values)[ok]
+    names, station_idx = np.unique(np.array(stations)[ok], return_inverse=True)
+    stamps = stamps[ok]
+    # group rows by station with one stable sort instead of a dict of lists
+    order = np.argsort(station_idx, kind='stable')
+    bounds = np.searchsorted(station_idx[order], np.arange(len(names) + 1))
+    out = {}
+    for k, name in enumerate(names.tolist()):
+        rows = order[bounds[k]:bounds[k + 1]]
+        out[name] = SubDailySeries.from_arrays(stamps[rows], vals[rows], step, decimals, name)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Daily/monthly aggregates of an hourly or 10-minute CSV.')
+    parser.add_argument('path')
+    parser.add_argument('time_col')
+    parser.add_argument('value_col')
+    parser.add_argument('--station-col', help='column with the station name (one series per station)')
+    parser.add_argument('--freq', default='D', choices=FREQS)
+    parser.add_argument('--how', default='mean', choices=HOWS)
+    parser.add_argument('-o', '--out', help='output CSV (default: <path stem>_<freq>_<how>.csv)')
+    args = parser.parse_args()
+
+    series = read_subdaily_csv(args.path, args.time_col, args.value_col, args.station_col)
+    out = args.out or f'{args.path.rsplit(".", 1)[0]}_{args.freq}_{args.how}.csv'
+    with open(out, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['station', 'period', args.how])
+        for name, s in series.items():
+            periods, result = s.aggregate(args.freq, args.how)
+            w.writerows((name, p, '' if v != v else round(v, 3)) for p, v in zip(periods.astype(str).tolist(), result.tolist()))
+            print(f'{name}: {s!r}, {s.nbytes} bytes')
+    print(f'Wrote {out}')
+
+
+if __name__ == '__main__':
+    main()
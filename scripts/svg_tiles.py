@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""Summary SVG tiles (mean wind + total rainfall bars) for many stations and periods at once.
+
+The tile is the `7.svg` layout. Its text is compiled once into a %-format string
+(`compile_template`). The per-tile numbers (bar heights, positions, labels) are computed
+for all tiles at once with numpy from precomputed aggregates, and the tiles are streamed
+to disk one by one. The raw daily CSVs are parsed once per batch, not once per tile.
+
+Aggregates come from `summaries`. It takes the monthly sums and valid-day counts of every
+station's daily series, combines them into `freq` periods, and optionally into rolling
+windows of `window` periods. The mean wind of a period is then the sum of the wind
+values divided by the number of valid days, and the rainfall total is the sum of the
+daily values.
+
+Functions:
+- compile_template(text) -> Template (.render(**fields), .render_rows(columns, n))
+- tile_columns(mean_wind, total_rain, titles) -> {field: array of str}
+- render_tile(mean_wind, total_rain, title=...) -> SVG text of one tile (used by make_7_svg)
+- summaries(wind, rain, freq='Y', window=1) -> (stations, labels, mean_wind[s, p], total_rain[s, p])
+- write_tiles(out_dir, names, columns) -> paths;  write_sprite(path, columns, n, cols=10)
+
+Usage (one sprite sheet with a tile per station and year, plus one file per tile):
+  .venv/bin/python scripts/svg_tiles.py [--freq Y] [--window 1] [--sprite summary_tiles.svg] [--out-dir tiles]
+"""
+from __future__ import annotations
+import argparse
+import os
+import re
+import string
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from aggregate import aggregate_series, season_labels
+from hko_blocks import normalize_name
+from instrument import stage, start_run
+from series import DailySeries
+
+TILE_WIDTH = 600
+TILE_HEIGHT = 240
+BAR_HEIGHT = 120
+DEFAULT_TITLE = 'Rainfall & Wind Summary (Kai Tak)'
+
+XML_DECL = '<?xml version="1.0" encoding="UTF-8"?>'
+
+TILE = '\n'.join([
+    '<svg xmlns="http://www.w3.org/2000/svg" width="600" height="240" viewBox="0 0 600 240"{pos}>',
+    '<text x="300.0" y="24" font-size="18" text-anchor="middle" font-family="Arial" font-weight="bold">{title}</text>',
+    '<text x="100" y="60" font-size="14" text-anchor="middle">Mean Wind (km/h)</text>',
+    '<rect x="50" y="{wind_y}" width="100" height="{wind_h}" fill="#1f77b4" stroke="#0b3d66" stroke-width="1"/>',
+    '<text x="100" y="240" font-size="12" text-anchor="middle">{wind_label}</text>',
+    '<text x="400" y="60" font-size="14" text-anchor="middle">Total Rainfall (mm)</text>',
+    '<rect x="350" y="{rain_y}" width="100" height="{rain_h}" fill="#ff7f0e" stroke="#8a3e00" stroke-width="1"/>',
+    '<text x="400" y="240" font-size="12" text-anchor="middle">{rain_label}</text>',
+    '</svg>',
+])
+
+
+class Template:
+    """A text with {field} placeholders, compiled to one %-format string."""
+
+    __slots__ = ('fields', '_fmt')
+
+    def __init__(self, fmt: str, fields: Sequence[str]):
+        self._fmt = fmt
+        self.fields = tuple(fields)
+
+    def render(self, **values) -> str:
+        return self._fmt % tuple(str(values[f]) for f in self.fields)
+
+    def render_rows(self, columns: Dict[str, Sequence[str]], n: int):
+        """Yield the text for rows 0..n-1 of `columns` (one sequence of strings per field)."""
+        fmt = self._fmt
+        for row in zip(*(columns[f] for f in self.fields)):
+            yield fmt % row
+
+
+def compile_template(text: str) -> Template:
+    parts = []
+    fields = []
+    for literal, field, spec, conv in string.Formatter().parse(text):
+        parts.append(literal.replace('%', '%%'))
+        if field is not None:
+            parts.append('%s')
+            fields.append(field)
+    return Template(''.join(parts), fields)
+
+
+_TILE = compile_template(TILE)
+
+
+def _escape(texts) -> np.ndarray:
+    out = np.asarray(texts, dtype=object)
+    return np.array([t.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;') for t in out], dtype=object)
+
+
+def _numbers(values: np.ndarray, has: np.ndarray, missing: str) -> np.ndarray:
+    # str() of a float64 is its shortest repr, the same text an f-string gives
+    return np.where(has, values.astype(str), missing).astype(object)
+
+
+def tile_columns(mean_wind, total_rain, titles) -> Dict[str, np.ndarray]:
+    """Template fields for len(mean_wind) tiles; NaN values are drawn as 'No data'."""
+    wind = np.asarray(mean_wind, dtype=np.float64)
+    rain = np.asarray(total_rain, dtype=np.float64)
+    has_w, has_r = ~np.isnan(wind), ~np.isnan(rain)
+    wind_h = wind / np.maximum(wind * 1.4, 1) * BAR_HEIGHT
+    rain_h = rain / np.maximum(rain * 1.1, 1) * BAR_HEIGHT
+    with np.errstate(invalid='ignore'):
+        rain_int = np.where(has_r, np.trunc(rain), 0).astype(np.int64).astype(str)
+    return {
+        'pos': np.full(len(wind), '', dtype=object),
+        'title': _escape(titles),
+        'wind_y': _numbers(100 + (BAR_HEIGHT - wind_h), has_w, '220'),
+        'wind_h': _numbers(wind_h, has_w, '0'),
+        'wind_label': np.where(has_w, np.char.mod('%.2f km/h', np.where(has_w, wind, 0)), 'No data').astype(object),
+        'rain_y': _numbers(100 + (BAR_HEIGHT - rain_h), has_r, '220'),
+        'rain_h': _numbers(rain_h, has_r, '0'),
+        'rain_label': np.where(has_r, np.char.add(rain_int, ' mm'), 'No data').astype(object),
+    }
+
+
+def render_tile(mean_wind: Optional[float], total_rain: Optional[float], title: str = DEFAULT_TITLE) -> str:
+    """One standalone tile (XML declaration included); None draws 'No data'."""
+    nan = float('nan')
+    columns = tile_columns([nan if mean_wind is None else mean_wind], [nan if total_rain is None else total_rain], [title])
+    return XML_DECL + '\n' + next(_TILE.render_rows(columns, 1))
+
+
+def write_tiles(out_dir: str, names: Sequence[str], columns: Dict[str, np.ndarray]) -> list:
+    """Write one `<name>.svg` per tile into out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, text in zip(names, _TILE.render_rows(columns, len(names))):
+        path = os.path.join(out_dir, f'{name}.svg')
+        with open(path, 'w', encoding='utf8') as f:
+            f.write(XML_DECL)
+            f.write('\n')
+            f.write(text)
+        paths.append(path)
+    return paths
+
+
+def write_sprite(path: str, columns: Dict[str, np.ndarray], n: int, cols: int = 10) -> str:
+    """Write all n tiles into one SVG, `cols` tiles per row, streaming tile by tile."""
+    cols = max(1, min(cols, n))
+    rows = -(-n // cols)
+    i = np.arange(n)
+    columns = dict(columns)
+    columns['pos'] = np.char.add(np.char.add(' x="', ((i % cols) * TILE_WIDTH).astype(str)),
+                                 np.char.add('" y="', np.char.add(((i // cols) * TILE_HEIGHT).astype(str), '"'))).astype(object)
+    width, height = cols * TILE_WIDTH, rows * TILE_HEIGHT
+    with open(path, 'w', encoding='utf8') as f:
+        f.write(f'{XML_DECL}\n<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                f'viewBox="0 0 {width} {height}">\n')
+        for text in _TILE.render_rows(columns, n):
+            f.write(text)
+            f.write('\n')
+        f.write('</svg>\n')
+    return path
+
+
+def station_name(title: str) -> str:
+    """'Mean Wind Speed (km/h) - Kai Tak' -> 'Kai Tak'."""
+    return title.rsplit(' - ', 1)[-1].strip()
+
+
+def _monthly(series: Dict[str, DailySeries], keys, start, end):
+    ordered = [series.get(k, DailySeries.empty(k)) for k in keys]
+    months, sums = aggregate_series(ordered, 'M', 'sum', start, end)
+    _, counts = aggregate_series(ordered, 'M', 'count', start, end)
+    return months, sums, counts
+
+
+def _periods(months: np.ndarray, freq: str) -> np.ndarray:
+    """Period number of every month for 'M', 'S' or 'Y' (relative to the first month)."""
+    m = months.astype(np.int64)
+    if freq == 'M':
+        keys = m
+    elif freq == 'S':
+        keys = (m + 1) // 3
+    elif freq == 'Y':
+        keys = m // 12
+    else:
+        raise ValueError(f'unknown frequency: {freq!r} (expected M, S or Y)')
+    return keys - keys[0]
+
+
+def summaries(wind: Dict[str, DailySeries], rain: Dict[str, DailySeries], freq: str = 'Y', window: int = 1,
+              start=None, end=None):
+    """Mean wind and total rainfall per station and period.
+
+    wind / rain map a station name to its DailySeries. window > 1 gives rolling windows of
+    that many periods (e.g. freq='M', window=12: every 12-month span). Returns
+    (stations, labels, mean_wind, total_rain); the arrays have one row per station and NaN
+    where a station has no data in a period.
+    """
+    by_key = {}
+    for name in list(wind) + list(rain):
+        by_key.setdefault(normalize_name(name), name)
+    keys = sorted(by_key)
+    wind = {normalize_name(k): v for k, v in wind.items()}
+    rain = {normalize_name(k): v for k, v in rain.items()}
+    spans = [(s.dates[0], s.dates[-1]) for s in list(wind.values()) + list(rain.values()) if len(s)]
+    if not spans:
+        return [], [], np.empty((len(keys), 0)), np.empty((len(keys), 0))
+    start = start or min(a for a, _ in spans)
+    end = end or max(b for _, b in spans)
+
+    months, w_sum, w_cnt = _monthly(wind, keys, start, end)
+    _, r_sum, r_cnt = _monthly(rain, keys, start, end)
+    # months -> periods
+    pidx = _periods(months, freq)
+    n_periods = int(pidx[-1]) + 1 if len(pidx) else 0
+    first_month = np.searchsorted(pidx, np.arange(n_periods))
+    stats = [np.add.reduceat(a, first_month, axis=1) if n_periods else a[:, :0] for a in (w_sum, w_cnt, r_sum, r_cnt)]
+    labels = [str(m) for m in months[first_month]]
+    if freq == 'Y':
+        labels = [m[:4] for m in labels]
+    elif freq == 'S':
+        labels = season_labels(months[first_month])
+    if window > 1:
+        # rolling sums over `window` periods with one cumulative sum per statistic
+        rolled = []
+        for a in stats:
+            c = np.concatenate([np.zeros((a.shape[0], 1)), np.cumsum(a, axis=1)], axis=1)
+            rolled.append(c[:, window:] - c[:, :-window])
+        stats = rolled
+        labels = [f'{a}..{b}' for a, b in zip(labels, labels[window - 1:])]
+    w_sum, w_cnt, r_sum, r_cnt = stats
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_wind = np.where(w_cnt > 0, w_sum / w_cnt, np.nan)
+    total_rain = np.where(r_cnt > 0, r_sum, np.nan)
+    return [by_key[k] for k in keys], labels, mean_wind, total_rain
+
+
+def _load(path: str, workers: int) -> Dict[str, DailySeries]:
+    from parallel import parse_blocks_parallel
+    blocks = parse_blocks_parallel(path, workers=workers)
+    return {station_name(t): DailySeries.from_block(b) for t, b in blocks.items()}
+
+
+def main():
+    start_run(__file__)
+    parser = argparse.ArgumentParser(description='Summary SVG tiles for every station and period.')
+    parser.add_argument('--wind', default='daily_SE_WSPD_ALL.csv', help='HKO wind CSV (station blocks)')
+    parser.add_argument('--rain', default='daily_SE_RF_ALL.csv', help='HKO rainfall CSV (station blocks)')
+    parser.add_argument('--freq', default='Y', help='M, S or Y (default Y)')
+    parser.add_argument('--window', type=int, default=1, help='rolling window in periods (default 1)')
+    parser.add_argument('--sprite', default='summary_tiles.svg', help="sprite sheet path ('' to skip)")
+    parser.add_argument('--out-dir', help='also write one SVG per tile into this directory')
+    parser.add_argument('--cols', type=int, default=10, help='tiles per sprite row')
+    args = parser.parse_args()
+
+    workers = int(os.getenv('WORKERS', '1'))
+    with stage('parse', hot=True) as st:
+        wind, rain = _load(args.wind, workers), _load(args.rain, workers)
+        st.add(rows=sum(len(s) for s in wind.values()) + sum(len(s) for s in rain.values()))
+    with stage('aggregate') as st:
+        stations, labels, mean_wind, total_rain = summaries(wind, rain, args.freq, args.window)
+        st.add(rows=mean_wind.size)
+    # one tile per (station, period) with data
+    s_idx, p_idx = np.nonzero(~np.isnan(mean_wind) | ~np.isnan(total_rain))
+    titles = [f'Rainfall & Wind Summary ({stations[s]} {labels[p]})' for s, p in zip(s_idx.tolist(), p_idx.tolist())]
+    with stage('render', hot=True) as st:
+        columns = tile_columns(mean_wind[s_idx, p_idx], total_rain[s_idx, p_idx], titles)
+        if args.sprite:
+            write_sprite(args.sprite, columns, len(titles), args.cols)
+            print(f'Wrote {args.sprite} with {len(titles)} tiles')
+        if args.out_dir:
+            names = [re.sub(r'[^0-9A-Za-z.]+', '_', f'{normalize_name(stations[s])}_{labels[p]}')
+                     for s, p in zip(s_idx.tolist(), p_idx.tolist())]
+            write_tiles(args.out_dir, names, columns)
+            print(f'Wrote {len(names)} tiles into {args.out_dir}')
+        st.add(rows=len(titles))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import numpy as np
+from aggregate import aggregate, aggregate_series, season_labels
+from series import DailySeries
+
+
+def _series(name, start, values):
+    dates = np.arange(np.datetime64(start), np.datetime64(start) + len(values))
+    return DailySeries(dates, values, name)
+
+
+def test_monthly_reductions_ignore_missing():
+    s = _series('a', '2010-01-30', [1.0, np.nan, 3.0, 5.0])  # Jan 30, Jan 31, Feb 1, Feb 2
+    periods, sums = aggregate(s.dates, s.values, 'M', 'sum')
+    assert [str(p) for p in periods] == ['2010-01', '2010-02']
+    assert sums.tolist() == [1.0, 8.0]
+    assert aggregate(s.dates, s.values, 'M', 'count')[1].tolist() == [1.0, 2.0]
+    assert aggregate(s.dates, s.values, 'M', 'min')[1].tolist() == [1.0, 3.0]
+    assert aggregate(s.dates, s.values, 'M', 'max')[1].tolist() == [1.0, 5.0]
+    _, means = aggregate(s.dates, s.values, 'M', 'mean', '2009-12-01', '2010-02-28')
+    assert np.isnan(means[0]) and means[1:].tolist() == [1.0, 4.0]
+
+
+def test_seasons_put_december_in_next_winter():
+    s = _series('a', '2010-11-30', [1.0, 2.0, 4.0])  # Nov 30, Dec 1, Dec 2
+    periods, sums = aggregate(s.dates, s.values, 'S', 'sum')
+    assert season_labels(periods) == ['2010-SON', '2011-DJF']
+    assert sums.tolist() == [1.0, 6.0]
+
+
+def test_many_stations_in_one_call():
+    a = _series('a', '2010-01-01', [1.0, 2.0])
+    b = _series('b', '2010-12-31', [10.0, 20.0])
+    periods, totals = aggregate_series([a, b], 'Y', 'sum')
+    assert [str(p) for p in periods] == ['2010', '2011']
+    assert totals.tolist() == [[3.0, 0.0], [10.0, 20.0]]
+    _, maxes = aggregate_series([a, b], 'Y', 'max')
+    assert np.isnan(maxes[0, 1]) and maxes[1].tolist() == [10.0, 20.0]
@@ -0,0 +1,38 @@
+import datetime
+import numpy as np
+from dates import COMPACT, COMPACT_MINUTE, DMY, ISO_DATE, ISO_MINUTE, detect_format, parse_dates
+
+
+def test_detect_format():
+    assert detect_format('2010-01-01') == ISO_DATE
+    assert detect_format('2023-01-01 00:00') == ISO_MINUTE
+    assert detect_format('20100101') == COMPACT
+    assert detect_format('201001010010') == COMPACT_MINUTE
+    assert detect_format('01/02/2010') == DMY
+    assert detect_format('badrow') is None
+
+
+def test_parse_dates_matches_strptime_and_flags_bad_rows():
+    strings = ['2010-01-01', '2012-02-29', '2010-02-29', 'badrow', '', '2025-07-31,extra']
+    dates, ok = parse_dates(strings, ISO_DATE)
+    assert ok.tolist() == [True, True, False, False, False, True]
+    assert dates[ok].tolist() == [datetime.date(2010, 1, 1), datetime.date(2012, 2, 29), datetime.date(2025, 7, 31)]
+
+
+def test_parse_dates_minutes_and_unpadded_dmy():
+    stamps, ok = parse_dates(['2023-01-01 01:30', '2023-01-01 24:00'])
+    assert stamps.dtype == np.dtype('datetime64[m]')
+    assert ok.tolist() == [True, False]
+    assert stamps[0].astype(object) == datetime.datetime(2023, 1, 1, 1, 30)
+    dates, ok = parse_dates(['01/02/2010', '1/2/2010', '31/02/2010'], DMY)
+    assert ok.tolist() == [True, True, False]
+    assert dates[:2].tolist() == [datetime.date(2010, 2, 1)] * 2
+
+
+def test_parse_dates_unpadded_iso():
+    assert detect_format('2010-1-1') == ISO_DATE
+    dates, ok = parse_dates(['2010-1-1', '2010-01-02', '2010-2-30'])
+    assert ok.tolist() == [True, True, False]
+    assert dates[:2].tolist() == [datetime.date(2010, 1, 1), datetime.date(2010, 1, 2)]
+    stamps, ok = parse_dates(['2023-1-1 1:30'], ISO_MINUTE)
+    assert ok.tolist() == [True] and stamps[0].astype(object) == datetime.datetime(2023, 1, 1, 1, 30)
@@ -0,0 +1,43 @@
+import os
+import tempfile
+
+import numpy as np
+
+from daycache import cache_path, load_range, open_daycache
+
+
+def _write(path, rows):
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('datetime,rainfall_mm\n' + ''.join(f'{d},{v}\n' for d, v in rows))
+
+
+def test_daycache_maps_and_rebuilds_on_change():
+    with tempfile.TemporaryDirectory() as d:
+        p = os.path.join(d, 'rain.csv')
+        _write(p, [('2010-01-01', '1.5'), ('2010-01-02', ''), ('2010-01-04', '0.1')])
+        cache = open_daycache(p, 'datetime', 'rainfall_mm')
+        assert isinstance(cache.values, np.memmap)
+        assert os.path.exists(cache_path(p, 'rainfall_mm'))
+        s = load_range(p, 'datetime', 'rainfall_mm')
+        # one slot per day, the absent 2010-01-03 is NaN like the empty value
+        assert [str(x) for x in s.dates] == ['2010-01-01', '2010-01-02', '2010-01-03', '2010-01-04']
+        assert s.total() == 1.6
+        assert load_range(p, 'datetime', 'rainfall_mm', '2010-01-04', '2010-12-31').values.tolist() == [0.1]
+
+        # touched but unchanged: header refreshed, same data
+        os.utime(p, (os.path.getmtime(p) + 5,) * 2)
+        assert load_range(p, 'datetime', 'rainfall_mm').total() == 1.6
+
+        _write(p, [('2010-01-01', '2.0'), ('2010-01-02', '3.0')])
+        os.utime(p, (os.path.getmtime(p) + 10,) * 2)
+        assert load_range(p, 'datetime', 'rainfall_mm').values.tolist() == [2.0, 3.0]
+
+
+def test_missing_csv_gives_empty_series():
+    assert len(load_range('no-such-file.csv', 'date', 'mean_wspd')) == 0
+
+
+def test_daycache_keeps_the_csv_values_exactly(tmp_path):
+    p = str(tmp_path / 'wind.csv')
+    _write(p, [('2010-01-01', '12.3456789'), ('2010-01-02', '1e-05'), ('2010-01-03', '123456.7')])
+    assert load_range(p, 'datetime', 'rainfall_mm').values.tolist() == [12.3456789, 1e-05, 123456.7]
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pipeline
+from fetch_all import element_jobs, fetch_all
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    delay = 0.3
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(cls.delay)
+        with cls.lock:
+            cls.active -= 1
+        if self.path == '/missing.csv':
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_fetch_all_runs_concurrently_with_host_limit():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            jobs = [(e, f'{base}/{e}.csv', os.path.join(d, f'{e}.csv')) for e in ('RF', 'WSPD', 'RH', 'missing')]
+            results = fetch_all(jobs, max_workers=4, per_host=3)
+            assert [r[0] for r in results] == ['RF', 'WSPD', 'RH', 'missing']
+            with open(results[0][1], 'rb') as f:
+                assert f.read() == b'/RF.csv'
+            assert isinstance(results[3][1], Exception)
+            # the requests overlap, but never more than per_host at once
+            assert 2 <= _SlowHandler.peak <= 3
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_default_urls_agree_with_the_fetchers(monkeypatch):
+    monkeypatch.delenv('RAINFALL_URL', raising=False)
+    monkeypatch.delenv('WIND_URL', raising=False)
+    jobs = {name: (url, filename) for name, url, filename in element_jobs(['RF', 'WSPD'])}
+    tasks = {t.name: t for t in pipeline.default_tasks()}
+    # one URL per cached file, so fetch_file never sees a different URL in the .meta.json
+    assert tasks['fetch_rain'].params['url'] == jobs['RF'][0]
+    assert tasks['fetch_wind'].params['url'] == jobs['WSPD'][0]
+    assert tasks['fetch_rain'].outputs == [jobs['RF'][1]]
+    monkeypatch.setenv('RAINFALL_URL', 'http://example.invalid/rf.csv')
+    assert element_jobs(['RF'])[0][1] == 'http://example.invalid/rf.csv'
@@ -0,0 +1,37 @@
+import datetime
+import math
+from hko_blocks import parse_station_blocks, find_station
+
+
+SAMPLE = [
+    "﻿平均風速 (公里/小時) - 啟德",
+    "Mean Wind Speed (km/h) - Kai Tak",
+    "年/Year,月/Month,日/Day,數值/Value,數據完整性/data Completeness",
+    "2009,12,31,9.0,C",
+    "2010,1,1,12.3,C",
+    "2010,1,2,***,",
+    "",
+    "Mean Wind Speed (km/h) - Another Station",
+    "Year,Month,Day,Value,Completeness",
+    "2010,1,1,5.0,C",
+    "",
+    "*** 沒有數據/unavailable",
+    "C 數據完整/data Complete",
+]
+
+
+def test_parse_station_blocks_all_stations_one_pass():
+    blocks = parse_station_blocks(iter(SAMPLE), 2010, 2010)
+    assert sorted(blocks) == ['Mean Wind Speed (km/h) - Another Station', 'Mean Wind Speed (km/h) - Kai Tak']
+    kt = blocks['Mean Wind Speed (km/h) - Kai Tak']
+    assert list(kt.dates) == [datetime.date(2010, 1, 1).toordinal(), datetime.date(2010, 1, 2).toordinal()]
+    assert kt.values[0] == 12.3
+    assert math.isnan(kt.values[1])
+    assert len(blocks['Mean Wind Speed (km/h) - Another Station']) == 1
+
+
+def test_find_station_normalizes_name():
+    blocks = parse_station_blocks(SAMPLE)
+    found = find_station(blocks, 'KaiTak')
+    assert [b.title for b in found] == ['Mean Wind Speed (km/h) - Kai Tak']
+    assert len(found[0]) == 3
@@ -0,0 +1,44 @@
+import datetime
+
+from hko_blocks import parse_station_blocks
+from hko_bytes import decode_title, parse_file, parse_station_bytes
+
+# CRLF rows, padded and signed values, a bad date, a 5-digit year, a short row, a stray
+# row before the first title, a repeated title and a missing trailing newline
+TEXT = ('﻿12,3\n2010,1,1,5,C\nTitle - A\n年/Year,月/Month,日/Day\n2010,1,1,1.5,C\r\n2010,2,30,2,C\n'
+        '2010,1,2, 3.0 ,#\n2010,1,3,-0.25\n2010,1,4,***,***\n2010,1,5,1e2,X\n2010,1,6\n2010,1,7,,\n'
+        '20100,1,8,1,C\n\n2011,1,1,9,C\nTitle - B\nYear,Month\n2011,1,1,7.05,C,extra\nYear,Month,Day\n'
+        '2012,1,1,8,C\nTitle - A\nYear,Month\n2013,3,3,3,C')
+
+
+def _same(got, expected):
+    assert list(got) == list(expected)
+    for title, block in expected.items():
+        assert got[title].dates == block.dates
+        assert got[title].values.tobytes() == block.values.tobytes()
+        assert got[title].flags == block.flags
+
+
+def test_matches_text_parser(tmp_path):
+    path = tmp_path / 'daily.csv'
+    path.write_bytes(TEXT.encode('utf8'))
+    for args in [(), (2011, 2012), (None, None, datetime.date(2010, 1, 4).toordinal())]:
+        expected = parse_station_blocks(TEXT.lstrip('﻿').splitlines(), *args)
+        _same(parse_station_bytes(TEXT.encode('utf8'), *args), expected)
+        _same(parse_file(str(path), *args), expected)
+    a = parse_file(str(path))['Title - A']
+    assert len(a) == 8 and a.values[1] == 3.0 and a.values[4] == 100.0
+    assert list(a.flags) == [0, 1, 2, 2, 3, 2, 2, 0]
+
+
+def test_decimal_values_round_like_float():
+    values = [f'{i * 7.31 - 5000:.{i % 4}f}' for i in range(2000)]
+    text = 'T\nYear,Month\n' + '\n'.join(f'2010,1,1,{v},C' for v in values)
+    got = parse_station_bytes(text.encode())['T']
+    assert list(got.values) == [float(v) for v in values]
+
+
+def test_decode_title_repairs_latin1_round_trip():
+    assert decode_title('平均風速 - 啟德'.encode('utf8')) == '平均風速 - 啟德'
+    assert decode_title('平均風速'.encode('utf8').decode('latin-1').encode('utf8')) == '平均風速'
+    assert decode_title('Café'.encode('utf8')) == 'Café'
@@ -0,0 +1,86 @@
+import datetime
+import os
+import tempfile
+
+import incremental
+from hko_blocks import parse_station_blocks
+
+HEAD = ["Total Rainfall (mm) - Kai Tak", "Year,Month,Day,Value,Completeness"]
+
+
+def _fmt(o, v):
+    return datetime.date.fromordinal(o).isoformat(), '' if v != v else f'{v:.1f}'
+
+
+def _run(path, lines, incremental_mode=True):
+    state = incremental.load_state(path, 'KaiTak', 2010, 2010) if incremental_mode else None
+    (block,) = parse_station_blocks(lines, 2010, 2010, incremental.resume_ordinal(state)).values()
+    return incremental.update_csv(path, ['datetime', 'rainfall_mm'], block, _fmt, state, 'KaiTak', 2010, 2010), len(block)
+
+
+def test_update_csv_appends_and_revises_provisional_rows():
+    # the old "***" day is outside the revision window and counts as final
+    day1 = HEAD + ["2010,1,1,***,", "2010,6,2,1.0,C", "2010,6,3,2.0,#"]
+    day2 = HEAD + ["2010,1,1,***,", "2010,6,2,1.0,C", "2010,6,3,2.5,C", "2010,6,4,0.5,#"]
+    with tempfile.TemporaryDirectory() as d:
+        out = os.path.join(d, 'rain.csv')
+        assert _run(out, day1) == ((3, 0), 3)
+        # nothing new: the provisional row is re-read but the file is left alone
+        mtime = os.stat(out).st_mtime_ns
+        assert _run(out, day1) == ((0, 0), 1)
+        assert os.stat(out).st_mtime_ns == mtime
+        # next day: only the provisional tail and the new day are parsed and written
+        assert _run(out, day2) == ((1, 1), 2)
+        with open(out, 'rb') as f:
+            incremental_bytes = f.read()
+        full = os.path.join(d, 'full.csv')
+        _run(full, day2, incremental_mode=False)
+        with open(full, 'rb') as f:
+            assert f.read() == incremental_bytes
+    assert incremental_bytes.decode().splitlines()[-2:] == ['2010-06-03,2.5', '2010-06-04,0.5']
+
+
+def _raw(path, stations, days):
+    lines = []
+    for name in stations:
+        lines += [f'Total Rainfall (mm) - {name}', 'Year,Month,Day,Value,Completeness']
+        for i in range(days):
+            day = datetime.date(2010, 1, 1) + datetime.timedelta(days=i)
+            lines.append(f'{day.year},{day.month},{day.day},{i % 5}.0,C')
+        lines.append('')
+    path.write_text('\n'.join(lines) + '\n', encoding='utf8')
+
+
+def test_fetchers_leave_the_csv_alone_when_nothing_is_new(tmp_path):
+    from fetch_daily_rainfall_kaitak import process_rainfall
+    from fetch_kaitak_wind import process_wind
+    raw = tmp_path / 'daily.csv'
+    _raw(raw, ['Kai Tak', 'Sha Tin'], 100)
+    for process in (process_rainfall, process_wind):
+        out = str(tmp_path / f'{process.__name__}.csv')
+        process(str(raw), out, 'KaiTak', 2010, 2010, incremental_mode=True)
+        with open(out, 'rb') as f:
+            first = f.read()
+        assert len(first.splitlines()) == 101
+        mtime = os.stat(out).st_mtime_ns
+        process(str(raw), out, 'KaiTak', 2010, 2010, incremental_mode=True)
+        with open(out, 'rb') as f:
+            assert f.read() == first
+        # not rewritten either: the second run appended nothing
+        assert os.stat(out).st_mtime_ns == mtime
+
+
+def test_fetchers_rebuild_from_the_whole_file_when_several_blocks_match(tmp_path):
+    from fetch_daily_rainfall_kaitak import process_rainfall
+    from fetch_kaitak_wind import process_wind
+    raw = tmp_path / 'daily.csv'
+    for process in (process_rainfall, process_wind):
+        out = str(tmp_path / f'{process.__name__}.csv')
+        _raw(raw, ['Kai Tak'], 100)
+        process(str(raw), out, 'KaiTak', 2010, 2010, incremental_mode=True)
+        # a second matching block appears: the resumed parse would only hold the new days
+        _raw(raw, ['Kai Tak', 'Kai Tak Runway'], 101)
+        process(str(raw), out, 'KaiTak', 2010, 2010, incremental_mode=True)
+        with open(out, encoding='utf8') as f:
+            assert len(f.read().splitlines()) == 1 + 2 * 101
+        assert not os.path.exists(incremental.state_path(out))
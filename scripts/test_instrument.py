@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+import instrument
+from instrument import stage, start_run, finish_run
+
+
+@pytest.fixture(autouse=True)
+def _fresh_run(monkeypatch):
+    # every test starts without a current run, and its run (and profiler) does not leak out
+    monkeypatch.setattr(instrument, '_run', None)
+    yield
+    run = instrument._run
+    if run is not None and run.profiler is not None:
+        run.profiler.disable()
+
+
+def test_stage_records_time_counters_and_report(tmp_path, monkeypatch):
+    report_path = tmp_path / 'report.json'
+    monkeypatch.setenv('RUN_REPORT', str(report_path))
+    monkeypatch.chdir(tmp_path)
+    argv = ['script.py', '--profile', 'x']
+    run = start_run('scripts/script.py', argv)
+    assert argv == ['script.py', 'x']
+    assert run.profiler is not None
+
+    with stage('parse', hot=True) as st:
+        sum(range(10000))
+        st.add(rows=10, nbytes=100)
+
+    @stage('parse', hot=True)
+    def parse_more():
+        return 5
+
+    assert parse_more() == 5
+    report = finish_run(run)
+    assert finish_run(run) is None  # only reported once
+
+    saved = json.loads(report_path.read_text())
+    assert saved == report
+    assert saved['script'] == 'script'
+    (parse,) = saved['stages']
+    assert parse['calls'] == 2
+    assert parse['rows'] == 10 and parse['bytes'] == 100
+    assert parse['seconds'] > 0
+    assert parse['peak_rss_mb'] > 0
+    assert (tmp_path / 'script.prof').exists()
+
+
+def test_stage_without_run_uses_default():
+    with stage('x') as st:
+        st.add(rows=3)
+    run = instrument.current_run()
+    assert run.report_path is None
+    assert run.stages['x'].rows == 3
+
+
+def test_report_is_opt_in(tmp_path, monkeypatch, capsys):
+    monkeypatch.delenv('RUN_REPORT', raising=False)
+    monkeypatch.delenv('PROFILE', raising=False)
+    monkeypatch.chdir(tmp_path)
+    run = start_run('scripts/quiet.py', ['quiet.py'])
+    with stage('parse') as st:
+        st.add(rows=1)
+    assert finish_run(run)['stages'][0]['rows'] == 1
+    assert not list(tmp_path.iterdir()) and capsys.readouterr().out == ''
+
+    monkeypatch.setenv('RUN_REPORT', '1')
+    run = start_run('scripts/quiet.py', ['quiet.py'])
+    finish_run(run)
+    assert (tmp_path / 'quiet.run.json').exists()
+
+
+def test_exit_hook_is_registered_once(monkeypatch):
+    registered = []
+    monkeypatch.setattr(instrument.atexit, 'register', registered.append)
+    monkeypatch.setattr(instrument, '_atexit_registered', False)
+    for _ in range(3):
+        finish_run(start_run('scripts/again.py', ['again.py']))
+    assert registered == [finish_run]
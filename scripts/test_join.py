@@ -0,0 +1,53 @@
+import numpy as np
+
+from join import TimeSeries, join, read_timeseries
+from rainfall_utils import load_rainfall_csv
+from series import DailySeries
+
+
+def test_outer_inner_and_asof_joins(tmp_path):
+    rain = DailySeries(np.array(['2010-01-01', '2010-01-02', '2010-01-04'], 'datetime64[D]'), [1.0, np.nan, 3.0], 'rainfall_mm')
+    wind = DailySeries(np.array(['2010-01-02', '2010-01-03', '2010-01-04'], 'datetime64[D]'), [10.0, 11.0, 12.0], 'mean_wspd')
+
+    outer = join([rain, wind])
+    assert outer.index.astype(str).tolist() == ['2010-01-01', '2010-01-02', '2010-01-03', '2010-01-04']
+    assert np.array_equal(outer.column('rainfall_mm'), [1.0, np.nan, np.nan, 3.0], equal_nan=True)
+    assert np.array_equal(outer.column('mean_wspd'), [np.nan, 10.0, 11.0, 12.0], equal_nan=True)
+
+    inner = join([rain, wind], 'inner')
+    assert inner.index.astype(str).tolist() == ['2010-01-02', '2010-01-04']
+    assert inner.column('mean_wspd').tolist() == [10.0, 12.0]
+
+    # hourly humidity (unsorted, one duplicate) as of each day's 09:00
+    hourly = TimeSeries(np.array(['2010-01-02T06:00', '2010-01-01T08:00', '2010-01-02T06:00', '2010-01-03T10:00'],
+                                 'datetime64[m]'), [70.0, 60.0, 75.0, 80.0], 'humidity_pct')
+    days = np.arange('2010-01-01', '2010-01-05', dtype='datetime64[D]') + np.timedelta64(9, 'h')
+    asof = join([hourly, wind], 'asof', index=days, tolerance=np.timedelta64(1, 'D'))
+    # 2010-01-03 09:00: the last reading is 27 hours old, beyond the tolerance
+    assert np.array_equal(asof.column('humidity_pct'), [60.0, 75.0, np.nan, 80.0], equal_nan=True)
+    assert np.array_equal(asof.column('mean_wspd'), [np.nan, 10.0, 11.0, 12.0], equal_nan=True)
+
+    # sparse (hourly + daily) outer join goes through searchsorted
+    mixed = join([hourly, rain])
+    assert len(mixed) == 6 and mixed.index.dtype == np.dtype('datetime64[m]')
+
+    path = str(tmp_path / 'wide.csv')
+    join([rain, TimeSeries(rain.dates, [50.0, 60.0, 70.0], 'humidity_pct')]).to_csv(path)
+    rows = load_rainfall_csv(path)
+    assert [r[1:] for r in rows] == [(1.0, 50.0), (None, 60.0), (3.0, 70.0)]
+    back = read_timeseries(path, 'datetime', 'humidity_pct')
+    assert back.values.tolist() == [50.0, 60.0, 70.0]
+
+
+def test_inner_join_without_common_timestamps_is_empty():
+    # hourly readings off midnight never meet the daily index (sparse path)
+    hourly = TimeSeries(np.array(['2010-01-01T06:00', '2010-01-02T06:00'], 'datetime64[m]'), [70.0, 75.0], 'humidity_pct')
+    daily = DailySeries(np.array(['2010-01-01', '2010-01-02'], 'datetime64[D]'), [1.0, 2.0], 'rainfall_mm')
+    # two disjoint daily series spanning more than 4x their row count (sparse path)
+    early = DailySeries(np.array(['2010-01-01', '2010-01-02'], 'datetime64[D]'), [1.0, 2.0], 'a')
+    late = DailySeries(np.array(['2010-03-01', '2010-03-02'], 'datetime64[D]'), [3.0, 4.0], 'b')
+    # and disjoint but close together (dense path)
+    next_day = DailySeries(np.array(['2010-01-03'], 'datetime64[D]'), [5.0], 'c')
+    for inputs in ([hourly, daily], [early, late], [early, next_day]):
+        table = join(inputs, 'inner')
+        assert len(table.index) == 0 and table.values.shape == (2, 0)
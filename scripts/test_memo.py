@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pytest
+
+import memo
+from rainfall_utils import load_rainfall_csv, load_rainfall_series
+
+
+def _write(path, rows, mtime):
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('datetime,rainfall_mm\n' + ''.join(f'{d},{v}\n' for d, v in rows))
+    os.utime(path, (mtime, mtime))
+
+
+def test_loader_is_cached_until_the_file_changes(tmp_path):
+    memo.cache_clear()
+    p = str(tmp_path / 'rain.csv')
+    _write(p, [('2010-01-01', '1.5'), ('2010-01-02', '2.0')], 1_000_000)
+    first = load_rainfall_series(p)
+    second = load_rainfall_series(p)
+    info = memo.cache_info()
+    assert (info.hits, info.misses, info.entries) == (1, 1, 1)
+    assert second is not first and np.shares_memory(second.values, first.values)
+    with pytest.raises(ValueError):
+        second.values[0] = 99.0
+    assert load_rainfall_series(p).total() == 3.5
+
+    _write(p, [('2010-01-01', '4.0')], 2_000_000)
+    assert load_rainfall_series(p).total() == 4.0
+    # the stale entry was replaced, not kept next to the new one
+    assert memo.cache_info().entries == 1
+
+
+def test_list_results_stay_lists(tmp_path):
+    memo.cache_clear()
+    p = str(tmp_path / 'rain.csv')
+    with open(p, 'w', encoding='utf8') as f:
+        f.write('datetime,rainfall_mm,humidity_pct\n2010-01-01 00:00,1.5,80\n2010-01-02 00:00,2.0,70\n')
+    first = load_rainfall_csv(p)
+    first.append(first[0])
+    second = load_rainfall_csv(p)
+    assert memo.cache_info().hits == 1
+    assert isinstance(second, list) and len(second) == 2 and second[0] is first[0]
+
+
+class _Plain:
+    """A result type without __slots__."""
+
+    def __init__(self, values):
+        self.values = values
+
+
+def test_dict_backed_results_are_frozen(tmp_path):
+    memo.cache_clear()
+    p = str(tmp_path / 'values.bin')
+    with open(p, 'wb') as f:
+        f.write(b'x')
+    load = memo.memoize(lambda path: _Plain(np.arange(3.0)))
+    first = load(p)
+    second = load(p)
+    assert second is not first and np.shares_memory(second.values, first.values)
+    with pytest.raises(ValueError):
+        first.values[0] = 99.0
+    second.values = np.zeros(3)
+    assert load(p).values.tolist() == [0.0, 1.0, 2.0]
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = memo.LoaderCache(budget=2500)
+    for i in range(3):
+        cache.put(('f', i), (('f', i), 0, 0), np.zeros(100))
+    assert cache.get((('f', 0), 0, 0)) is not None
+    cache.put(('f', 3), (('f', 3), 0, 0), np.zeros(100))
+    info = cache.info()
+    assert info.evictions == 1 and info.entries == 3 and info.nbytes == 2400
+    assert cache.get((('f', 0), 0, 0)) is not None
+    assert cache.get((('f', 1), 0, 0)) is None
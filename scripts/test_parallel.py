@@ -0,0 +1,45 @@
+import datetime
+
+import numpy as np
+
+from hko_blocks import parse_station_blocks
+from parallel import aggregate_stations, parse_blocks_parallel, scan_blocks
+
+
+def _write(path, stations=5, days=400):
+    lines = []
+    for s in range(stations):
+        lines += [f'總雨量 - 站{s}', f'Total Rainfall (mm) - Station {s}', '年/Year,月/Month,日/Day,數值/Value,數據完整性/data Completeness']
+        for i in range(days):
+            day = datetime.date(2010, 1, 1) + datetime.timedelta(days=i)
+            lines.append(f'{day.year},{day.month},{day.day},{"***" if i % 50 == 0 else s + i % 7},{"" if i % 50 == 0 else "C"}')
+        lines.append('')
+    lines += ['*** 沒有數據/unavailable', 'C 數據完整/data Complete']
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8-sig')
+
+
+def test_parallel_parse_matches_single_pass(tmp_path):
+    path = tmp_path / 'daily.csv'
+    _write(path)
+    assert len(scan_blocks(str(path))) == 5
+    with open(path, encoding='utf-8-sig') as f:
+        expected = parse_station_blocks(f, 2010, 2010)
+    got = parse_blocks_parallel(str(path), 2010, 2010, workers=3)
+    assert list(got) == list(expected)
+    for title, block in expected.items():
+        assert got[title].dates == block.dates
+        assert got[title].flags == block.flags
+        assert got[title].values.tobytes() == block.values.tobytes()
+
+    only = parse_blocks_parallel(str(path), station='station 3', workers=3)
+    assert list(only) == ['Total Rainfall (mm) - Station 3']
+    assert len(only['Total Rainfall (mm) - Station 3']) == 400
+
+
+def test_aggregate_stations(tmp_path):
+    path = tmp_path / 'daily.csv'
+    _write(path, stations=2, days=31)
+    titles, periods, result = aggregate_stations(parse_blocks_parallel(str(path), workers=2), 'M', 'count')
+    assert len(titles) == 2
+    assert periods.tolist() == [np.datetime64('2010-01')]
+    assert result.tolist() == [[30], [30]]
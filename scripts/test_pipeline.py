@@ -0,0 +1,73 @@
+import pytest
+
+from pipeline import Task, default_tasks, dependencies, run
+
+
+def _copy(src, dst, calls, name):
+    def func():
+        calls.append(name)
+        with open(src) as f, open(dst, 'w') as g:
+            g.write(f.read().upper())
+    return func
+
+
+def _tasks(tmp_path, calls):
+    raw, mid, out_a, out_b = (str(tmp_path / n) for n in ('raw.txt', 'mid.txt', 'a.txt', 'b.txt'))
+    return [
+        Task('b', _copy(mid, out_b, calls, 'b'), inputs=[mid], outputs=[out_b]),
+        Task('mid', _copy(raw, mid, calls, 'mid'), inputs=[raw], outputs=[mid], params={'n': 1}),
+        Task('a', _copy(mid, out_a, calls, 'a'), inputs=[mid], outputs=[out_a], plots=True),
+    ]
+
+
+def test_pipeline_rebuilds_only_stale_outputs(tmp_path):
+    (tmp_path / 'raw.txt').write_text('x')
+    state = str(tmp_path / 'state.json')
+    calls = []
+
+    results = run(_tasks(tmp_path, calls), state_path=state)
+    assert calls[0] == 'mid' and sorted(calls[1:]) == ['a', 'b']
+    assert all(status == 'ran' for status, _ in results.values())
+
+    calls.clear()
+    results = run(_tasks(tmp_path, calls), state_path=state)
+    assert calls == []
+    assert {name: status for name, (status, _) in results.items()} == {'mid': 'skipped', 'a': 'skipped', 'b': 'skipped'}
+
+    # an edited output is rebuilt alone; a changed input rebuilds everything downstream
+    (tmp_path / 'a.txt').write_text('edited')
+    run(_tasks(tmp_path, calls), state_path=state)
+    assert calls == ['a']
+    calls.clear()
+    (tmp_path / 'raw.txt').write_text('y')
+    run(_tasks(tmp_path, calls), state_path=state, targets=['b'])
+    assert calls == ['mid', 'b']
+    assert (tmp_path / 'b.txt').read_text() == 'Y'
+
+
+def test_pipeline_failure_blocks_downstream(tmp_path):
+    state = str(tmp_path / 'state.json')
+    calls = []
+    results = run(_tasks(tmp_path, calls), state_path=state)  # raw.txt is missing
+    assert results['mid'][0] == 'failed'
+    assert results['a'][0] == results['b'][0] == 'blocked'
+
+
+def test_dependency_cycle_is_an_error(tmp_path):
+    a, b = str(tmp_path / 'a.txt'), str(tmp_path / 'b.txt')
+    tasks = [Task('x', lambda: None, inputs=[a], outputs=[b]), Task('y', lambda: None, inputs=[b], outputs=[a]),
+             Task('z', lambda: None, inputs=[b], outputs=[str(tmp_path / 'c.txt')])]
+    with pytest.raises(ValueError, match='x, y, z'):
+        run(tasks, state_path=str(tmp_path / 'state.json'))
+
+
+def test_monthly_chart_depends_on_the_raw_files_with_min_complete(monkeypatch):
+    monkeypatch.delenv('MIN_COMPLETE', raising=False)
+    (chart,) = [t for t in default_tasks() if t.name == 'monthly_chart']
+    assert 'daily_SE_RF_ALL.csv' not in chart.inputs and chart.params == {}
+    monkeypatch.setenv('MIN_COMPLETE', '0.9')
+    (chart,) = [t for t in default_tasks() if t.name == 'monthly_chart']
+    assert {'daily_SE_WSPD_ALL.csv', 'daily_SE_RF_ALL.csv'} <= set(chart.inputs)
+    assert chart.params['min_complete'] == '0.9'
+    deps = dependencies(default_tasks())
+    assert {'fetch_wind', 'fetch_rain', 'wind_csv', 'rain_csv'} <= set(deps['monthly_chart'])
@@ -0,0 +1,53 @@
+import numpy as np
+
+from hko_blocks import FLAG_COMPLETE, FLAG_INCOMPLETE
+from qc import CATEGORIES, load, mask_incomplete, open_qc, qc_path, qc_report
+from series import DailySeries
+
+
+def test_qc_report_counts_every_station_in_one_pass():
+    jan = np.arange('2010-01-01', '2010-02-01', dtype='datetime64[D]')
+    a = DailySeries(jan, np.ones(31), 'Station A', np.full(31, FLAG_COMPLETE))
+    flags = np.full(20, FLAG_INCOMPLETE)
+    b_values = np.ones(20)
+    b_values[:5] = np.nan
+    b = DailySeries(jan[5:25], b_values, 'Station B', flags)
+    c = DailySeries(jan[:3] + 31, [1.0, 2.0, 3.0], 'Station C')  # no flags: values count as complete
+
+    report = qc_report([a, b, c], 'M')
+    assert report.periods.astype(str).tolist() == ['2010-01', '2010-02']
+    assert report.days.tolist() == [31, 28]
+    counts = dict(zip(CATEGORIES, report.counts[1, :, 0].tolist()))
+    assert counts == {'C': 0, '#': 15, '***': 5, '?': 0, 'no row': 11}
+    assert np.allclose(report.ratio, [[1.0, 0.0], [0.0, 0.0], [0.0, 3 / 28]])
+    assert report.mask(0.5).tolist() == [[True, False], [False, False], [False, False]]
+
+    # the year only spans the months of the report
+    yearly = report.yearly()
+    assert yearly.days.tolist() == [59] and yearly.counts[0, 0].tolist() == [31]
+
+
+def test_open_qc_saves_the_report_and_masks_aggregates(tmp_path):
+    path = tmp_path / 'daily.csv'
+    rows = [f'2010,1,{d},1.0,{"C" if d <= 28 else "#"}' for d in range(1, 32)]
+    rows += [f'2010,2,{d},2.0,C' for d in range(1, 10)]
+    path.write_text('Total Rainfall (mm) - Kai Tak\nYear,Month,Day,Value,Completeness\n' + '\n'.join(rows) + '\n')
+    report = open_qc(str(path))
+    assert load(qc_path(str(path))).counts.tolist() == report.counts.tolist()
+    assert np.allclose(report.ratio[0], [28 / 31, 9 / 28])
+
+    months = np.array(['2009-12', '2010-01', '2010-02'], 'datetime64[M]')
+    masked = mask_incomplete(months, np.array([5.0, 31.0, 18.0]), report, 'kaitak', 0.9)
+    assert np.array_equal(masked, [np.nan, 31.0, np.nan], equal_nan=True)
+
+
+def test_unknown_station_leaves_the_months_unmasked(tmp_path, monkeypatch, capsys):
+    import make_monthly_wind_rain
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / make_monthly_wind_rain.RAIN_RAW).write_text(
+        'Total Rainfall (mm) - Kai Tak\nYear,Month,Day,Value,Completeness\n2010,1,1,1.0,#\n')
+    monkeypatch.setenv('RAINFALL_STATION_NAME', 'Sha Tin')
+    months = np.array(['2010-01'], 'datetime64[M]')
+    wind, rain = make_monthly_wind_rain.mask_incomplete_months(months, np.array([10.0]), np.array([1.0]), 0.9)
+    assert wind.tolist() == [10.0] and rain.tolist() == [1.0]
+    assert 'Sha Tin not found in daily_SE_RF_ALL.csv' in capsys.readouterr().out
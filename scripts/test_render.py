@@ -0,0 +1,45 @@
+import numpy as np
+
+import render
+
+
+def test_downsampling_keeps_shape_and_extremes():
+    x = np.arange('2000-01-01', '2010-01-01', dtype='datetime64[D]')
+    y = np.sin(np.arange(len(x)) / 50.0)
+    y[1234] = 5.0
+    y[2345] = -5.0
+    y[10] = np.nan
+
+    keep = render.lttb(x, y, 500)
+    assert len(keep) == 500
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert (np.diff(keep) > 0).all()
+    assert 1234 in keep and 2345 in keep
+
+    keep = render.minmax(x, y, 500)
+    assert len(keep) <= 500
+    assert 1234 in keep and 2345 in keep
+
+    dx, dy = render.downsample(x, y, 400)
+    assert len(dx) == len(dy) == 400
+    assert not np.isnan(dy).any()
+    assert dx.dtype == x.dtype
+
+
+def test_charts_reuse_one_figure(tmp_path):
+    months = np.arange('2010-01', '2012-01', dtype='datetime64[M]')
+    fig = render.figure((6, 3))
+    assert render.figure((6, 3)) is fig
+    assert not fig.axes
+
+    png, svg = str(tmp_path / 'c.png'), str(tmp_path / 'c.svg')
+    render.bar_line_chart([png, svg], months, np.arange(24.0), np.ones(24), 't', 'bars', 'line', figsize=(6, 3))
+    # drawn on the reused figure; bars are 20 days wide, not 20 months
+    assert len(fig.axes) == 2
+    assert abs(fig.axes[0].patches[0].get_width() - 20) < 1e-6
+    paths = render.render_many([('line', dict(paths=str(tmp_path / 'l.png'), x=np.arange(5000),
+                                                  y=np.random.default_rng(0).random(5000), title='t',
+                                                  xlabel='x', ylabel='y', figsize=(6, 3)))], workers=1)
+    assert paths == [[str(tmp_path / 'l.png')]]
+    for name in ('c.png', 'c.svg', 'l.png'):
+        assert (tmp_path / name).stat().st_size > 0
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+
+from rollup import Rollup, open_rollup, query, rollup_path
+from series import DailySeries
+
+
+def test_range_queries_match_the_daily_values():
+    rng = np.random.default_rng(0)
+    dates = np.arange('2010-01-01', '2012-01-01', dtype='datetime64[D]')
+    values = np.round(rng.random(len(dates)) * 50, 1)
+    values[rng.random(len(dates)) < 0.1] = np.nan
+    r = Rollup.from_series(DailySeries(dates, values))
+    for a, b in rng.integers(0, len(dates), (200, 2)):
+        a, b = min(a, b), max(a, b)
+        window = values[a:b + 1]
+        assert r.count(dates[a], dates[b]) == (~np.isnan(window)).sum()
+        if r.count(dates[a], dates[b]):
+            assert round(r.sum(dates[a], dates[b]), 6) == round(np.nansum(window), 6)
+            assert abs(r.mean(dates[a], dates[b]) - np.nanmean(window)) < 1e-9
+            assert r.min(dates[a], dates[b]) == np.nanmin(window)
+            assert r.max(dates[a], dates[b]) == np.nanmax(window)
+
+    # many ranges at once; ranges outside the data are empty
+    starts = np.array(['2010-01-01', '2011-01-01', '2020-01-01'], dtype='datetime64[D]')
+    sums = r.sum(starts, starts + 364)
+    assert sums[0] == round(np.nansum(values[:365]), 1) and np.isnan(sums[2])
+    assert np.isnan(r.max('2020-01-01')) and r.count('2020-01-01') == 0
+
+
+def test_rollup_file_is_rebuilt_when_the_csv_changes(tmp_path):
+    p = str(tmp_path / 'rain.csv')
+    with open(p, 'w') as f:
+        f.write('datetime,rainfall_mm\n2010-01-01,1.5\n2010-01-02,\n2010-01-03,0.1\n')
+    assert query(p, 'datetime', 'rainfall_mm', 'sum') == 1.6
+    assert os.path.exists(rollup_path(p, 'rainfall_mm'))
+    with open(p, 'a') as f:
+        f.write('2010-01-04,7.0\n')
+    os.utime(p, (os.path.getmtime(p) + 10,) * 2)
+    r = open_rollup(p, 'datetime', 'rainfall_mm')
+    assert r.max() == 7.0 and r.sum('2010-01-02', '2010-01-04') == 7.1
+    assert np.isnan(query(str(tmp_path / 'missing.csv'), 'datetime', 'rainfall_mm', 'mean'))
+
+
+def test_values_with_more_decimals_are_not_rounded():
+    dates = np.arange('2010-01-01', '2010-01-04', dtype='datetime64[D]')
+    values = np.array([1.23456, 2.5, 0.0001])
+    r = Rollup.from_series(DailySeries(dates, values))
+    assert r.sums.dtype == np.float64 and r.scale == 1
+    assert abs(r.sum() - values.sum()) < 1e-12 and abs(r.mean() - values.mean()) < 1e-12
+    assert r.sum(dates[2], dates[2]) != 0.0
+    # one-decimal data keeps the exact integer sums
+    assert Rollup.from_series(DailySeries(dates, [1.1, 2.2, 3.3])).sums.dtype == np.int64
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scraping_utils import fetch_file, get_url, iter_lines, meta_path
+
+
+class _Handler(BaseHTTPRequestHandler):
+    body = b'1998,10,1,10.1,C\n'
+    etag = '"v1"'
+    requests_seen = []
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests_seen.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == cls.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', cls.etag)
+        self.send_header('Content-Length', str(len(cls.body)))
+        self.end_headers()
+        self.wfile.write(cls.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_get_url_conditional_cache():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/daily.csv'
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            fn = os.path.join(d, 'daily.csv')
+            assert get_url(url, fn, ttl=3600) == '1998,10,1,10.1,C\n'
+            assert os.path.exists(meta_path(fn))
+            # within the ttl: served from disk, no request
+            assert get_url(url, fn, ttl=3600) == '1998,10,1,10.1,C\n'
+            assert _Handler.requests_seen == [None]
+            # expired: conditional GET answered with 304
+            assert get_url(url, fn, ttl=0) == '1998,10,1,10.1,C\n'
+            assert _Handler.requests_seen == [None, '"v1"']
+            # changed upstream: full download replaces the file
+            _Handler.body, _Handler.etag = b'1998,10,2,15.9,C\n', '"v2"'
+            assert get_url(url, fn, ttl=0) == '1998,10,2,15.9,C\n'
+            with open(fn, encoding='UTF8') as f:
+                assert f.read() == '1998,10,2,15.9,C\n'
+            assert sorted(os.listdir(d)) == ['daily.csv', 'daily.csv.meta.json']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetch_file_streams_raw_bytes():
+    body = '﻿平均風速 - 啟德\nMean Wind Speed (km/h) - Kai Tak\n'.encode('utf8') + b'2010,1,1,12.3,C\n' * 5000
+
+    class Handler(_Handler):
+        requests_seen = []
+
+    Handler.body, Handler.etag = body, '"big"'
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/big.csv'
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            fn = fetch_file(url, os.path.join(d, 'big.csv'), chunk_size=1024)
+            with open(fn, 'rb') as f:
+                assert f.read() == body
+            lines = iter_lines(fn)
+            assert next(lines) == '平均風速 - 啟德\n'
+            assert sum(1 for _ in lines) == 5001
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import numpy as np
+from series import DailySeries, read_series_csv
+
+
+def test_read_series_csv_and_slice():
+    csv_text = """date,station,mean_wspd
+2010-12-31,Kai Tak,9.0
+2011-01-01,Kai Tak,12.0
+2011-01-02,Kai Tak,
+2011-02-01,Kai Tak,6.0
+bad,Kai Tak,1.0
+"""
+    with tempfile.TemporaryDirectory() as d:
+        p = os.path.join(d, 'wind.csv')
+        with open(p, 'w', encoding='utf8') as f:
+            f.write(csv_text)
+        s = read_series_csv(p, 'date', 'mean_wspd')
+    assert len(s) == 4
+    assert s.dates.dtype == np.dtype('datetime64[D]')
+    assert s.missing.tolist() == [False, False, True, False]
+    y2011 = s.slice_years(2011, 2011)
+    assert len(y2011) == 3
+    assert y2011.mean() == 9.0
+    months, means = y2011.resample('M', 'mean')
+    assert [str(m) for m in months] == ['2011-01', '2011-02']
+    assert means.tolist() == [12.0, 6.0]
+
+
+def test_missing_file_is_empty():
+    s = read_series_csv('does-not-exist.csv', 'date', 'mean_wspd')
+    assert len(s) == 0
+    assert s.mean() is None
+    assert s.total() == 0.0
+
+
+def test_flags_follow_the_values_and_mask_incomplete_months():
+    from hko_blocks import FLAG_COMPLETE, FLAG_INCOMPLETE, FLAG_MISSING
+    dates = np.arange('2010-02-01', '2010-04-01', dtype='datetime64[D]')[::-1]
+    flags = np.full(len(dates), FLAG_COMPLETE, dtype=np.uint8)
+    flags[:10] = FLAG_INCOMPLETE  # the last ten days of March
+    values = np.ones(len(dates))
+    values[-1] = np.nan
+    flags[-1] = FLAG_MISSING
+    s = DailySeries(dates, values, 'rain', flags).sorted()
+    assert s.flags[0] == FLAG_MISSING and s.flag_labels()[-1] == '#'
+    assert s.slice_dates('2010-03-01').flags.tolist() == [FLAG_COMPLETE] * 21 + [FLAG_INCOMPLETE] * 10
+    months, ratio = s.completeness('M')
+    assert np.allclose(ratio, [27 / 28, 21 / 31])
+    _, totals = s.resample('M', 'sum', min_complete=0.9)
+    assert np.array_equal(totals, [27.0, np.nan], equal_nan=True)
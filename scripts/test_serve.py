@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from serve import Store, make_server, respond
+
+
+def _write(path, header, rows, mtime):
+    with open(path, 'w', encoding='utf8') as f:
+        f.write(header + '\n' + ''.join(f'{d},{v}\n' for d, v in rows))
+    os.utime(path, (mtime, mtime))
+
+
+def test_server_answers_from_memory_and_swaps_in_new_data(tmp_path):
+    wind, rain = str(tmp_path / 'wind.csv'), str(tmp_path / 'rain.csv')
+    _write(wind, 'date,mean_wspd', [('2010-01-01', '10.0'), ('2010-01-02', '12.0'), ('2010-02-01', '')], 1_000_000)
+    _write(rain, 'datetime,rainfall_mm', [('2010-01-01', '1.5'), ('2010-02-01', '2.5')], 1_000_000)
+    store = Store({'wind': (wind, 'date', 'mean_wspd'), 'rain': (rain, 'datetime', 'rainfall_mm')})
+    server = make_server(store, port=0, refresh=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+
+    def get(path, **headers):
+        with urllib.request.urlopen(urllib.request.Request(base + path, headers=headers)) as r:
+            return r.status, r.headers, r.read()
+
+    try:
+        series = json.loads(get('/series?name=wind&start=2010-01-02&end=2010-01-03')[2])
+        assert series == {'name': 'wind', 'dates': ['2010-01-02', '2010-01-03'], 'values': [12.0, None]}
+        _, headers, body = get('/aggregate?name=wind&freq=M&how=mean')
+        assert json.loads(body)['values'] == [11.0, None]
+        etag = headers['ETag']
+        assert json.loads(get('/stats?name=rain&how=sum')[2])['value'] == 4.0
+        _, headers, svg = get('/summary.svg')
+        assert headers['Content-Type'] == 'image/svg+xml' and b'>11.00 km/h<' in svg and b'>4 mm<' in svg
+        with pytest.raises(urllib.error.HTTPError) as e:
+            get('/aggregate?name=wind&freq=M&how=mean', **{'If-None-Match': etag})
+        assert e.value.code == 304
+        with pytest.raises(urllib.error.HTTPError) as e:
+            get('/stats?name=snow')
+        assert e.value.code == 400
+
+        # a fetcher rewrites the CSV: old answers until the refresh, then the new data
+        _write(rain, 'datetime,rainfall_mm', [('2010-01-01', '5.0')], 2_000_000)
+        assert json.loads(get('/stats?name=rain&how=sum')[2])['value'] == 4.0
+        assert store.refresh() == ['rain']
+        assert json.loads(get('/stats?name=rain&how=sum')[2])['value'] == 5.0
+        assert json.loads(get('/health')[2])['cache']['hits'] >= 1
+    finally:
+        server.shutdown()
+        server.stop_refresh.set()
+        server.server_close()
+
+
+def test_etag_survives_a_restart(tmp_path):
+    wind = str(tmp_path / 'wind.csv')
+    _write(wind, 'date,mean_wspd', [('2010-01-01', '10.0')], 1_000_000)
+    # derived from the body only, not from the process (hash seed) or the reload count
+    _, _, body, etag = respond(Store({'wind': (wind, 'date', 'mean_wspd')}), '/series?name=wind')
+    assert etag == f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
@@ -0,0 +1,52 @@
+import datetime
+import os
+
+from hko_blocks import find_station, parse_station_blocks
+from station_index import index_path, list_stations, open_index, read_station
+
+
+def _write(path, stations, days):
+    lines = []
+    for s in range(stations):
+        lines += [f'總雨量 - 站{s}', f'Total Rainfall (mm) - Station {s}', '年/Year,月/Month,日/Day,數值/Value,數據完整性/data Completeness']
+        for i in range(days):
+            day = datetime.date(2010, 1, 1) + datetime.timedelta(days=i)
+            lines.append(f'{day.year},{day.month},{day.day},{s + i % 7},C')
+        lines.append('')
+    lines += ['*** 沒有數據/unavailable', 'C 數據完整/data Complete']
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8-sig')
+
+
+def test_read_station_matches_full_parse(tmp_path):
+    path = tmp_path / 'daily.csv'
+    _write(path, stations=4, days=800)
+    index = open_index(str(path))
+    assert os.path.exists(index_path(str(path)))
+    assert [b['rows'] for b in index.blocks] == [800] * 4
+    assert index.blocks[2]['first'] == '2010-01-01' and index.blocks[2]['last'] == '2012-03-10'
+
+    with open(path, encoding='utf-8-sig') as f:
+        expected = find_station(parse_station_blocks(f, 2011, 2012), 'station 2')
+    got = read_station(str(path), 'Station 2', 2011, 2012)
+    assert [b.title for b in got] == [b.title for b in expected] == ['Total Rainfall (mm) - Station 2']
+    assert got[0].dates == expected[0].dates and got[0].flags == expected[0].flags
+    assert got[0].values.tobytes() == expected[0].values.tobytes()
+    # outside the block's date span: nothing is read, but the block is still found without
+    # rows, like parse_station_blocks
+    (empty,) = read_station(str(path), 'station 2', 2020)
+    assert empty.title == 'Total Rainfall (mm) - Station 2' and len(empty) == 0
+    assert read_station(str(path), 'no such station') == []
+
+    assert [s[0] for s in list_stations(str(path))] == [f'Total Rainfall (mm) - Station {s}' for s in range(4)]
+
+
+def test_index_is_rebuilt_when_the_file_changes(tmp_path):
+    path = tmp_path / 'daily.csv'
+    _write(path, stations=2, days=10)
+    assert len(open_index(str(path))) == 2
+    # touched but unchanged: the index is kept
+    os.utime(path, ns=(1, 1))
+    assert len(open_index(str(path))) == 2
+    _write(path, stations=3, days=10)
+    assert len(open_index(str(path))) == 3
+    assert len(read_station(str(path), 'station 2')[0]) == 10
@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from series import DailySeries
+from storage import load_series, parquet_path, read_parquet_series, write_parquet
+
+
+def test_parquet_roundtrip_with_date_filter():
+    dates = np.arange(np.datetime64('2010-12-30'), np.datetime64('2011-01-03'))
+    s = DailySeries(dates, [1.0, np.nan, 3.0, 4.0], 'Mean Wind Speed (km/h) - Kai Tak')
+    with tempfile.TemporaryDirectory() as d:
+        p = write_parquet(os.path.join(d, 'wind.parquet'), s, 'mean_wspd')
+        back = read_parquet_series(p, 'mean_wspd')
+        assert back.name == s.name
+        assert (back.dates == s.dates).all()
+        assert np.array_equal(back.values, s.values, equal_nan=True)
+        only_2011 = read_parquet_series(p, 'mean_wspd', start='2011-01-01')
+        assert only_2011.values.tolist() == [3.0, 4.0]
+
+
+def test_load_series_prefers_fresh_parquet():
+    with tempfile.TemporaryDirectory() as d:
+        csv_path = os.path.join(d, 'wind.csv')
+        with open(csv_path, 'w', encoding='utf8') as f:
+            f.write('date,station,mean_wspd\n2010-01-01,Kai Tak,1.0\n')
+        assert load_series(csv_path, 'date', 'mean_wspd').values.tolist() == [1.0]
+        s = DailySeries(np.array(['2010-01-01'], 'datetime64[D]'), [2.0], 'Kai Tak')
+        write_parquet(parquet_path(csv_path), s, 'mean_wspd')
+        assert load_series(csv_path, 'date', 'mean_wspd').values.tolist() == [2.0]
+        # a CSV rewritten after the Parquet file wins again
+        os.utime(csv_path, (os.path.getmtime(csv_path) + 10,) * 2)
+        assert load_series(csv_path, 'date', 'mean_wspd').values.tolist() == [1.0]
@@ -0,0 +1,51 @@
+import numpy as np
+
+from subdaily import MISSING_INT16, SubDailySeries, load, read_subdaily_csv
+
+
+def test_encoding_round_trips_times_gaps_and_values(tmp_path):
+    times = np.array(['2010-01-01T00:00', '2010-01-01T00:10', '2010-01-01T00:40',
+                      '2010-01-01T00:50', '2010-01-02T00:00'], 'datetime64[m]')
+    values = [1.5, np.nan, -2.0, 3.1, 7.0]
+    s = SubDailySeries.from_arrays(times, values, name='temp')
+    assert s.step == 10 and s.values.dtype == np.int16
+    assert s.gaps.tolist() == [[2, 2], [6, 138]]
+    assert s.values[1] == MISSING_INT16
+    assert np.array_equal(s.times(), times)
+    assert np.array_equal(s.decoded(), values, equal_nan=True)
+
+    days, means = s.daily('mean')
+    assert days.astype(str).tolist() == ['2010-01-01', '2010-01-02']
+    assert np.allclose(means, [(1.5 - 2.0 + 3.1) / 3, 7.0])
+    months, totals = s.monthly('sum')
+    assert months.astype(str).tolist() == ['2010-01'] and np.isclose(totals[0], 9.6)
+
+    back = load(s.save(str(tmp_path / 'temp.npz')))
+    assert back.step == 10 and back.decimals == 1 and back.name == 'temp'
+    assert np.array_equal(back.times(), times)
+
+
+def test_float32_fallback_and_off_grid_rows():
+    times = np.array(['2010-01-01T00:00', '2010-01-01T01:00'], 'datetime64[m]')
+    s = SubDailySeries.from_arrays(times, [40000.0, 0.25])
+    assert s.values.dtype == np.float32 and s.decimals is None
+    assert s.decoded().tolist() == [40000.0, 0.25]
+    try:
+        SubDailySeries.from_arrays(times + np.array([0, 5], 'timedelta64[m]'), [1.0, 2.0], step=60)
+    except ValueError as e:
+        assert '60-minute grid' in str(e)
+    else:
+        raise AssertionError('off-grid timestamp accepted')
+
+
+def test_read_subdaily_csv_groups_stations(tmp_path):
+    path = tmp_path / 'hourly.csv'
+    path.write_text('station,time,value\n'
+                    'KP,201001010000,1.0\nHKO,201001010000,20.0\nKP,201001010100,***\n'
+                    'HKO,201001010100,21.0\nKP,201001010300,3.0\nbad,notatime,1\n')
+    series = read_subdaily_csv(str(path), 'time', 'value', station_col='station')
+    assert sorted(series) == ['HKO', 'KP']
+    kp = series['KP']
+    assert kp.step == 60 and kp.gaps.tolist() == [[2, 1]]
+    assert np.array_equal(kp.decoded(), [1.0, np.nan, 3.0], equal_nan=True)
+    assert series['HKO'].daily('max')[1].tolist() == [21.0]
@@ -0,0 +1,44 @@
+import xml.dom.minidom
+
+import numpy as np
+
+import make_7_svg
+import svg_tiles
+from series import DailySeries
+
+
+def test_template_renders_the_7_svg_layout():
+    t = svg_tiles.compile_template('a {x} 100% {y}{x}')
+    assert t.fields == ('x', 'y', 'x')
+    assert t.render(x=1, y='b') == 'a 1 100% b1'
+
+    svg = make_7_svg.make_svg(10.91, 32802.5)
+    assert 'Rainfall &amp; Wind Summary (Kai Tak)' in svg
+    assert '<rect x="50" y="134.28571428571428" width="100" height="85.71428571428572"' in svg
+    assert '>10.91 km/h<' in svg and '>32802 mm<' in svg
+    xml.dom.minidom.parseString(svg)
+    assert '>No data<' in make_7_svg.make_svg(None, 1.0)
+
+
+def test_summaries_and_sprite(tmp_path):
+    days = np.arange('2010-01-01', '2012-01-01', dtype='datetime64[D]')
+    wind = {'Kai Tak': DailySeries(days, np.full(len(days), 10.0)),
+            'Sha Tin': DailySeries(days[:365], np.full(365, 5.0))}
+    rain = {'Kai Tak': DailySeries(days, np.ones(len(days)))}
+    stations, labels, mean_wind, total_rain = svg_tiles.summaries(wind, rain, 'Y')
+    assert stations == ['Kai Tak', 'Sha Tin'] and labels == ['2010', '2011']
+    assert mean_wind.tolist()[0] == [10.0, 10.0] and mean_wind[1, 0] == 5.0 and np.isnan(mean_wind[1, 1])
+    assert total_rain[0].tolist() == [365.0, 365.0] and np.isnan(total_rain[1]).all()
+
+    _, labels, mean_wind, total_rain = svg_tiles.summaries(wind, rain, 'M', window=12)
+    assert len(labels) == 13 and labels[0] == '2010-01..2010-12'
+    assert total_rain[0, 0] == 365.0 and mean_wind[1, 1] == 5.0
+
+    columns = svg_tiles.tile_columns(mean_wind.ravel(), total_rain.ravel(), ['S & T'] * mean_wind.size)
+    path = svg_tiles.write_sprite(str(tmp_path / 'sprite.svg'), columns, mean_wind.size, cols=5)
+    doc = xml.dom.minidom.parse(path)
+    assert len(doc.documentElement.getElementsByTagName('svg')) == mean_wind.size
+    assert doc.documentElement.getAttribute('width') == '3000'
+    paths = svg_tiles.write_tiles(str(tmp_path / 'tiles'), [f't{i}' for i in range(3)],
+                                  {k: v[:3] for k, v in columns.items()})
+    assert len(paths) == 3 and xml.dom.minidom.parse(paths[0])
@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import weather
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_csv_only_run_from_cache_skips_heavy_imports(tmp_path):
+    raw = tmp_path / 'daily_SE_WSPD_ALL.csv'
+    rows = ''.join(f'2010,1,{d},{10 + d % 3}.0,C\n' for d in range(1, 32))
+    raw.write_text('平均風速 - 啟德\nMean Wind Speed (km/h) - Kai Tak\n'
+                   '年/Year,月/Month,日/Day,數值/Value,數據完整性/data Completeness\n' + rows, encoding='utf-8-sig')
+    # a fresh cache entry: fetch_file returns without a request
+    (tmp_path / 'daily_SE_WSPD_ALL.csv.meta.json').write_text(json.dumps({'fetched_at': time.time()}))
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-X', 'importtime', os.path.join(ROOT, 'scripts', 'weather.py'),
+                             'wind', '--csv-only'], cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert (tmp_path / 'kaitak_wind_2010_2025.csv').exists()
+    assert not (tmp_path / 'kaitak_wind_2010_2025.png').exists()
+    imported = {line.split('|')[-1].strip() for line in result.stderr.splitlines() if line.startswith('import time:')}
+    assert not {m for m in imported if m.split('.')[0] in weather.HEAVY_MODULES}
+
+
+def test_budgeted_commands_import_no_heavy_modules():
+    # the wall-clock budget is checked by `weather startup`, not here
+    for command in weather.BUDGETED:
+        _, modules = weather.import_profile(command)
+        assert weather.COMMANDS[command[0]][0] in modules
+        assert not {m for m in modules if m.split('.')[0] in weather.HEAVY_MODULES}, command
+
+
+def test_startup_arguments_are_one_command_with_flags():
+    assert weather.startup_commands(['wind', '--csv-only', 'summary']) == [['wind', '--csv-only'], ['summary']]
+    assert weather.startup_commands([]) == []
+    for bad in (['--csv-only'], ['summary', '--csv-only'], ['nope']):
+        with pytest.raises(ValueError):
+            weather.startup_commands(bad)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""One command line for all the scripts: `weather <command> [args]`.
+
+Each command's module is imported only when that command runs, and the modules import
+their heavy dependencies (matplotlib via render.py, requests/lxml in scraping_utils,
+pyarrow in storage.py) only in the functions that need them. A command that only
+refreshes CSVs from a cached download never imports them.
+
+Commands:
+  fetch                  download the HKO station files (fetch_all.py)
+  wind [--csv-only]      Kai Tak wind CSV + chart (fetch_kaitak_wind.py; --csv-only skips the chart)
+  rain [--csv-only]      Kai Tak rainfall CSV + 7.svg (fetch_daily_rainfall_kaitak.py; --csv-only skips 7.svg)
+  monthly-rain           monthly rainfall CSV + chart (fetch_monthly_kaitak.py)
+  summary                7.svg (make_7_svg.py)
+  monthly                monthly wind/rain chart (make_monthly_wind_rain.py)
+  tiles | rollup | parallel | pipeline | serve
+                         the scripts of the same name, with their own arguments
+  startup [command [--csv-only] ...]
+                         measure the import time of commands with `python -X importtime`
+
+Startup budget: the cache-hit / CSV-only commands (BUDGETED) must import in less than
+STARTUP_BUDGET_MS (default 400 ms, cumulative `-X importtime` of all top-level imports,
+interpreter start-up included) and without any of HEAVY_MODULES. `weather startup` checks
+this and exits with status 1 when a command is over budget (the unit tests only check for
+heavy imports, wall-clock times are left to this command).
+
+Usage:
+  PYTHONPATH=. .venv/bin/python scripts/weather.py <command> [args] [--profile]
+"""
+import importlib
+import os
+import runpy
+import subprocess
+import sys
+
+# name -> (module, help); the module's main() is called with the remaining arguments in sys.argv
+COMMANDS = {
+    'fetch': ('fetch_all', 'download the HKO station files'),
+    'wind': ('fetch_kaitak_wind', 'Kai Tak wind CSV and chart'),
+    'rain': ('fetch_daily_rainfall_kaitak', 'Kai Tak rainfall CSV and 7.svg'),
+    'monthly-rain': ('fetch_monthly_kaitak', 'monthly rainfall CSV and chart'),
+    'summary': ('make_7_svg', '7.svg summary'),
+    'monthly': ('make_monthly_wind_rain', 'monthly wind/rain chart'),
+    'tiles': ('svg_tiles', 'summary tiles for every station'),
+    'rollup': ('rollup', 'range query on a processed CSV'),
+    'parallel': ('parallel', 'aggregate every station of an HKO file'),
+    'pipeline': ('pipeline', 'rebuild the stale outputs'),
+    'serve': ('serve', 'HTTP/JSON server'),
+}
+# commands that skip their plot/SVG step with --csv-only
+CSV_ONLY = {'wind': 'plot', 'rain': 'svg'}
+# module-level scripts (no main())
+SCRIPTS = {'fetch_monthly_kaitak'}
+
+BUDGETED = (['wind', '--csv-only'], ['rain', '--csv-only'], ['summary'], ['rollup'])
+HEAVY_MODULES = ('matplotlib', 'requests', 'lxml', 'pyarrow')
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '400'))
+
+
+def _usage() -> str:
+    lines = ['usage: weather <command> [args]', '', 'commands:']
+    lines += [f'  {name:<14} {help_}' for name, (_, help_) in COMMANDS.items()]
+    lines.append(f'  {"startup":<14} import time of commands, e.g. startup wind --csv-only summary')
+    return '\n'.join(lines)
+
+
+def run(argv) -> None:
+    """Run one command; argv is [command, args...]."""
+    if not argv or argv[0] in ('-h', '--help'):
+        print(_usage())
+        return
+    name, args = argv[0], list(argv[1:])
+    if name == 'startup':
+        try:
+            commands = startup_commands(args)
+        except ValueError as e:
+            print(f'weather startup: {e}\n\n{_usage()}', file=sys.stderr)
+            sys.exit(2)
+        sys.exit(0 if startup_report(commands) else 1)
+    if name not in COMMANDS:
+        print(f'weather: unknown command {name!r}\n\n{_usage()}', file=sys.stderr)
+        sys.exit(2)
+    module_name = COMMANDS[name][0]
+    kwargs = {}
+    if name in CSV_ONLY and '--csv-only' in args:
+        args.remove('--csv-only')
+        kwargs[CSV_ONLY[name]] = False
+    sys.argv = [f'weather {name}'] + args
+    if module_name in SCRIPTS:
+        runpy.run_module(module_name, run_name='__main__')
+        return
+    importlib.import_module(module_name).main(**kwargs)
+
+
+def startup_commands(args) -> list:
+    """Split `startup` arguments into commands: ['wind', '--csv-only', 'summary'] -> [['wind', '--csv-only'], ['summary']]."""
+    commands = []
+    for arg in args:
+        if arg in COMMANDS:
+            commands.append([arg])
+        elif arg == '--csv-only' and commands and commands[-1][0] in CSV_ONLY:
+            commands[-1].append(arg)
+        elif arg.startswith('-'):
+            raise ValueError(f'unexpected option {arg!r}')
+        else:
+            raise ValueError(f'unknown command {arg!r}')
+    return commands
+
+
+def import_profile(command) -> tuple:
+    """(milliseconds, {module: cumulative ms}) of importing `command`'s module, from -X importtime."""
+    module_name = COMMANDS[command[0]][0]
+    code = f'import sys; sys.path[:0] = {[os.path.dirname(os.path.abspath(__file__))]!r}; import {module_name}'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, ['.', os.getenv('PYTHONPATH')]))))
+    if result.returncode:
+        raise RuntimeError(f'importing {module_name} failed:\n{result.stderr}')
+    total_us = 0
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative) / 1000
+        if not name.startswith('  '):  # top level
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def startup_report(commands=None) -> bool:
+    """Print the import time of each command; False if a budgeted one is over budget or heavy."""
+    ok = True
+    for command in commands or BUDGETED:
+        ms, modules = import_profile(command)
+        heavy = sorted(m for m in modules if m.split('.')[0] in HEAVY_MODULES and '.' not in m)
+        budgeted = command in BUDGETED or [command[0], '--csv-only'] in BUDGETED
+        over = budgeted and (ms > STARTUP_BUDGET_MS or heavy)
+        ok = ok and not over
+        print(f'{" ".join(command):<20} {ms:7.1f} ms  heavy: {", ".join(heavy) or "-":<24}'
+              f'{"OVER BUDGET" if over else ("ok" if budgeted else "")}')
+    return ok
+
+
+def main():
+    run(sys.argv[1:])
+
+
+if __name__ == '__main__':
+    main()